@@ -0,0 +1,308 @@
+"""
+关注提醒模块
+按订阅者配置的关键词 / 正则规则检查每次抓取结果，命中且满足排名、热度阈值时立即推送飞书提醒，
+同一词条在去重窗口内只提醒一次（排名升入更高档位时除外）
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from feishu_notifier import FeishuNotifier
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# 提醒状态文件（去重记录）
+# 注意：GitHub Actions 工作流（scrape-and-notify.yml）不保存该文件（既不提交也不在缓存中），
+# 每次运行都从空状态开始，去重只在单次运行内有效；需要跨运行去重时使用常驻进程（main.py / workers.py）
+DEFAULT_STATE_PATH = os.getenv('ALERT_STATE_PATH', 'data/alert_state.json')
+
+DEFAULT_DEDUP_MINUTES = 180
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """编译后的提醒规则"""
+
+    subscriber: str
+    name: str
+    pattern: Pattern
+    max_rank: Optional[int]
+    min_hot_value: int
+    escalate_ranks: Tuple[int, ...]
+
+    def matches(self, item: Dict) -> bool:
+        """词条是否命中规则且满足阈值"""
+        if self.max_rank is not None and item['rank'] > self.max_rank:
+            return False
+        if (item.get('hot_value') or 0) < self.min_hot_value:
+            return False
+        return self.pattern.search(item['word']) is not None
+
+    def tier(self, rank: int) -> int:
+        """排名所在档位（越大越靠前），用于判断是否升档"""
+        return sum(1 for bound in self.escalate_ranks if rank <= bound)
+
+
+def compile_rules(alert_config: Dict, categories: Dict[str, Dict]) -> Dict[str, List[AlertRule]]:
+    """
+    编译所有订阅者的规则
+
+    Args:
+        alert_config: alerts 配置段
+        categories: content_categories 配置段（规则可通过 category 复用板块关键词）
+
+    Returns:
+        订阅者名称 -> 规则列表
+    """
+    rules_by_subscriber: Dict[str, List[AlertRule]] = {}
+    for subscriber in alert_config.get('subscribers', []) or []:
+        name = subscriber.get('name', 'default')
+        rules = []
+        for rule in subscriber.get('rules', []) or []:
+            keywords = list(rule.get('keywords', []) or [])
+            category = rule.get('category')
+            if category:
+                keywords.extend((categories.get(category, {}) or {}).get('keywords', []) or [])
+
+            # 关键词和自定义正则合并为一个正则，每个词条只需匹配一次
+            alternatives = [re.escape(str(keyword)) for keyword in dict.fromkeys(keywords)]
+            if rule.get('regex'):
+                alternatives.append(f"(?:{rule['regex']})")
+            if not alternatives:
+                logger.warning("提醒规则 %s/%s 没有关键词，已忽略", name, rule.get('name'))
+                continue
+
+            try:
+                pattern = re.compile('|'.join(alternatives), re.IGNORECASE)
+            except re.error as e:
+                logger.error("提醒规则 %s/%s 正则无效: %s", name, rule.get('name'), e)
+                continue
+
+            rules.append(AlertRule(
+                subscriber=name,
+                name=rule.get('name', category or 'rule'),
+                pattern=pattern,
+                max_rank=rule.get('max_rank'),
+                min_hot_value=int(rule.get('min_hot_value', 0) or 0),
+                escalate_ranks=tuple(sorted(rule.get('escalate_ranks', []) or [], reverse=True)),
+            ))
+        if rules:
+            rules_by_subscriber[name] = rules
+    return rules_by_subscriber
+
+
+class AlertEngine:
+    """关注提醒引擎"""
+
+    def __init__(self, alert_config: Dict, categories: Optional[Dict[str, Dict]] = None,
+                 state_path: str = DEFAULT_STATE_PATH):
+        """
+        初始化提醒引擎
+
+        Args:
+            alert_config: alerts 配置段
+            categories: content_categories 配置段
+            state_path: 去重状态文件路径
+        """
+        self.rules = compile_rules(alert_config, categories or {})
+        self.dedup_seconds = float(alert_config.get('dedup_minutes', DEFAULT_DEDUP_MINUTES)) * 60
+        self.webhook_envs = {
+            subscriber.get('name', 'default'): subscriber.get('webhook_env', '')
+            for subscriber in alert_config.get('subscribers', []) or []
+        }
+        self.state_path = state_path
+        self._state: Optional[Dict[str, Dict]] = None
+
+    @classmethod
+    def from_config_loader(cls, config_loader) -> Optional['AlertEngine']:
+        """
+        根据配置创建提醒引擎
+
+        Returns:
+            提醒引擎，未启用或没有有效规则时返回 None
+        """
+        alert_config = config_loader.get_alert_config()
+        if not alert_config.get('enabled', False):
+            return None
+        engine = cls(alert_config, config_loader.config.get('content_categories', {}) or {})
+        return engine if engine.rules else None
+
+    @property
+    def state(self) -> Dict[str, Dict]:
+        """去重状态：'订阅者|规则|词条' -> {'t': 上次提醒时间, 'rank': 上次提醒时的排名}"""
+        if self._state is None:
+            try:
+                with open(self.state_path, encoding='utf-8') as f:
+                    self._state = json.load(f)
+            except FileNotFoundError:
+                self._state = {}
+            except (OSError, ValueError) as e:
+                logger.warning("提醒状态读取失败，已重置: %s", e)
+                self._state = {}
+        return self._state
+
+    def save_state(self, now: Optional[float] = None):
+        """写回去重状态（清理已过期的记录）"""
+        now = now if now is not None else time.time()
+        self._state = {key: value for key, value in self.state.items() if now - value['t'] < self.dedup_seconds}
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def evaluate(self, hot_list: List[Dict], now: Optional[float] = None) -> Dict[str, List[Dict]]:
+        """
+        检查一次抓取结果（遍历一次热榜，每个词条依次匹配所有规则）
+
+        Args:
+            hot_list: 热榜数据
+            now: 当前时间戳（秒）
+
+        Returns:
+            订阅者 -> 待推送的提醒列表 [{'rule', 'item', 'reason'}, ...]
+        """
+        now = now if now is not None else time.time()
+        state = self.state
+        alerts: Dict[str, List[Dict]] = {}
+
+        with span('alert_evaluate', item_count=len(hot_list)):
+            for item in hot_list:
+                for subscriber, rules in self.rules.items():
+                    for rule in rules:
+                        if not rule.matches(item):
+                            continue
+
+                        key = f"{subscriber}|{rule.name}|{item['word']}"
+                        previous = state.get(key)
+                        if previous is None or now - previous['t'] >= self.dedup_seconds:
+                            reason = 'new'
+                        elif rule.tier(item['rank']) > rule.tier(previous['rank']):
+                            reason = 'escalate'
+                        else:
+                            continue
+
+                        state[key] = {'t': now, 'rank': item['rank']}
+                        alerts.setdefault(subscriber, []).append({'rule': rule.name, 'item': item, 'reason': reason})
+
+        return alerts
+
+    def _webhook_for(self, subscriber: str, default_webhook: Optional[str]) -> Optional[str]:
+        env_name = self.webhook_envs.get(subscriber)
+        return (os.getenv(env_name, '').strip() if env_name else '') or default_webhook
+
+    @staticmethod
+    def format_alert(subscriber: str, alerts: List[Dict], source_name: str) -> str:
+        """
+        格式化提醒消息
+
+        Args:
+            subscriber: 订阅者名称
+            alerts: 提醒列表
+            source_name: 数据源名称
+
+        Returns:
+            文本消息
+        """
+        lines = [f"🚨 关注提醒 · {subscriber}"]
+        for alert in alerts:
+            item = alert['item']
+            marker = '⬆️ 排名上升' if alert['reason'] == 'escalate' else '🆕 新上榜'
+            label = f" [{item['label']}]" if item.get('label') else ''
+            lines.append(
+                f"{marker} [{alert['rule']}] 第{item['rank']}名: {item['word']}{label} 🔥{item.get('hot_value', 0)}"
+            )
+        if source_name:
+            lines.append(f"\n数据来源: {source_name}")
+        return '\n'.join(lines)
+
+    def run(self, hot_list: List[Dict], source_name: str = '', default_webhook: Optional[str] = None) -> int:
+        """
+        检查热榜并推送提醒
+
+        Args:
+            hot_list: 热榜数据
+            source_name: 数据源名称
+            default_webhook: 订阅者未单独配置 Webhook 时使用的地址
+
+        Returns:
+            推送成功的提醒条数
+        """
+        now = time.time()
+        alerts = self.evaluate(hot_list, now)
+        sent = 0
+        for subscriber, subscriber_alerts in alerts.items():
+            webhook_url = self._webhook_for(subscriber, default_webhook)
+            if not webhook_url:
+                logger.warning("订阅者 %s 未配置 Webhook，跳过 %s 条提醒", subscriber, len(subscriber_alerts))
+                continue
+            logger.info("🚨 %s: %s 条关注提醒", subscriber, len(subscriber_alerts))
+            notifier = FeishuNotifier(webhook_url)
+            if notifier.send_text_message(self.format_alert(subscriber, subscriber_alerts, source_name)):
+                sent += len(subscriber_alerts)
+            else:
+                # 发送失败时撤销去重记录，下次抓取重试
+                for alert in subscriber_alerts:
+                    self.state.pop(f"{subscriber}|{alert['rule']}|{alert['item']['word']}", None)
+
+        if alerts:
+            self.save_state(now)
+        return sent
+
+
+# 最近一次编译的引擎：(配置快照, 引擎)，配置热加载替换快照后才重新编译
+_engine_cache: Optional[Tuple[object, Optional[AlertEngine]]] = None
+_engine_lock = threading.Lock()
+
+
+def engine_for(config_loader) -> Optional[AlertEngine]:
+    """
+    获取当前配置对应的提醒引擎（规则只在配置快照变化时重新编译，去重状态随引擎保留在内存中）
+
+    Args:
+        config_loader: 配置加载器
+
+    Returns:
+        提醒引擎，未启用或没有有效规则时返回 None
+    """
+    global _engine_cache
+    snapshot = config_loader.snapshot
+    with _engine_lock:
+        if _engine_cache is None or _engine_cache[0] is not snapshot:
+            _engine_cache = (snapshot, AlertEngine.from_config_loader(config_loader))
+        return _engine_cache[1]
+
+
+def run_alerts(config_loader, hot_list: List[Dict], source_name: str = '',
+               default_webhook: Optional[str] = None, is_test_data: bool = False) -> int:
+    """
+    按配置检查关注提醒（未启用时什么也不做）
+
+    Args:
+        config_loader: 配置加载器
+        hot_list: 热榜数据
+        source_name: 数据源名称
+        default_webhook: 默认飞书 Webhook
+        is_test_data: 是否为测试数据（测试数据不触发提醒）
+
+    Returns:
+        推送成功的提醒条数
+    """
+    if is_test_data or not hot_list:
+        return 0
+    engine = engine_for(config_loader)
+    if engine is None:
+        return 0
+    try:
+        return engine.run(hot_list, source_name, default_webhook)
+    except Exception as e:
+        logger.error("关注提醒执行失败: %s", e, exc_info=True)
+        return 0
@@ -0,0 +1,203 @@
+"""
+热榜历史列式导出模块
+把 trend_archive 的按天快照导出为按 date / source 分区的 Parquet 文件（Hive 分区目录），
+可直接用 pandas / DuckDB 读取。词条、标签、板块为字典编码列，热度和抓取时间为 int64。
+导出是增量的：每天的快照文件只追加，按文件大小判断是否变化，未变化的日期直接跳过，
+日常导出只需重写当天的分区，耗时与历史总量无关。需要安装 pyarrow（可选依赖）
+"""
+import os
+import json
+import shutil
+import logging
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from lazy_import import lazy_import
+from trend_archive import TIME_FORMAT, TrendArchive
+
+logger = logging.getLogger(__name__)
+
+# pyarrow 为可选依赖，只有导出时才导入
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+
+# 导出状态文件格式版本（列定义变化时递增，触发全量重新导出）
+STATE_VERSION = 1
+
+STATE_FILE = '_export_state.json'
+
+# 每个分区的文件名
+PART_FILE = 'part-0.parquet'
+
+# 默认导出目录
+DEFAULT_EXPORT_DIR = os.getenv('PARQUET_EXPORT_DIR', 'data/parquet')
+
+# 压缩算法
+COMPRESSION = os.getenv('PARQUET_COMPRESSION', 'zstd')
+
+
+def pyarrow_available() -> bool:
+    """是否安装了 pyarrow"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def snapshot_schema():
+    """
+    分区文件的列定义（date / source 由分区目录提供）
+
+    Returns:
+        pyarrow Schema
+    """
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        # 抓取时间（Unix 秒）
+        ('poll_time', pa.int64()),
+        ('category', dictionary),
+        ('rank', pa.int16()),
+        ('word', dictionary),
+        ('hot_value', pa.int64()),
+        ('label', dictionary),
+    ])
+
+
+class ParquetExporter:
+    """归档快照的增量 Parquet 导出"""
+
+    def __init__(self, archive: TrendArchive, output_dir: Optional[str] = None):
+        """
+        初始化导出器
+
+        Args:
+            archive: 历史归档
+            output_dir: 导出目录，默认使用环境变量 PARQUET_EXPORT_DIR 或 data/parquet
+        """
+        self.archive = archive
+        self.output_dir = Path(output_dir or DEFAULT_EXPORT_DIR)
+        self.state_path = self.output_dir / STATE_FILE
+
+    def _load_state(self) -> Dict:
+        try:
+            state = json.loads(self.state_path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return {'version': STATE_VERSION, 'days': {}}
+        except (OSError, ValueError) as e:
+            logger.warning("导出状态读取失败，将全量重新导出: %s", e)
+            return {'version': STATE_VERSION, 'days': {}}
+        if state.get('version') != STATE_VERSION:
+            logger.info("导出格式版本变化，全量重新导出")
+            return {'version': STATE_VERSION, 'days': {}}
+        return state
+
+    def _save_state(self, state: Dict):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix('.json.tmp')
+        tmp_path.write_text(json.dumps(state, ensure_ascii=False, sort_keys=True), encoding='utf-8')
+        os.replace(tmp_path, self.state_path)
+
+    def partition_path(self, date: str, source: str) -> Path:
+        """
+        分区文件路径
+
+        Args:
+            date: 日期（YYYY-MM-DD）
+            source: 数据源键名
+
+        Returns:
+            output_dir/date=<date>/source=<source>/part-0.parquet
+        """
+        return self.output_dir / f"date={date}" / f"source={source}" / PART_FILE
+
+    def export(self, full: bool = False) -> Dict:
+        """
+        导出新增或变化的日期
+
+        Args:
+            full: 是否忽略导出状态，重新导出全部日期
+
+        Returns:
+            {'days': 导出的天数, 'skipped': 跳过的天数, 'partitions': 写入的分区数, 'rows': 写入的行数}
+        """
+        state = {'version': STATE_VERSION, 'days': {}} if full else self._load_state()
+        summary = {'days': 0, 'skipped': 0, 'partitions': 0, 'rows': 0}
+
+        for path in self.archive.snapshot_files():
+            date = path.stem
+            size = path.stat().st_size
+            exported = state['days'].get(date)
+            if exported and exported['bytes'] == size and all(
+                    self.partition_path(date, source).exists() for source in exported['sources']):
+                summary['skipped'] += 1
+                continue
+
+            rows = self._export_day(path, date, exported['sources'] if exported else [])
+            state['days'][date] = {'bytes': size, 'sources': sorted(rows), 'rows': sum(rows.values())}
+            # 每天导出后立即记录，中断后再次运行从未完成的日期继续
+            self._save_state(state)
+            summary['days'] += 1
+            summary['partitions'] += len(rows)
+            summary['rows'] += sum(rows.values())
+            logger.info("📦 已导出 %s: %s 个数据源, %s 行", date, len(rows), sum(rows.values()))
+
+        return summary
+
+    def _export_day(self, path: Path, date: str, previous_sources: List[str]) -> Dict[str, int]:
+        """
+        导出一天的快照（按数据源写入各自的分区）
+
+        Args:
+            path: 快照文件路径
+            date: 日期
+            previous_sources: 上次导出该日期时的数据源（已不存在的分区会被删除）
+
+        Returns:
+            数据源 -> 行数
+        """
+        columns: Dict[str, Dict[str, list]] = {}
+        for snapshot in self.archive.read_snapshot_file(path):
+            items = snapshot['items']
+            if not items:
+                continue
+            source = snapshot['source']
+            column = columns.get(source)
+            if column is None:
+                column = columns[source] = {name: [] for name in snapshot_schema().names}
+            # 每条快照只解析一次时间，条目展开为列
+            poll_time = int(datetime.strptime(snapshot['t'], TIME_FORMAT).timestamp())
+            count = len(items)
+            column['poll_time'].extend([poll_time] * count)
+            column['category'].extend([snapshot.get('category', 'all')] * count)
+            for rank, word, hot_value, label in items:
+                column['rank'].append(rank)
+                column['word'].append(word)
+                column['hot_value'].append(hot_value)
+                column['label'].append(label or '')
+
+        rows = {}
+        for source, column in columns.items():
+            self._write_partition(self.partition_path(date, source), column)
+            rows[source] = len(column['word'])
+
+        for source in previous_sources:
+            if source not in columns:
+                shutil.rmtree(self.partition_path(date, source).parent, ignore_errors=True)
+        return rows
+
+    @staticmethod
+    def _write_partition(path: Path, column: Dict[str, list]):
+        """写入一个分区文件（先写临时文件再替换，读取方不会看到写了一半的文件）"""
+        schema = snapshot_schema()
+        arrays = []
+        for field in schema:
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(column[field.name], pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(column[field.name], field.type))
+        table = pa.Table.from_arrays(arrays, schema=schema)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 临时文件以 . 开头，pyarrow / DuckDB 读取目录时会忽略
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        pq.write_table(table, tmp_path, compression=COMPRESSION)
+        os.replace(tmp_path, path)
@@ -3,12 +3,141 @@
 支持从 YAML 文件和环境变量加载配置
 """
 import os
-import yaml
+import re
+import marshal
+import hashlib
 import logging
-from typing import Dict, List, Any, Optional
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from item_schema import DEFAULT_SCHEMA, ItemSchema
+from lazy_import import lazy_import
+from metrics import FILTER_SECONDS
+from tracing import span
+
+# yaml 只在配置缓存失效时才需要
+yaml = lazy_import('yaml')
 
 logger = logging.getLogger(__name__)
 
+# 配置缓存格式版本，缓存结构变化时递增
+CONFIG_CACHE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    预先计算好的只读配置快照
+
+    所有查询结果（URL 列表、板块匹配器、URL -> 数据源映射、条目校验约定、环境变量覆盖）在构建时
+    一次算好，配置变更时整体替换，热路径上读取无需任何重复计算。
+    返回的字典与快照共享，调用方不应修改。
+    """
+
+    raw: Dict
+    mtime_ns: int
+    enabled_sources: Dict[str, Dict]
+    enabled_categories: Dict[str, Dict]
+    api_urls: Tuple[str, ...]
+    api_urls_by_source: Dict[str, Tuple[str, ...]]
+    source_key_by_url: Dict[str, str]
+    source_name_by_url: Dict[str, str]
+    source_names: Dict[str, str]
+    item_schemas: Dict[str, ItemSchema]
+    category_names: Dict[str, str]
+    category_matchers: Dict[str, Optional[Pattern]]
+    scraper_config: Dict
+    display_config: Dict
+    alert_config: Dict
+
+
+def _split_env_list(name: str) -> List[str]:
+    """读取逗号分隔的环境变量"""
+    value = os.getenv(name, '')
+    return [item.strip() for item in value.split(',')] if value else []
+
+
+def build_snapshot(config: Dict, mtime_ns: int = 0) -> ConfigSnapshot:
+    """
+    根据配置字典和当前环境变量构建配置快照
+
+    Args:
+        config: 原始配置字典
+        mtime_ns: 配置文件修改时间（用于变更检测）
+
+    Returns:
+        配置快照
+    """
+    data_sources = config.get('data_sources', {}) or {}
+    categories = config.get('content_categories', {}) or {}
+
+    # 启用的数据源：环境变量优先，否则使用配置文件中的 enabled
+    env_sources = _split_env_list('ENABLED_DATA_SOURCES')
+    if env_sources:
+        enabled_sources = {name: source for name, source in data_sources.items() if name in env_sources}
+    else:
+        enabled_sources = {name: source for name, source in data_sources.items() if source.get('enabled', False)}
+
+    # 启用的板块：环境变量优先（无匹配时回退到配置文件）
+    enabled_categories = {}
+    env_categories = _split_env_list('ENABLED_CATEGORIES')
+    if env_categories:
+        enabled_categories = {name: category for name, category in categories.items() if name in env_categories}
+    if not enabled_categories:
+        enabled_categories = {name: category for name, category in categories.items() if category.get('enabled', False)}
+        # 如果没有启用任何板块，默认启用综合板块
+        if not enabled_categories and 'all' in categories:
+            enabled_categories = {'all': categories['all']}
+
+    # API URL 列表及 URL -> 数据源映射
+    api_urls = []
+    for source_config in enabled_sources.values():
+        for api in source_config.get('apis', []):
+            api_urls.append(api.get('url'))
+
+    source_key_by_url = {}
+    source_name_by_url = {}
+    api_urls_by_source = {}
+    for source_key, source_config in data_sources.items():
+        api_urls_by_source[source_key] = tuple(api.get('url') for api in source_config.get('apis', []))
+        for api in source_config.get('apis', []):
+            url = api.get('url')
+            if url not in source_key_by_url:
+                source_key_by_url[url] = source_key
+                source_name_by_url[url] = source_config.get('name', source_key)
+
+    # 板块关键词编译为一个正则（无关键词则为 None，表示不过滤）
+    category_matchers = {}
+    for name, category in enabled_categories.items():
+        keywords = category.get('keywords', []) or []
+        category_matchers[name] = re.compile('|'.join(re.escape(str(k)) for k in keywords)) if keywords else None
+
+    # 抓取器配置（环境变量覆盖）
+    scraper_config = dict(config.get('scraper', {}) or {})
+    if os.getenv('HOT_LIST_LIMIT'):
+        scraper_config['limit'] = int(os.getenv('HOT_LIST_LIMIT'))
+    if os.getenv('REQUEST_TIMEOUT'):
+        scraper_config['timeout'] = int(os.getenv('REQUEST_TIMEOUT'))
+
+    return ConfigSnapshot(
+        raw=config,
+        mtime_ns=mtime_ns,
+        enabled_sources=enabled_sources,
+        enabled_categories=enabled_categories,
+        api_urls=tuple(api_urls),
+        api_urls_by_source=api_urls_by_source,
+        source_key_by_url=source_key_by_url,
+        source_name_by_url=source_name_by_url,
+        source_names={key: source.get('name', key) for key, source in data_sources.items()},
+        item_schemas={key: ItemSchema.from_config(source) for key, source in data_sources.items()},
+        category_names={key: category.get('name', key) for key, category in categories.items()},
+        category_matchers=category_matchers,
+        scraper_config=scraper_config,
+        display_config=config.get('display', {}) or {},
+        alert_config=config.get('alerts', {}) or {},
+    )
+
 
 class ConfigLoader:
     """配置加载器"""
@@ -21,30 +150,209 @@ class ConfigLoader:
             config_file: 配置文件路径
         """
         self.config_file = config_file
-        self.config = self._load_config()
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        # 上一次热加载失败时配置文件的修改时间（文件再次变化前不重复尝试）
+        self._failed_mtime_ns: Optional[int] = None
+        self._snapshot = build_snapshot(self._load_config(), self._get_mtime_ns())
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """当前配置快照（整体替换，读取时无需加锁）"""
+        return self._snapshot
+
+    @property
+    def config(self) -> Dict:
+        """原始配置字典"""
+        return self._snapshot.raw
+
+    def _get_mtime_ns(self) -> int:
+        """获取配置文件修改时间，文件不存在时返回 0"""
+        try:
+            return os.stat(self.config_file).st_mtime_ns
+        except OSError:
+            return 0
+
+    def update_config(self, config: Dict):
+        """
+        使用新的配置字典替换当前配置
+
+        Args:
+            config: 新的配置字典
+        """
+        self._snapshot = build_snapshot(config, self._snapshot.mtime_ns)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        配置文件有变化时重新加载
 
-    def _load_config(self) -> Dict:
+        Args:
+            force: 是否忽略修改时间强制重新加载
+
+        Returns:
+            是否发生了重新加载
+
+        Raises:
+            配置文件读取、解析或编译失败时抛出原异常，当前配置保持不变
+            （同一次修改只抛出一次，文件再次变化后重新尝试）
+        """
+        with self._reload_lock:
+            mtime_ns = self._get_mtime_ns()
+            if not force and mtime_ns in (self._snapshot.mtime_ns, self._failed_mtime_ns):
+                return False
+
+            try:
+                config = self._load_config(strict=True)
+                snapshot = build_snapshot(config, mtime_ns)
+            except Exception as e:
+                self._failed_mtime_ns = mtime_ns
+                logger.error("❌ 配置文件 %s 加载失败，继续使用上一次的配置: %s", self.config_file, e)
+                raise
+            self._snapshot = snapshot
+            self._failed_mtime_ns = None
+            logger.info("🔄 配置已重新加载: %s", self.config_file)
+            return True
+
+    def start_watching(self, interval: float = 5.0):
+        """
+        启动后台线程，定期检查配置文件修改时间并热加载
+
+        Args:
+            interval: 检查间隔（秒）
+        """
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                try:
+                    self.reload()
+                except Exception:
+                    # reload 已记录错误并保留上一次的配置
+                    pass
+
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=watch, name='config-watcher', daemon=True)
+        self._watcher.start()
+        logger.info("👀 已开启配置热加载（每 %s 秒检查一次）", interval)
+
+    def stop_watching(self):
+        """停止配置文件监听"""
+        if self._watcher is None:
+            return
+        self._stop_watching.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def _load_config(self, strict: bool = False) -> Dict:
         """
         加载配置文件
 
+        Args:
+            strict: 为 True 时文件不存在、读取或解析失败直接抛出异常（热加载时使用，避免把正在运行的
+                    配置替换为默认配置）；为 False 时回退到默认配置（启动时使用）
+
         Returns:
             配置字典
         """
         try:
             # 尝试加载 YAML 配置文件
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f)
-                    logger.info(f"成功加载配置文件: {self.config_file}")
-                    return config or {}
-            else:
-                logger.warning(f"配置文件不存在: {self.config_file}，使用默认配置")
-                return self._get_default_config()
+                config = self._load_cached_config()
+                if not isinstance(config, dict):
+                    raise ValueError(f"配置文件顶层应为字典，实际为 {type(config).__name__}")
+                logger.info("成功加载配置文件: %s", self.config_file)
+                return config
+            if strict:
+                raise FileNotFoundError(f"配置文件不存在: {self.config_file}")
+            logger.warning("配置文件不存在: %s，使用默认配置", self.config_file)
+            return self._get_default_config()
 
         except Exception as e:
-            logger.error(f"加载配置文件失败: {e}，使用默认配置")
+            if strict:
+                raise
+            logger.error("加载配置文件失败: %s，使用默认配置", e)
             return self._get_default_config()
 
+    def _get_cache_file(self) -> str:
+        """
+        获取配置缓存文件路径（CONFIG_CACHE_DIR 指定目录，默认为配置文件旁的 .cache）
+
+        Returns:
+            缓存文件路径
+        """
+        config_path = os.path.abspath(self.config_file)
+        cache_dir = os.getenv('CONFIG_CACHE_DIR') or os.path.join(os.path.dirname(config_path), '.cache')
+        return os.path.join(cache_dir, os.path.basename(config_path) + '.marshal')
+
+    def _load_cached_config(self) -> Dict:
+        """
+        加载配置，优先使用预编译缓存
+
+        缓存以 YAML 文件的 mtime/大小 作为快速校验，不一致时再比较内容 sha256，
+        因此 git checkout 之类只改变 mtime 的操作不会导致重新解析。
+
+        Returns:
+            配置字典
+        """
+        stat = os.stat(self.config_file)
+        cache_file = self._get_cache_file()
+
+        cached = None
+        try:
+            with open(cache_file, 'rb') as f:
+                cached = marshal.load(f)
+            if not isinstance(cached, dict) or cached.get('version') != CONFIG_CACHE_VERSION:
+                cached = None
+        except (OSError, EOFError, ValueError, TypeError):
+            cached = None
+
+        if cached and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+            return cached['config']
+
+        with open(self.config_file, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        if cached and cached['sha256'] == digest:
+            config = cached['config']
+        else:
+            config = yaml.safe_load(raw.decode('utf-8')) or {}
+
+        self._write_config_cache(cache_file, {
+            'version': CONFIG_CACHE_VERSION,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': digest,
+            'config': config,
+        })
+        return config
+
+    def _write_config_cache(self, cache_file: str, entry: Dict):
+        """
+        写入配置缓存（失败不影响正常加载）
+
+        Args:
+            cache_file: 缓存文件路径
+            entry: 缓存内容
+        """
+        try:
+            data = marshal.dumps(entry)
+        except ValueError:
+            # 配置中含有 marshal 不支持的类型（如 YAML 日期），不缓存
+            logger.debug("配置包含无法缓存的类型，跳过缓存")
+            return
+
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.debug("写入配置缓存失败: %s", e)
+
     def _get_default_config(self) -> Dict:
         """
         获取默认配置
@@ -91,79 +399,30 @@ class ConfigLoader:
 
     def get_enabled_data_sources(self) -> Dict[str, Dict]:
         """
-        获取启用的数据源
+        获取启用的数据源（ENABLED_DATA_SOURCES 环境变量优先）
 
         Returns:
             启用的数据源字典
         """
-        data_sources = self.config.get('data_sources', {})
-
-        # 从环境变量读取启用的数据源
-        env_sources = os.getenv('ENABLED_DATA_SOURCES', '')
-        if env_sources:
-            enabled_names = [s.strip() for s in env_sources.split(',')]
-            # 只返回环境变量中指定的数据源
-            return {
-                name: source for name, source in data_sources.items()
-                if name in enabled_names
-            }
-
-        # 返回配置文件中启用的数据源
-        return {
-            name: source for name, source in data_sources.items()
-            if source.get('enabled', False)
-        }
+        return self._snapshot.enabled_sources
 
     def get_enabled_categories(self) -> Dict[str, Dict]:
         """
-        获取启用的内容板块
+        获取启用的内容板块（ENABLED_CATEGORIES 环境变量优先）
 
         Returns:
             启用的内容板块字典
         """
-        categories = self.config.get('content_categories', {})
-
-        # 从环境变量读取启用的板块
-        env_categories = os.getenv('ENABLED_CATEGORIES', '')
-        if env_categories:
-            enabled_names = [c.strip() for c in env_categories.split(',')]
-            # 只返回环境变量中指定的板块
-            result = {
-                name: category for name, category in categories.items()
-                if name in enabled_names
-            }
-            if result:
-                return result
-
-        # 返回配置文件中启用的板块
-        enabled = {
-            name: category for name, category in categories.items()
-            if category.get('enabled', False)
-        }
-
-        # 如果没有启用任何板块，默认启用综合板块
-        if not enabled and 'all' in categories:
-            return {'all': categories['all']}
-
-        return enabled
+        return self._snapshot.enabled_categories
 
     def get_scraper_config(self) -> Dict:
         """
-        获取抓取器配置
+        获取抓取器配置（已应用 HOT_LIST_LIMIT / REQUEST_TIMEOUT 覆盖）
 
         Returns:
             抓取器配置字典
         """
-        scraper_config = self.config.get('scraper', {})
-
-        # 从环境变量覆盖配置
-        if os.getenv('HOT_LIST_LIMIT'):
-            scraper_config['limit'] = int(os.getenv('HOT_LIST_LIMIT'))
-
-        if os.getenv('REQUEST_TIMEOUT'):
-            scraper_config['timeout'] = int(os.getenv('REQUEST_TIMEOUT'))
-
-        return scraper_config
+        return self._snapshot.scraper_config
 
     def get_display_config(self) -> Dict:
         """
@@ -172,7 +431,16 @@ class ConfigLoader:
         Returns:
             显示配置字典
         """
-        return self.config.get('display', {})
+        return self._snapshot.display_config
+
+    def get_alert_config(self) -> Dict:
+        """
+        获取关注提醒配置
+
+        Returns:
+            提醒配置字典
+        """
+        return self._snapshot.alert_config
 
     def get_all_api_urls(self) -> List[str]:
         """
@@ -181,13 +449,19 @@ class ConfigLoader:
         Returns:
             API URL 列表
         """
-        urls = []
-        for source_name, source_config in self.get_enabled_data_sources().items():
-            apis = source_config.get('apis', [])
-            for api in apis:
-                urls.append(api.get('url'))
+        return list(self._snapshot.api_urls)
+
+    def get_source_api_urls(self, source_key: str) -> List[str]:
+        """
+        获取指定数据源的 API URL 列表（不论是否启用）
+
+        Args:
+            source_key: 数据源键名
 
-        return urls
+        Returns:
+            API URL 列表
+        """
+        return list(self._snapshot.api_urls_by_source.get(source_key, ()))
 
     def filter_by_category(self, items: List[Dict], category_name: str) -> List[Dict]:
         """
@@ -200,28 +474,29 @@ class ConfigLoader:
         Returns:
             过滤后的热榜数据列表
         """
-        categories = self.get_enabled_categories()
-
-        if category_name not in categories:
-            logger.warning(f"未找到板块: {category_name}，返回原始数据")
+        with FILTER_SECONDS.time(category=category_name), \
+                span('filter_by_category', category=category_name, input_count=len(items)) as filter_span:
+            filtered = self._filter_by_category(items, category_name)
+            filter_span.set_attribute('item_count', len(filtered))
+            return filtered
+
+    def _filter_by_category(self, items: List[Dict], category_name: str) -> List[Dict]:
+        """filter_by_category 的实现（不含计时）"""
+        snapshot = self._snapshot
+
+        if category_name not in snapshot.category_matchers:
+            logger.warning("未找到板块: %s，返回原始数据", category_name)
             return items
 
-        category = categories[category_name]
-        keywords = category.get('keywords', [])
-
         # 如果没有关键词，返回所有数据
-        if not keywords:
+        matcher = snapshot.category_matchers[category_name]
+        if matcher is None:
             return items
 
-        # 根据关键词过滤
-        filtered = []
-        for item in items:
-            word = item.get('word', '')
-            # 检查是否包含任何关键词
-            if any(keyword in word for keyword in keywords):
-                filtered.append(item)
+        # 根据关键词过滤（任一关键词出现在标题中即匹配）
+        filtered = [item for item in items if matcher.search(item.get('word', ''))]
 
-        logger.info(f"板块 '{category.get('name')}' 过滤后: {len(filtered)}/{len(items)} 条")
+        logger.info("板块 '%s' 过滤后: %s/%s 条", snapshot.category_names.get(category_name), len(filtered), len(items))
         return filtered
 
     def get_category_name(self, category_key: str) -> str:
@@ -234,8 +509,7 @@ class ConfigLoader:
         Returns:
             板块显示名称
         """
-        categories = self.config.get('content_categories', {})
-        return categories.get(category_key, {}).get('name', category_key)
+        return self._snapshot.category_names.get(category_key, category_key)
 
     def get_source_name(self, source_key: str) -> str:
         """
@@ -247,9 +521,43 @@ class ConfigLoader:
         Returns:
             数据源显示名称
         """
-        sources = self.config.get('data_sources', {})
-        return sources.get(source_key, {}).get('name', source_key)
+        return self._snapshot.source_names.get(source_key, source_key)
+
+    def get_item_schema(self, source_key: str) -> ItemSchema:
+        """
+        获取数据源的条目校验约定（配置加载时已编译）
+
+        Args:
+            source_key: 数据源键名
+
+        Returns:
+            条目字段约定，未配置的数据源返回默认约定
+        """
+        return self._snapshot.item_schemas.get(source_key, DEFAULT_SCHEMA)
+
+    def get_source_key_for_url(self, api_url: str) -> Optional[str]:
+        """
+        根据 API URL 查找数据源键名
+
+        Args:
+            api_url: API URL
+
+        Returns:
+            数据源键名，未配置时返回 None
+        """
+        return self._snapshot.source_key_by_url.get(api_url)
 
+    def get_source_name_for_url(self, api_url: str) -> Optional[str]:
+        """
+        根据 API URL 查找数据源显示名称
+
+        Args:
+            api_url: API URL
+
+        Returns:
+            数据源显示名称，未配置时返回 None
+        """
+        return self._snapshot.source_name_by_url.get(api_url)
 
 if __name__ == "__main__":
     # 测试代码
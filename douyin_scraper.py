@@ -1,15 +1,51 @@
 """
 热榜抓取模块（支持配置化）
 """
-import requests
+import os
 import json
+import time
+import queue
 import logging
+import threading
+import contextvars
 from datetime import datetime
 from typing import List, Dict, Optional
+
+from lazy_import import lazy_import
 from config_loader import ConfigLoader
+from endpoint_stats import LATENCY
+from fingerprint import FINGERPRINTS, hot_list_fingerprint
+from identity_pool import IDENTITIES, classify_status, parse_retry_after
+from item_schema import ValidationResult
+from last_known_good import LKG_CACHE, format_age
+from rendering import render_text_line
+from single_flight import FETCH_FLIGHTS
+from tracing import current_span, span
+from metrics import (
+    BYTES_TRANSFERRED, ENDPOINT_FAILURES, FETCH_SECONDS, HEDGED_REQUESTS, ITEM_ANOMALIES, ITEM_REJECTS,
+    PARSE_SECONDS, RENDER_SECONDS, STALE_FALLBACKS, TEST_DATA_FALLBACKS,
+)
+
+# requests 导入较重，首次发起请求时再加载
+requests = lazy_import('requests')
 
 logger = logging.getLogger(__name__)
 
+# 是否启用对冲请求（关闭后按顺序逐个尝试 API）
+HEDGE_ENABLED = os.getenv('HEDGE_REQUESTS', 'true').lower() in ('1', 'true', 'yes')
+
+# 前一个 API 超过该分位的历史延迟仍未返回时，发出下一个 API 的请求
+HEDGE_QUANTILE = float(os.getenv('HEDGE_QUANTILE', '0.9'))
+
+# 所有 API 失败且没有可用的最近成功数据时，是否回退到内置测试数据（仅用于本地调试）
+ALLOW_TEST_DATA = os.getenv('ALLOW_TEST_DATA', 'false').lower() in ('1', 'true', 'yes')
+
+# 没有历史数据时的对冲等待时间（秒）
+HEDGE_DEFAULT_DELAY = 1.0
+
+# 对冲等待时间下限（秒），避免对极快的接口频繁对冲
+HEDGE_MIN_DELAY = 0.05
+
 
 class DouyinScraper:
     """热榜抓取器（支持多数据源和内容板块）"""
@@ -36,19 +72,24 @@ class DouyinScraper:
         17: "娱乐",     # 娱乐
     }
 
-    def __init__(self, config_loader: Optional[ConfigLoader] = None):
+    def __init__(self, config_loader: Optional[ConfigLoader] = None, source: Optional[str] = None):
         """
         初始化抓取器
 
         Args:
             config_loader: 配置加载器，如果为 None 则使用默认配置
+            source: 只使用指定数据源的 API（数据源键名），为 None 时使用所有启用的数据源
         """
         # 加载配置
         self.config_loader = config_loader or ConfigLoader()
+        self.source = source
         scraper_config = self.config_loader.get_scraper_config()
 
         # 获取 API URLs
-        self.api_urls = self.config_loader.get_all_api_urls()
+        if source:
+            self.api_urls = self.config_loader.get_source_api_urls(source)
+        else:
+            self.api_urls = self.config_loader.get_all_api_urls()
 
         # 如果没有配置 API，使用默认的
         if not self.api_urls:
@@ -68,6 +109,9 @@ class DouyinScraper:
             'Cookie': '',
         })
 
+        # 请求身份（未配置 identities 时只使用上面的请求头）
+        IDENTITIES.configure(self.headers, scraper_config.get('identities'))
+
         # 超时时间
         self.timeout = scraper_config.get('timeout', 10)
 
@@ -75,138 +119,321 @@ class DouyinScraper:
         self.is_using_test_data = False
         # 记录成功的 API 来源
         self.last_successful_api = None
-        # 记录当前使用的数据源名称
+        # 记录当前使用的数据源名称和键名
         self.current_source_name = "未知"
+        self.current_source_key = source or "unknown"
+        # 返回的是缓存数据时为缓存时效（秒），实时数据为 None
+        self.stale_seconds: Optional[float] = None
+
+    # 抓取后随结果一起共享给合并等待者的实例状态
+    SHARED_STATE = ('is_using_test_data', 'stale_seconds', 'current_source_key', 'current_source_name',
+                    'last_successful_api')
 
     def fetch_hot_list(self, limit: int = 20, category: str = 'all') -> Optional[List[Dict]]:
         """
         抓取热榜
 
+        同一 (数据源, 板块, 数量) 的并发抓取由 FETCH_FLIGHTS 合并为一次上游请求，
+        等待者共享结果和数据源状态；刚完成的实时结果在几秒内继续复用
+
         Args:
             limit: 返回的热榜数量，默认20条
             category: 内容板块，默认 'all'（综合）
 
         Returns:
-            热榜列表，每个元素包含 rank, word, hot_value 等信息
+            热榜列表，每个元素包含 rank, word, hot_value 等信息；
+            所有 API 都失败时返回最近一次成功的数据（stale_seconds 为其时效），
+            没有未过期的缓存时返回 None
         """
-        logger.info(f"开始抓取热榜（板块: {category}, 数量: {limit}）...")
+        key = (self.source or 'all', category, limit, tuple(self.api_urls))
+        state, shared = FETCH_FLIGHTS.do(
+            key,
+            lambda: self._fetch_and_capture(limit, category),
+            # 只复用实时数据，缓存数据和测试数据下次仍尝试上游
+            memoize=lambda state: state['hot_list'] is not None and state['stale_seconds'] is None
+            and not state['is_using_test_data'],
+        )
+        if shared:
+            for name in self.SHARED_STATE:
+                setattr(self, name, state[name])
+            logger.info("🔗 复用同时进行的抓取结果（板块: %s, 数量: %s）", category, limit)
+
+        hot_list = state['hot_list']
+        # 每个调用方拿到独立的副本，避免互相修改
+        return [dict(item) for item in hot_list] if hot_list is not None else None
+
+    def _fetch_and_capture(self, limit: int, category: str) -> Dict:
+        """抓取并记录结果和实例状态"""
+        state = {'hot_list': self._fetch_hot_list(limit, category)}
+        for name in self.SHARED_STATE:
+            state[name] = getattr(self, name)
+        return state
+
+    def _fetch_hot_list(self, limit: int, category: str) -> Optional[List[Dict]]:
+        """fetch_hot_list 的实现（不含请求合并）"""
+        logger.info("开始抓取热榜（板块: %s, 数量: %s）...", category, limit)
+
+        hot_list = self._fetch_from_apis(limit, category)
+        if hot_list is not None:
+            return hot_list
+
+        # 所有 API 都失败：优先返回最近一次成功的数据，并在后台继续重试
+        sources = [self.source] if self.source else list(self.config_loader.get_enabled_data_sources())
+        cached = LKG_CACHE.load(sources, category)
+        if cached:
+            age = format_age(cached['age'])
+            logger.warning("⚠️  所有 API 都无法获取数据，返回 %s前的最近成功数据", age)
+            STALE_FALLBACKS.inc()
+            self.is_using_test_data = False
+            self.stale_seconds = cached['age']
+            self.current_source_key = cached['source']
+            self.current_source_name = f"{cached['source_name']}（{age}前的缓存数据）"
+            LKG_CACHE.revalidate(f"{self.source or 'all'}:{category}", lambda: self._revalidate(limit, category))
+            return cached['hot_list'][:limit]
+
+        if ALLOW_TEST_DATA:
+            logger.warning("所有 API 都无法获取数据，返回测试数据")
+            TEST_DATA_FALLBACKS.inc()
+            self.is_using_test_data = True
+            self.current_source_name = "测试数据"
+            return self._get_test_data(limit)
+
+        logger.error("❌ 所有 API 都无法获取数据，且没有可用的最近成功数据")
+        return None
 
-        # 尝试多个 API
-        for api_url in self.api_urls:
-            try:
-                logger.info(f"尝试 API: {api_url}")
+    def _revalidate(self, limit: int, category: str) -> bool:
+        """后台重试：使用新的抓取器实例，成功时由其写入最近成功数据"""
+        scraper = DouyinScraper(self.config_loader, source=self.source)
+        return scraper._fetch_from_apis(limit, category) is not None
 
-                response = requests.get(
-                    api_url,
-                    headers=self.headers,
-                    timeout=self.timeout
-                )
+    def _fetch_from_apis(self, limit: int, category: str) -> Optional[List[Dict]]:
+        """
+        请求所有 API（带对冲），成功时保存为最近成功数据
 
-                logger.info(f"响应状态码: {response.status_code}")
+        Args:
+            limit: 返回数量
+            category: 内容板块
 
-                if response.status_code != 200:
-                    logger.warning(f"API 返回非 200 状态码: {response.status_code}")
+        Returns:
+            热榜列表，全部失败时返回 None
+        """
+        # 按历史延迟排序 API，前一个超过预期延迟仍未返回时并行请求下一个
+        api_urls = LATENCY.ranked(self.api_urls, self.timeout)
+        results: queue.Queue = queue.Queue()
+        launched = 0
+        finished = 0
+
+        def launch():
+            nonlocal launched
+            api_url = api_urls[launched]
+            launched += 1
+            # 复制上下文，让子线程中的 span 挂在当前 span 下
+            context = contextvars.copy_context()
+            threading.Thread(
+                target=context.run, args=(self._attempt, api_url, results),
+                name='fetch-api', daemon=True,
+            ).start()
+
+        try:
+            launch()
+            while finished < launched:
+                wait = self._hedge_delay(api_urls[launched - 1]) if launched < len(api_urls) else None
+                try:
+                    api_url, word_list = results.get(timeout=wait)
+                except queue.Empty:
+                    logger.info("⏱️  %s 超过预期延迟 %.2fs，并行请求下一个 API", api_urls[launched - 1], wait)
+                    HEDGED_REQUESTS.inc(endpoint=api_urls[launched])
+                    launch()
                     continue
 
-                data = response.json()
-                logger.info(f"API 返回数据结构: {list(data.keys()) if isinstance(data, dict) else type(data)}")
+                finished += 1
+                hot_list = self._process_word_list(api_url, word_list, limit, category) if word_list else None
+                if hot_list is None:
+                    # 失败时立即尝试下一个（其他请求仍在进行时也不再等待对冲时间）
+                    if launched < len(api_urls):
+                        launch()
+                    continue
 
-                # 尝试解析不同格式的响应
-                word_list = self._parse_response(data)
+                self.is_using_test_data = False
+                self.stale_seconds = None
+                self.last_successful_api = api_url
+                LKG_CACHE.save(self.current_source_key, self.current_source_name, category, hot_list)
+                return hot_list
+        finally:
+            LATENCY.save()
+            IDENTITIES.save()
 
-                if word_list:
-                    # 格式化热榜数据
-                    hot_list = []
-                    for idx, item in enumerate(word_list[:limit], 1):
-                        # 提取关键字/标题（尝试多个可能的字段）
-                        word = (
-                            item.get('word') or
-                            item.get('title') or
-                            item.get('sentence') or
-                            item.get('query') or
-                            item.get('name') or
-                            item.get('music_title') or
-                            ''
-                        )
-
-                        # 提取热度值（尝试多个可能的字段）
-                        hot_value = (
-                            item.get('hot_value') or
-                            item.get('view_count') or
-                            item.get('hot_level') or
-                            item.get('search_count') or
-                            0
-                        )
-
-                        # 获取并格式化标签
-                        raw_label = item.get('label', item.get('tag', ''))
-                        formatted_label = self._format_label(raw_label)
-
-                        hot_item = {
-                            'rank': idx,
-                            'word': word,
-                            'hot_value': hot_value,
-                            'label': formatted_label,
-                            'event_time': item.get('event_time', ''),
-                        }
-                        hot_list.append(hot_item)
-
-                    # 识别数据源
-                    self._identify_source(api_url)
-
-                    logger.info(f"✅ 成功抓取 {len(hot_list)} 条热榜数据（来源：{self.current_source_name}）")
-
-                    # 根据板块过滤
-                    if category and category != 'all':
-                        hot_list = self.config_loader.filter_by_category(hot_list, category)
-                        logger.info(f"板块过滤后: {len(hot_list)} 条")
-
-                    # 限制数量
-                    hot_list = hot_list[:limit]
-
-                    self.is_using_test_data = False
-                    self.last_successful_api = api_url
-                    return hot_list
+        return None
+
+    def _hedge_delay(self, api_url: str) -> Optional[float]:
+        """
+        计算发出下一个对冲请求前的等待时间
+
+        Args:
+            api_url: 最近发出的 API
+
+        Returns:
+            等待时间（秒），关闭对冲时返回 None（一直等到返回）
+        """
+        if not HEDGE_ENABLED:
+            return None
+        delay = LATENCY.quantile(api_url, HEDGE_QUANTILE)
+        if delay is None:
+            delay = HEDGE_DEFAULT_DELAY
+        return min(max(delay, HEDGE_MIN_DELAY), self.timeout)
+
+    def _attempt(self, api_url: str, results: queue.Queue):
+        """
+        在线程中请求单个 API，结果放入队列：(api_url, word_list)
+
+        Args:
+            api_url: API URL
+            results: 结果队列
+        """
+        word_list = None
+        with span('fetch_api', url=api_url) as attempt:
+            start = time.perf_counter()
+            try:
+                word_list = self._request_word_list(api_url)
+            finally:
+                LATENCY.observe(api_url, time.perf_counter() - start, bool(word_list))
+                attempt.set_attribute('item_count', len(word_list) if word_list else 0)
+                results.put((api_url, word_list))
+
+    def _process_word_list(self, api_url: str, word_list: List[Dict], limit: int,
+                           category: str) -> Optional[List[Dict]]:
+        """
+        识别数据源、校验条目并按板块过滤
+
+        Args:
+            api_url: API URL
+            word_list: 原始热榜条目
+            limit: 返回数量
+            category: 内容板块
 
-            except requests.RequestException as e:
-                logger.warning(f"API {api_url} 请求失败: {e}")
-                continue
-            except json.JSONDecodeError as e:
-                logger.warning(f"API {api_url} JSON 解析失败: {e}")
-                continue
-            except Exception as e:
-                logger.warning(f"API {api_url} 处理失败: {e}")
-                continue
-
-        # 如果所有 API 都失败，返回测试数据
-        logger.warning("所有 API 都无法获取数据，返回测试数据")
-        self.is_using_test_data = True
-        self.current_source_name = "测试数据"
-        return self._get_test_data(limit)
-
-    def _format_label(self, label) -> str:
+        Returns:
+            热榜列表，处理失败时返回 None
         """
-        格式化标签（将数字标签转换为文本）
+        try:
+            # 识别数据源，按数据源的字段约定提取并校验条目
+            self._identify_source(api_url)
+            schema = self.config_loader.get_item_schema(self.current_source_key)
+            with span('validate_items', item_count=len(word_list)):
+                result = schema.validate(word_list, limit, self.LABEL_MAP)
+            self._record_validation(api_url, result)
+            if not result.items or result.reject_ratio > schema.max_reject_ratio:
+                logger.warning("API %s 有效条目过少（%s/%s），视为异常响应", api_url, len(result.items), result.scanned)
+                ENDPOINT_FAILURES.inc(endpoint=api_url, reason='invalid_items')
+                return None
+            hot_list = result.items
+
+            logger.info("✅ 成功抓取 %s 条热榜数据（来源：%s）", len(hot_list), self.current_source_name)
+
+            # 根据板块过滤
+            if category and category != 'all':
+                hot_list = self.config_loader.filter_by_category(hot_list, category)
+                logger.info("板块过滤后: %s 条", len(hot_list))
+        except Exception as e:
+            logger.warning("API %s 处理失败: %s", api_url, e)
+            ENDPOINT_FAILURES.inc(endpoint=api_url, reason='error')
+            return None
+
+        # 限制数量
+        return hot_list[:limit]
+
+    def _request_word_list(self, api_url: str) -> Optional[List[Dict]]:
+        """
+        请求单个 API 并解析出原始热榜列表
 
         Args:
-            label: 标签（可能是数字、字符串或空值）
+            api_url: API URL
 
         Returns:
-            格式化后的标签文本
+            原始热榜条目列表，失败时返回 None
         """
-        if label is None or label == '':
-            return ''
+        attempt = current_span()
+        identity = IDENTITIES.acquire(api_url)
+        if identity is None:
+            # 所有身份对该接口都在冷却或已达到速率上限，不发送请求（其他接口不受影响）
+            logger.warning("⏸️  没有可用的请求身份，跳过 API: %s", api_url)
+            ENDPOINT_FAILURES.inc(endpoint=api_url, reason='no_identity')
+            return None
+        attempt.set_attribute('identity', identity.name)
+        outcome = 'failed'
+        retry_after = None
+        try:
+            logger.info("尝试 API: %s（身份 %s）", api_url, identity.name)
 
-        # 如果已经是字符串，直接返回
-        if isinstance(label, str):
-            return label
+            start = time.perf_counter()
+            try:
+                response = requests.get(
+                    api_url,
+                    headers=identity.headers,
+                    proxies=identity.proxies,
+                    timeout=self.timeout
+                )
+            finally:
+                FETCH_SECONDS.observe(time.perf_counter() - start, endpoint=api_url)
+
+            BYTES_TRANSFERRED.inc(len(response.content), target='douyin', direction='in')
+            attempt.set_attribute('status', response.status_code)
+            attempt.set_attribute('response_bytes', len(response.content))
+            logger.info("响应状态码: %s", response.status_code)
+
+            if response.status_code != 200:
+                logger.warning("API 返回非 200 状态码: %s", response.status_code)
+                ENDPOINT_FAILURES.inc(endpoint=api_url, reason=f"http_{response.status_code}")
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                outcome = classify_status(identity, response.status_code, retry_after)
+                return None
+
+            data = response.json()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("API 返回数据结构: %s", list(data.keys()) if isinstance(data, dict) else type(data))
+
+            # 尝试解析不同格式的响应
+            with PARSE_SECONDS.time(endpoint=api_url), span('parse_response') as parse_span:
+                word_list = self._parse_response(data)
+                parse_span.set_attribute('item_count', len(word_list) if word_list else 0)
 
-        # 如果是数字，查找映射表
-        if isinstance(label, int):
-            return self.LABEL_MAP.get(label, '')
+            if not word_list:
+                ENDPOINT_FAILURES.inc(endpoint=api_url, reason='unparseable')
+            else:
+                outcome = 'ok'
+            return word_list
+
+        except requests.exceptions.ProxyError as e:
+            logger.warning("API %s 代理 %s 连接失败: %s", api_url, identity.proxy, e)
+            ENDPOINT_FAILURES.inc(endpoint=api_url, reason='proxy_error')
+            outcome = 'proxy_error'
+        except requests.RequestException as e:
+            logger.warning("API %s 请求失败: %s", api_url, e)
+            ENDPOINT_FAILURES.inc(endpoint=api_url, reason='request_error')
+        except json.JSONDecodeError as e:
+            logger.warning("API %s JSON 解析失败: %s", api_url, e)
+            ENDPOINT_FAILURES.inc(endpoint=api_url, reason='invalid_json')
+        except Exception as e:
+            logger.warning("API %s 处理失败: %s", api_url, e)
+            ENDPOINT_FAILURES.inc(endpoint=api_url, reason='error')
+        finally:
+            IDENTITIES.report(identity, api_url, outcome, retry_after)
+        return None
 
-        # 其他情况返回字符串形式
-        return str(label)
+    @staticmethod
+    def _record_validation(api_url: str, result: ValidationResult):
+        """
+        按接口统计丢弃和修正的条目
+
+        Args:
+            api_url: API URL
+            result: 校验结果
+        """
+        for reason, count in result.rejects.items():
+            ITEM_REJECTS.inc(count, endpoint=api_url, reason=reason)
+        for kind, count in result.anomalies.items():
+            ITEM_ANOMALIES.inc(count, endpoint=api_url, kind=kind)
+        if result.rejects or result.anomalies:
+            logger.warning("⚠️  API %s 条目校验: 丢弃 %s、修正 %s", api_url, result.rejects, result.anomalies)
 
     def _identify_source(self, api_url: str):
         """
@@ -216,23 +443,25 @@ class DouyinScraper:
             api_url: API URL
         """
         # 从配置中查找对应的数据源
-        data_sources = self.config_loader.config.get('data_sources', {})
-        for source_key, source_config in data_sources.items():
-            apis = source_config.get('apis', [])
-            for api in apis:
-                if api.get('url') == api_url:
-                    self.current_source_name = source_config.get('name', source_key)
-                    return
+        source_name = self.config_loader.get_source_name_for_url(api_url)
+        if source_name:
+            self.current_source_name = source_name
+            self.current_source_key = self.config_loader.get_source_key_for_url(api_url)
+            return
 
         # 如果没找到，根据 URL 猜测
         if 'douyin' in api_url or 'aweme' in api_url:
             self.current_source_name = "抖音"
+            self.current_source_key = "douyin"
         elif 'weibo' in api_url:
             self.current_source_name = "微博"
+            self.current_source_key = "weibo"
         elif 'zhihu' in api_url:
             self.current_source_name = "知乎"
+            self.current_source_key = "zhihu"
         else:
             self.current_source_name = "未知来源"
+            self.current_source_key = "unknown"
 
     def _parse_response(self, data: dict) -> Optional[List[Dict]]:
         """
@@ -251,25 +480,25 @@ class DouyinScraper:
         if isinstance(data, dict) and data.get('status_code') == 0:
             word_list = data.get('word_list', [])
             if word_list:
-                logger.info(f"解析格式：status_code + word_list")
+                logger.info("解析格式：status_code + word_list")
                 return word_list
 
         # 格式 2: {data: {word_list: [...]}}
         if isinstance(data, dict) and 'data' in data and isinstance(data['data'], dict):
             word_list = data['data'].get('word_list', [])
             if word_list:
-                logger.info(f"解析格式：data.word_list")
+                logger.info("解析格式：data.word_list")
                 return word_list
 
         # 格式 3: {data: [...]} - 直接列表
         if isinstance(data, dict) and 'data' in data:
             if isinstance(data['data'], list) and len(data['data']) > 0:
-                logger.info(f"解析格式：data[] 直接列表")
+                logger.info("解析格式：data[] 直接列表")
                 return data['data']
 
         # 格式 4: 直接是列表
         if isinstance(data, list) and len(data) > 0:
-            logger.info(f"解析格式：直接列表")
+            logger.info("解析格式：直接列表")
             return data
 
         # 格式 5: {extra: {list: [...]}} - 某些 API 的额外字段
@@ -278,7 +507,7 @@ class DouyinScraper:
             if isinstance(extra, dict):
                 hot_list = extra.get('list', [])
                 if hot_list:
-                    logger.info(f"解析格式：extra.list")
+                    logger.info("解析格式：extra.list")
                     return hot_list
 
         # 格式 6: 尝试查找包含热榜数据的字段（通用）
@@ -287,10 +516,10 @@ class DouyinScraper:
             possible_keys = ['word_list', 'list', 'data', 'items', 'hot_list', 'search_list']
             for key in possible_keys:
                 if key in data and isinstance(data[key], list) and len(data[key]) > 0:
-                    logger.info(f"解析格式：通用字段 {key}")
+                    logger.info("解析格式：通用字段 %s", key)
                     return data[key]
 
-        logger.warning(f"无法解析 API 响应，数据结构未知")
+        logger.warning("无法解析 API 响应，数据结构未知")
         return None
 
     def _get_test_data(self, limit: int = 20) -> List[Dict]:
@@ -352,6 +581,11 @@ class DouyinScraper:
         Returns:
             格式化后的文本
         """
+        with RENDER_SECONDS.time(kind='text'), span('render_text', item_count=len(hot_list or [])):
+            return self._format_hot_list_text(hot_list, is_test_data, category)
+
+    def _format_hot_list_text(self, hot_list: List[Dict], is_test_data: bool, category: str) -> str:
+        """format_hot_list_text 的实现（不含计时）"""
         if not hot_list:
             return "暂无热榜数据"
 
@@ -384,40 +618,31 @@ class DouyinScraper:
         show_hot_value = display_config.get('show_hot_value', True)
         show_label = display_config.get('show_label', True)
 
-        for item in hot_list:
-            rank = item['rank']
-            word = item['word']
-            hot_value = item['hot_value']
-            label = item.get('label', '')
-
-            # 添加排名图标
-            if rank == 1:
-                icon = "🥇"
-            elif rank == 2:
-                icon = "🥈"
-            elif rank == 3:
-                icon = "🥉"
-            else:
-                icon = f"{rank}."
+        # 条目部分只取决于热榜内容和显示配置，指纹与上一次相同时直接复用
+        fingerprint = hot_list_fingerprint(hot_list)
+        cache_key = f"{int(bool(show_hot_value))}{int(bool(show_label))}"
+        item_lines = FINGERPRINTS.get('text', cache_key, fingerprint)
+        if item_lines is None:
+            item_lines = self._format_item_lines(hot_list, show_hot_value, show_label)
+            FINGERPRINTS.put('text', cache_key, fingerprint, item_lines)
+        lines.extend(item_lines)
 
-            # 格式化热度值
-            hot_str = ""
-            if show_hot_value and hot_value:
-                if hot_value >= 100000000:
-                    hot_str = f" 🔥{hot_value / 100000000:.1f}亿"
-                elif hot_value >= 10000:
-                    hot_str = f" 🔥{hot_value / 10000:.1f}万"
-                else:
-                    hot_str = f" 🔥{hot_value}"
+        return "\n".join(lines)
 
-            # 添加标签
-            label_str = ""
-            if show_label and label:
-                label_str = f" [{label}]"
+    @staticmethod
+    def _format_item_lines(hot_list: List[Dict], show_hot_value: bool, show_label: bool) -> List[str]:
+        """
+        格式化热榜条目（每条一行）
 
-            lines.append(f"{icon} {word}{label_str}{hot_str}")
+        Args:
+            hot_list: 热榜列表
+            show_hot_value: 是否显示热度
+            show_label: 是否显示标签
 
-        return "\n".join(lines)
+        Returns:
+            文本行列表
+        """
+        return [render_text_line(item, show_hot_value, show_label) for item in hot_list]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,174 @@
+"""
+接口延迟统计模块
+为每个热榜 API 维护延迟直方图和成功率，跨进程运行持久化到文件，
+供抓取器选择接口顺序和决定对冲请求的等待时间
+"""
+import os
+import json
+import bisect
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 统计文件格式版本
+STATS_VERSION = 1
+
+# 默认统计文件路径
+DEFAULT_STATS_PATH = os.getenv('ENDPOINT_STATS_PATH', '.cache/endpoint_latency.json')
+
+# 延迟分桶上界（秒），按约 1.5 倍递增，覆盖 25ms ~ 30s
+LATENCY_BUCKETS = (
+    0.025, 0.04, 0.06, 0.09, 0.13, 0.2, 0.3, 0.45, 0.7, 1.0,
+    1.5, 2.25, 3.4, 5.0, 7.5, 11.0, 17.0, 30.0,
+)
+
+# 样本数超过该值时所有计数减半，让统计逐渐偏向最近的表现
+MAX_SAMPLES = 500
+
+# 至少有这么多成功样本才使用统计结果
+MIN_SAMPLES = 5
+
+
+def _empty_entry() -> Dict:
+    return {'buckets': [0.0] * (len(LATENCY_BUCKETS) + 1), 'ok': 0.0, 'failed': 0.0}
+
+
+class EndpointLatency:
+    """按接口统计的延迟直方图"""
+
+    def __init__(self, path: str = DEFAULT_STATS_PATH):
+        """
+        初始化统计
+
+        Args:
+            path: 持久化文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == STATS_VERSION and data.get('buckets') == list(LATENCY_BUCKETS):
+                    self._entries = data['endpoints']
+                else:
+                    self._entries = {}
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError) as e:
+                logger.warning("接口延迟统计读取失败，已重置: %s", e)
+                self._entries = {}
+        return self._entries
+
+    def observe(self, url: str, seconds: float, ok: bool):
+        """
+        记录一次请求结果
+
+        Args:
+            url: API URL
+            seconds: 耗时（秒）
+            ok: 是否成功拿到可解析的列表（只有成功的耗时进入直方图）
+        """
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(url)
+            if entry is None:
+                entry = entries[url] = _empty_entry()
+
+            if ok:
+                entry['buckets'][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+                entry['ok'] += 1
+            else:
+                entry['failed'] += 1
+
+            if entry['ok'] + entry['failed'] > MAX_SAMPLES:
+                entry['buckets'] = [count / 2 for count in entry['buckets']]
+                entry['ok'] /= 2
+                entry['failed'] /= 2
+            self._dirty = True
+
+    def quantile(self, url: str, q: float) -> Optional[float]:
+        """
+        估算成功请求耗时的分位数（取所在分桶的上界）
+
+        Args:
+            url: API URL
+            q: 分位（0~1）
+
+        Returns:
+            分位数（秒），样本不足时返回 None
+        """
+        with self._lock:
+            entry = self._load().get(url)
+            if entry is None or entry['ok'] < MIN_SAMPLES:
+                return None
+            target = q * entry['ok']
+            cumulative = 0.0
+            for bound, count in zip(LATENCY_BUCKETS + (LATENCY_BUCKETS[-1] * 2,), entry['buckets']):
+                cumulative += count
+                if cumulative >= target:
+                    return bound
+            return LATENCY_BUCKETS[-1] * 2
+
+    def failure_rate(self, url: str) -> float:
+        """失败率（没有记录时为 0）"""
+        with self._lock:
+            entry = self._load().get(url)
+            if entry is None:
+                return 0.0
+            total = entry['ok'] + entry['failed']
+            return entry['failed'] / total if total else 0.0
+
+    def ranked(self, urls: List[str], timeout: float) -> List[str]:
+        """
+        按期望耗时排序接口（p50 + 失败率 x 超时时间）
+
+        样本不足的接口期望耗时视为 0，保持配置顺序排在前面，保证新接口也会被尝试；
+        一直失败（没有足够成功样本）的接口按超时时间计算。
+
+        Args:
+            urls: API URL 列表（配置顺序）
+            timeout: 请求超时时间（秒）
+
+        Returns:
+            排序后的 URL 列表
+        """
+        def cost(url: str) -> float:
+            with self._lock:
+                entry = self._load().get(url)
+            if entry is None or entry['ok'] + entry['failed'] < MIN_SAMPLES:
+                return 0.0
+            p50 = self.quantile(url, 0.5)
+            if p50 is None:
+                p50 = timeout
+            return p50 + self.failure_rate(url) * timeout
+
+        return sorted(urls, key=cost)
+
+    def save(self):
+        """有新数据时写回统计文件"""
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            body = json.dumps({'version': STATS_VERSION, 'buckets': list(LATENCY_BUCKETS), 'endpoints': self._entries})
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(body)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("接口延迟统计保存失败: %s", e)
+
+
+# 进程内共享的统计
+LATENCY = EndpointLatency()
@@ -0,0 +1,141 @@
+"""
+飞书汇总卡片模块
+把多个榜单（数据源 x 板块）打包进尽量少的交互式卡片，
+追加元素时累计每个元素的编码长度，超过字节预算前自动换到下一张卡片
+"""
+import json
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 飞书卡片请求体上限约 30KB，默认留出余量
+DEFAULT_CARD_MAX_BYTES = 28 * 1024
+
+
+def _encode(value) -> bytes:
+    """紧凑 JSON 编码（与最终请求体中的字节完全一致）"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _text_element(content: str) -> Dict:
+    return {"tag": "div", "text": {"tag": "plain_text", "content": content}}
+
+
+HR_ELEMENT = _encode({"tag": "hr"})
+
+
+class DigestCardBuilder:
+    """
+    汇总卡片构建器
+
+    每个元素只编码一次，卡片大小 = 固定外壳 + 各元素长度 + 逗号，不需要反复序列化整张卡片。
+    能在一张空卡片中放下的榜单不会被拆开；单个榜单超过预算时按条目拆分，并在下一张卡片重复榜单标题。
+    """
+
+    def __init__(self, title: str, max_bytes: int = DEFAULT_CARD_MAX_BYTES, preface: Optional[str] = None):
+        """
+        初始化构建器
+
+        Args:
+            title: 卡片标题（续页自动追加"（续N）"）
+            max_bytes: 每张卡片请求体的字节预算
+            preface: 每张卡片顶部的说明文字（如更新时间）
+        """
+        self.title = title
+        self.max_bytes = max_bytes
+        self._preface = _encode(_text_element(preface)) if preface else None
+        # 外壳长度按最长的续页标题预留
+        self._shell_bytes = len(self._shell(self._header(f"{title}（续99）")))
+        self._empty_card_bytes = self._shell_bytes + (len(self._preface) + 1 if self._preface else 0)
+        self._cards: List[List[bytes]] = []
+        self._current: List[bytes] = []
+        self._current_bytes = 0
+        self._new_card()
+
+    @staticmethod
+    def _header(title: str) -> bytes:
+        return _encode({"title": {"tag": "plain_text", "content": title}, "template": "blue"})
+
+    @staticmethod
+    def _shell(header: bytes) -> bytes:
+        return b'{"msg_type":"interactive","card":{"header":' + header + b',"elements":[]}}'
+
+    def _new_card(self):
+        # 卡片末尾的分隔线没有意义
+        while self._current and self._current[-1] == HR_ELEMENT:
+            self._current.pop()
+        if not self._is_empty:
+            self._cards.append(self._current)
+        self._current = []
+        self._current_bytes = self._shell_bytes
+        if self._preface:
+            self._append(self._preface)
+
+    def _append(self, element: bytes):
+        # 除第一个元素外每个元素前有一个逗号
+        self._current_bytes += len(element) + (1 if self._current else 0)
+        self._current.append(element)
+
+    def _fits(self, size: int) -> bool:
+        return self._current_bytes + size <= self.max_bytes
+
+    @property
+    def _is_empty(self) -> bool:
+        return len(self._current) <= (1 if self._preface else 0)
+
+    def add_board(self, heading: str, elements: List[Dict]):
+        """
+        追加一个榜单
+
+        Args:
+            heading: 榜单标题
+            elements: 榜单条目元素（可包含条目之间的分隔线）
+        """
+        heading_bytes = _encode(_text_element(f"【{heading}】"))
+        encoded = [_encode(element) for element in elements]
+
+        # 整块放不下时换卡片：一张新卡片放得下（避免把榜单拆开），
+        # 或者当前卡片连标题加第一条都放不下（避免标题孤零零留在上一张）
+        if not self._is_empty:
+            board_bytes = sum(len(part) + 1 for part in [heading_bytes] + encoded)
+            head_bytes = len(heading_bytes) + 1 + (len(encoded[0]) + 1 if encoded else 0)
+            separator_bytes = len(HR_ELEMENT) + 1
+            if not self._fits(separator_bytes + board_bytes) and (
+                    self._empty_card_bytes + board_bytes <= self.max_bytes
+                    or not self._fits(separator_bytes + head_bytes)):
+                self._new_card()
+
+        # 同一张卡片中的榜单之间用分隔线隔开
+        if not self._is_empty:
+            self._append(HR_ELEMENT)
+        self._append(heading_bytes)
+
+        continued = _encode(_text_element(f"【{heading}（续）】"))
+        for part in encoded:
+            if not self._fits(len(part) + 1):
+                # 换卡片处的分隔线直接丢弃
+                if part == HR_ELEMENT:
+                    continue
+                self._new_card()
+                self._append(continued)
+                if not self._fits(len(part) + 1):
+                    logger.warning("⚠️  单个卡片元素超过字节预算（%s 字节），仍单独发送", len(part))
+            self._append(part)
+
+    def build(self) -> List[bytes]:
+        """
+        生成所有卡片的请求体
+
+        Returns:
+            请求体列表（每张卡片一个）
+        """
+        while self._current and self._current[-1] == HR_ELEMENT:
+            self._current.pop()
+        cards = self._cards + ([self._current] if not self._is_empty else [])
+        bodies = []
+        for index, elements in enumerate(cards):
+            title = self.title if index == 0 else f"{self.title}（续{index}）"
+            shell = self._shell(self._header(title))
+            bodies.append(shell[:-3] + b','.join(elements) + shell[-3:])
+        return bodies
@@ -1,10 +1,21 @@
 """
 飞书通知模块
 """
-import requests
 import json
+import time
 import logging
-from typing import Dict, Optional
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from feishu_digest import DEFAULT_CARD_MAX_BYTES, DigestCardBuilder
+from fingerprint import FINGERPRINTS, hot_list_fingerprint
+from lazy_import import lazy_import
+from metrics import BYTES_TRANSFERRED, RENDER_SECONDS, WEBHOOK_FAILURES, WEBHOOK_POST_SECONDS
+from rendering import render_card_content
+from tracing import span, traced
+
+# requests 导入较重，首次发起请求时再加载
+requests = lazy_import('requests')
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +32,50 @@ class FeishuNotifier:
         """
         self.webhook_url = webhook_url
         self.headers = {
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json; charset=utf-8'
         }
 
+    def _post_payload(self, payload: Dict, body: Optional[bytes] = None) -> Dict:
+        """
+        发送 payload 到 Webhook 并返回响应 JSON
+
+        Args:
+            payload: 消息体
+            body: 已序列化的请求体（为 None 时自动序列化）
+
+        Returns:
+            飞书响应 JSON
+        """
+        msg_type = payload.get('msg_type', 'unknown')
+        if body is None:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        BYTES_TRANSFERRED.inc(len(body), target='feishu', direction='out')
+
+        with span('feishu_post', msg_type=msg_type, payload_bytes=len(body)) as post_span:
+            start = time.perf_counter()
+            try:
+                response = requests.post(
+                    self.webhook_url,
+                    headers=self.headers,
+                    data=body,
+                    timeout=10
+                )
+            finally:
+                WEBHOOK_POST_SECONDS.observe(time.perf_counter() - start, msg_type=msg_type)
+
+            BYTES_TRANSFERRED.inc(len(response.content), target='feishu', direction='in')
+            post_span.set_attribute('status', response.status_code)
+            if not response.ok:
+                WEBHOOK_FAILURES.inc(msg_type=msg_type)
+            response.raise_for_status()
+
+            result = response.json()
+            post_span.set_attribute('code', result.get('code'))
+            if result.get('code') != 0:
+                WEBHOOK_FAILURES.inc(msg_type=msg_type)
+            return result
+
+    @traced('feishu_send_text')
     def send_text_message(self, text: str) -> bool:
         """
         发送文本消息到飞书群
@@ -40,8 +92,8 @@ class FeishuNotifier:
                 logger.error("❌ 文本内容为空，拒绝发送")
                 return False
 
-            logger.info(f"📝 准备发送文本消息，长度: {len(text)} 字符")
-            logger.debug(f"消息内容前100字符: {text[:100]}")
+            logger.info("📝 准备发送文本消息，长度: %s 字符", len(text))
+            logger.debug("消息内容前100字符: %s", text[:100])
 
             payload = {
                 "msg_type": "text",
@@ -50,31 +102,24 @@ class FeishuNotifier:
                 }
             }
 
-            response = requests.post(
-                self.webhook_url,
-                headers=self.headers,
-                data=json.dumps(payload, ensure_ascii=False),
-                timeout=10
-            )
-            response.raise_for_status()
-
-            result = response.json()
+            result = self._post_payload(payload)
 
             if result.get('code') == 0:
                 logger.info("✅ 飞书文本消息发送成功")
                 return True
             else:
-                logger.error(f"❌ 飞书消息发送失败: {result.get('msg', '未知错误')}")
-                logger.error(f"   响应详情: {result}")
+                logger.error("❌ 飞书消息发送失败: %s", result.get('msg', '未知错误'))
+                logger.error("   响应详情: %s", result)
                 return False
 
         except requests.RequestException as e:
-            logger.error(f"发送请求失败: {e}")
+            logger.error("发送请求失败: %s", e)
             return False
         except Exception as e:
-            logger.error(f"发送消息时发生错误: {e}")
+            logger.error("发送消息时发生错误: %s", e)
             return False
 
+    @traced('feishu_send_post')
     def send_post_message(self, title: str, content: str) -> bool:
         """
         发送富文本消息到飞书群
@@ -106,30 +151,23 @@ class FeishuNotifier:
                 }
             }
 
-            response = requests.post(
-                self.webhook_url,
-                headers=self.headers,
-                data=json.dumps(payload),
-                timeout=10
-            )
-            response.raise_for_status()
-
-            result = response.json()
+            result = self._post_payload(payload)
 
             if result.get('code') == 0:
                 logger.info("飞书富文本消息发送成功")
                 return True
             else:
-                logger.error(f"飞书富文本消息发送失败: {result.get('msg', '未知错误')}")
+                logger.error("飞书富文本消息发送失败: %s", result.get('msg', '未知错误'))
                 return False
 
         except requests.RequestException as e:
-            logger.error(f"发送请求失败: {e}")
+            logger.error("发送请求失败: %s", e)
             return False
         except Exception as e:
-            logger.error(f"发送消息时发生错误: {e}")
+            logger.error("发送消息时发生错误: %s", e)
             return False
 
+    @traced('feishu_send_card')
     def send_interactive_message(self, hot_list: list, source_name: str = "热榜") -> bool:
         """
         发送交互式卡片消息到飞书群（更美观的热榜展示）
@@ -142,120 +180,174 @@ class FeishuNotifier:
             发送是否成功
         """
         try:
-            from datetime import datetime
-
             # 检查热榜数据是否为空
             if not hot_list or len(hot_list) == 0:
                 logger.error("❌ 热榜数据为空，拒绝发送交互式卡片")
                 return False
 
-            logger.info(f"📊 准备发送交互式卡片，数据源: {source_name}, 数据量: {len(hot_list)}")
-
-            # 构建卡片元素
-            elements = []
-
-            # 添加时间戳
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            elements.append({
-                "tag": "div",
-                "text": {
-                    "tag": "plain_text",
-                    "content": f"更新时间: {timestamp}"
-                }
-            })
-
-            elements.append({
-                "tag": "hr"
-            })
-
-            # 添加热榜条目
-            for item in hot_list[:10]:  # 只展示前10条
-                rank = item['rank']
-                word = item['word']
-                hot_value = item['hot_value']
-                label = item.get('label', '')
-
-                # 格式化热度值
-                if hot_value >= 100000000:
-                    hot_str = f"{hot_value / 100000000:.1f}亿"
-                elif hot_value >= 10000:
-                    hot_str = f"{hot_value / 10000:.1f}万"
-                else:
-                    hot_str = str(hot_value)
-
-                # 排名图标
-                if rank == 1:
-                    icon = "🥇"
-                elif rank == 2:
-                    icon = "🥈"
-                elif rank == 3:
-                    icon = "🥉"
-                else:
-                    icon = f"{rank}."
-
-                label_str = f" [{label}]" if label else ""
-                content = f"{icon} {word}{label_str}\n🔥 热度: {hot_str}"
-
-                elements.append({
-                    "tag": "div",
-                    "text": {
-                        "tag": "plain_text",
-                        "content": content
-                    }
-                })
+            logger.info("📊 准备发送交互式卡片，数据源: %s, 数据量: %s", source_name, len(hot_list))
 
-                if rank < len(hot_list) and rank < 10:
-                    elements.append({
-                        "tag": "hr"
-                    })
-
-            # 计算实际展示数量
-            display_count = min(len(hot_list), 10)
-
-            payload = {
-                "msg_type": "interactive",
-                "card": {
-                    "header": {
-                        "title": {
-                            "tag": "plain_text",
-                            "content": f"📊 {source_name} Top{display_count}"
-                        },
-                        "template": "blue"
-                    },
-                    "elements": elements
-                }
-            }
+            with RENDER_SECONDS.time(kind='card'), span('render_card', item_count=len(hot_list)):
+                payload = self._build_card_payload(hot_list, source_name)
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
 
             # 记录payload信息
-            payload_size = len(json.dumps(payload, ensure_ascii=False))
-            logger.info(f"📦 卡片payload大小: {payload_size} 字节, 元素数量: {len(elements)}")
-            logger.debug(f"卡片标题: {payload['card']['header']['title']['content']}")
-
-            response = requests.post(
-                self.webhook_url,
-                headers=self.headers,
-                data=json.dumps(payload, ensure_ascii=False),
-                timeout=10
-            )
-            response.raise_for_status()
+            logger.info("📦 卡片payload大小: %s 字节, 元素数量: %s", len(body), len(payload['card']['elements']))
+            logger.debug("卡片标题: %s", payload['card']['header']['title']['content'])
 
-            result = response.json()
+            result = self._post_payload(payload, body)
 
             if result.get('code') == 0:
                 logger.info("✅ 飞书交互式卡片消息发送成功")
                 return True
             else:
-                logger.error(f"❌ 飞书交互式卡片消息发送失败: {result.get('msg', '未知错误')}")
-                logger.error(f"   响应详情: {result}")
+                logger.error("❌ 飞书交互式卡片消息发送失败: %s", result.get('msg', '未知错误'))
+                logger.error("   响应详情: %s", result)
                 return False
 
         except requests.RequestException as e:
-            logger.error(f"发送请求失败: {e}")
+            logger.error("发送请求失败: %s", e)
             return False
         except Exception as e:
-            logger.error(f"发送消息时发生错误: {e}")
+            logger.error("发送消息时发生错误: %s", e)
             return False
 
+    @traced('feishu_send_digest')
+    def send_digest(self, boards: List[Dict], title: str = "📊 热榜汇总",
+                    max_bytes: int = DEFAULT_CARD_MAX_BYTES) -> int:
+        """
+        将多个榜单打包为尽量少的汇总卡片发送（每张卡片不超过字节预算）
+
+        Args:
+            boards: 榜单列表，每项包含 heading（榜单标题）、hot_list 和可选的 key（榜单标识，
+                    用于按榜单复用条目元素，默认为 heading）
+            title: 卡片标题
+            max_bytes: 每张卡片请求体的字节预算
+
+        Returns:
+            发送成功的卡片数
+        """
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with RENDER_SECONDS.time(kind='digest'), span('render_digest', boards=len(boards)):
+            builder = DigestCardBuilder(title, max_bytes, preface=f"更新时间: {timestamp}")
+            for board in boards:
+                if board['hot_list']:
+                    # 每个榜单使用各自的指纹槽，整张汇总只写一次缓存文件
+                    key = f"digest:{board.get('key') or board['heading']}"
+                    builder.add_board(board['heading'], self._item_elements(board['hot_list'], key))
+            bodies = builder.build()
+        FINGERPRINTS.save()
+
+        logger.info("📦 %s 个榜单打包为 %s 张汇总卡片: %s 字节", len(boards), len(bodies),
+                    [len(body) for body in bodies])
+        sent = 0
+        for body in bodies:
+            try:
+                result = self._post_payload({'msg_type': 'interactive'}, body)
+            except requests.RequestException as e:
+                logger.error("发送请求失败: %s", e)
+                continue
+            if result.get('code') == 0:
+                sent += 1
+            else:
+                logger.error("❌ 汇总卡片发送失败: %s", result.get('msg', '未知错误'))
+        return sent
+
+    def _build_card_payload(self, hot_list: list, source_name: str) -> Dict:
+        """
+        构建热榜交互式卡片
+
+        Args:
+            hot_list: 热榜数据列表
+            source_name: 数据源名称
+
+        Returns:
+            卡片消息 payload
+        """
+        # 构建卡片元素
+        elements = []
+
+        # 添加时间戳
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        elements.append({
+            "tag": "div",
+            "text": {
+                "tag": "plain_text",
+                "content": f"更新时间: {timestamp}"
+            }
+        })
+
+        elements.append({
+            "tag": "hr"
+        })
+
+        elements.extend(self._item_elements(hot_list))
+
+        # 计算实际展示数量
+        display_count = min(len(hot_list), 10)
+
+        payload = {
+            "msg_type": "interactive",
+            "card": {
+                "header": {
+                    "title": {
+                        "tag": "plain_text",
+                        "content": f"📊 {source_name} Top{display_count}"
+                    },
+                    "template": "blue"
+                },
+                "elements": elements
+            }
+        }
+
+        return payload
+
+    def _item_elements(self, hot_list: list, key: str = 'elements') -> List[Dict]:
+        """
+        热榜条目元素（只取决于热榜内容，指纹与上一次相同时直接复用；缓存只更新内存，不在发送路径上写文件）
+
+        Args:
+            hot_list: 热榜数据列表
+            key: 指纹缓存的键名（不同榜单使用不同的键）
+
+        Returns:
+            卡片元素列表
+        """
+        fingerprint = hot_list_fingerprint(hot_list)
+        item_elements = FINGERPRINTS.get('card', key, fingerprint)
+        if item_elements is None:
+            item_elements = self._build_item_elements(hot_list)
+            FINGERPRINTS.put('card', key, fingerprint, item_elements)
+        return item_elements
+
+    @staticmethod
+    def _build_item_elements(hot_list: list) -> List[Dict]:
+        """
+        构建卡片中的热榜条目元素（只展示前10条）
+
+        Args:
+            hot_list: 热榜数据列表
+
+        Returns:
+            卡片元素列表
+        """
+        item_elements = []
+        for item in hot_list[:10]:  # 只展示前10条
+            item_elements.append({
+                "tag": "div",
+                "text": {
+                    "tag": "plain_text",
+                    "content": render_card_content(item)
+                }
+            })
+
+            if item['rank'] < len(hot_list) and item['rank'] < 10:
+                item_elements.append({
+                    "tag": "hr"
+                })
+
+        return item_elements
+
 
 if __name__ == "__main__":
     # 测试代码
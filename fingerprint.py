@@ -0,0 +1,153 @@
+"""
+热榜指纹模块
+对标准化后的热榜计算稳定指纹（排名、词条、标签，热度按展示精度分桶），
+文本、卡片和网页分片各环节据此判断展示内容是否与上一次相同，相同时复用上一次的输出；
+精确值会影响结果的环节（归档汇总、趋势榜）使用 content_fingerprint
+"""
+import os
+import json
+import atexit
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from rendering import format_hot_value
+
+logger = logging.getLogger(__name__)
+
+# 渲染结果缓存文件（跨运行保留）
+DEFAULT_CACHE_PATH = os.getenv('FINGERPRINT_CACHE_PATH', '.cache/fingerprints.json')
+
+# 缓存文件格式版本（渲染格式变化时递增）
+CACHE_VERSION = 1
+
+
+def hot_value_bucket(hot_value) -> str:
+    """
+    热度分桶，即展示用的热度格式（亿 / 万保留一位小数），同一分桶的热度展示结果相同
+
+    Args:
+        hot_value: 热度值
+
+    Returns:
+        分桶字符串
+    """
+    return format_hot_value(hot_value)
+
+
+def hot_list_fingerprint(hot_list: List[Dict]) -> str:
+    """
+    计算热榜指纹
+
+    Args:
+        hot_list: 标准化后的热榜数据
+
+    Returns:
+        16 位十六进制指纹
+    """
+    canonical = [
+        [item['rank'], item['word'], hot_value_bucket(item.get('hot_value')), item.get('label', '') or '']
+        for item in hot_list
+    ]
+    body = json.dumps(canonical, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha1(body).hexdigest()[:16]
+
+
+def content_fingerprint(data) -> str:
+    """
+    计算任意 JSON 数据的精确指纹（不分桶，任何字段变化都会改变指纹）
+
+    Args:
+        data: 可 JSON 序列化的数据
+
+    Returns:
+        16 位十六进制指纹
+    """
+    body = json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return hashlib.sha1(body).hexdigest()[:16]
+
+
+class FingerprintCache:
+    """按 环节 x 键名 保存上一次的指纹和输出"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        """
+        初始化缓存
+
+        Args:
+            path: 持久化文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    data = json.load(f)
+                self._entries = data['entries'] if data.get('version') == CACHE_VERSION else {}
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("指纹缓存读取失败，已重置: %s", e)
+                self._entries = {}
+        return self._entries
+
+    def get(self, stage: str, key: str, fingerprint: str) -> Optional[Any]:
+        """
+        读取上一次的输出
+
+        Args:
+            stage: 环节名称（如 text / card）
+            key: 环节内的键名
+            fingerprint: 当前热榜指纹
+
+        Returns:
+            指纹相同时返回上一次的输出，否则返回 None
+        """
+        with self._lock:
+            entry = self._load().get(f"{stage}:{key}")
+        if entry is None or entry['fingerprint'] != fingerprint:
+            return None
+        logger.debug("♻️  %s/%s 指纹未变化，复用上一次的输出", stage, key)
+        return entry['output']
+
+    def put(self, stage: str, key: str, fingerprint: str, output: Any):
+        """
+        保存本次的指纹和输出（需可 JSON 序列化）
+
+        Args:
+            stage: 环节名称
+            key: 环节内的键名
+            fingerprint: 热榜指纹
+            output: 输出内容
+        """
+        with self._lock:
+            self._load()[f"{stage}:{key}"] = {'fingerprint': fingerprint, 'output': output}
+            self._dirty = True
+
+    def save(self):
+        """有新数据时写回缓存文件"""
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            body = json.dumps({'version': CACHE_VERSION, 'entries': self._entries}, ensure_ascii=False)
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(body)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("指纹缓存保存失败: %s", e)
+
+
+# 进程内共享的缓存（渲染时只更新内存，由常驻进程每轮结束时或进程退出时统一写回）
+FINGERPRINTS = FingerprintCache()
+atexit.register(FINGERPRINTS.save)
@@ -0,0 +1,430 @@
+"""
+热榜历史存储模块（SQLite，可选）
+每次抓取批量写入所有热榜条目，词条文本统一映射为整数 ID，
+并通过覆盖索引支持按词条和按时间的快速查询。进程内共享一个连接（default_store），退出时关闭
+"""
+import os
+import time
+import atexit
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS words (
+    id INTEGER PRIMARY KEY,
+    word TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS polls (
+    id INTEGER PRIMARY KEY,
+    poll_time INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    category TEXT NOT NULL,
+    item_count INTEGER NOT NULL,
+    -- 抓取时请求的条目数（板块过滤后的条目可能更少）
+    requested INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS hot_items (
+    poll_id INTEGER REFERENCES polls(id),
+    poll_time INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    category TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    word_id INTEGER NOT NULL REFERENCES words(id),
+    hot_value INTEGER NOT NULL,
+    label TEXT NOT NULL DEFAULT '',
+    event_time INTEGER
+);
+
+-- 最近一次抓取查询
+CREATE INDEX IF NOT EXISTS idx_polls_category_time ON polls(category, source, poll_time);
+
+-- 单次抓取的条目（按排名）
+CREATE INDEX IF NOT EXISTS idx_hot_items_poll ON hot_items(poll_id, rank);
+
+-- 单个词条的历史（覆盖索引，不回表）
+CREATE INDEX IF NOT EXISTS idx_hot_items_word_time
+    ON hot_items(word_id, poll_time, rank, hot_value, source, category);
+
+-- 某一时刻的榜单（覆盖索引，不回表）
+CREATE INDEX IF NOT EXISTS idx_hot_items_time_rank
+    ON hot_items(poll_time, rank, word_id, hot_value, source, category);
+"""
+
+# 旧版数据库缺少的列：表 -> [(列名, 定义)]
+MIGRATIONS = {
+    'polls': [('requested', 'INTEGER')],
+    'hot_items': [('poll_id', 'INTEGER REFERENCES polls(id)')],
+}
+
+# 默认数据库路径（留空表示不启用）
+DEFAULT_DB_PATH = os.getenv('HISTORY_DB', '').strip()
+
+# Feishu 推送可以复用多久以内的抓取结果（秒）
+DEFAULT_REUSE_SECONDS = int(os.getenv('HISTORY_REUSE_SECONDS', '300'))
+
+
+def _to_int(value) -> Optional[int]:
+    """将 event_time 等字段转换为整数，无法转换时返回 None"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class HotListStore:
+    """SQLite 热榜历史存储"""
+
+    def __init__(self, db_path: str):
+        """
+        打开（或创建）数据库
+
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        # WAL 模式下读写互不阻塞，网页脚本和推送进程可以同时访问
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=OFF')
+        self._migrate()
+        self._conn.executescript(SCHEMA)
+        self._word_ids: Dict[str, int] = {}
+
+    def _migrate(self):
+        """为旧版数据库补齐新增的列（新建的数据库由 SCHEMA 直接创建）"""
+        for table, columns in MIGRATIONS.items():
+            existing = {row[1] for row in self._conn.execute(f'PRAGMA table_info({table})')}
+            if not existing:
+                continue
+            for name, definition in columns:
+                if name in existing:
+                    continue
+                self._conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+                logger.info("🔧 历史数据库已添加列 %s.%s", table, name)
+                if name == 'poll_id':
+                    # 旧数据按 抓取时间 x 数据源 x 板块 关联到抓取记录（同一秒内的多次抓取无法区分，归到最后一次）
+                    self._conn.execute(
+                        'UPDATE hot_items SET poll_id = ('
+                        '  SELECT MAX(p.id) FROM polls p WHERE p.poll_time = hot_items.poll_time '
+                        '  AND p.source = hot_items.source AND p.category = hot_items.category'
+                        ')'
+                    )
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def _intern(self, words: Iterable[str]) -> Dict[str, int]:
+        """
+        获取词条 ID（不存在则创建），需在事务内调用
+
+        Args:
+            words: 词条列表
+
+        Returns:
+            词条 -> ID
+        """
+        missing = [word for word in set(words) if word not in self._word_ids]
+        if missing:
+            self._conn.executemany('INSERT OR IGNORE INTO words(word) VALUES (?)', [(word,) for word in missing])
+            # SQLite 单条语句的参数数量有限，分批查询
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    f'SELECT word, id FROM words WHERE word IN ({placeholders})', batch
+                ).fetchall()
+                self._word_ids.update(rows)
+        return self._word_ids
+
+    def record_poll(self, hot_list: List[Dict], source: str, category: str = 'all',
+                    poll_time: Optional[float] = None, requested: Optional[int] = None) -> int:
+        """
+        批量写入一次抓取结果（单个事务）
+
+        Args:
+            hot_list: 热榜数据
+            source: 数据源键名
+            category: 板块键名
+            poll_time: 抓取时间戳（秒），默认为当前时间
+            requested: 抓取时请求的条目数，默认为实际条目数
+
+        Returns:
+            写入的条目数
+        """
+        if not hot_list:
+            return 0
+        poll_time = int(poll_time if poll_time is not None else time.time())
+
+        with self._lock, span('history_store_write', item_count=len(hot_list)):
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                word_ids = self._intern(item['word'] for item in hot_list)
+                poll_id = self._conn.execute(
+                    'INSERT INTO polls(poll_time, source, category, item_count, requested) VALUES (?, ?, ?, ?, ?)',
+                    (poll_time, source, category, len(hot_list), requested if requested is not None else len(hot_list))
+                ).lastrowid
+                self._conn.executemany(
+                    'INSERT INTO hot_items(poll_id, poll_time, source, category, rank, word_id, hot_value, label, '
+                    'event_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [
+                        (
+                            poll_id, poll_time, source, category, item['rank'], word_ids[item['word']],
+                            int(item.get('hot_value') or 0), item.get('label', '') or '',
+                            _to_int(item.get('event_time')),
+                        )
+                        for item in hot_list
+                    ]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                # 回滚后新建的词条 ID 失效
+                self._word_ids.clear()
+                raise
+
+        logger.debug("已写入 %s 条热榜到 %s", len(hot_list), self.db_path)
+        return len(hot_list)
+
+    def latest_poll(self, category: str = 'all', source: Optional[str] = None,
+                    max_age: Optional[float] = None, min_items: int = 0) -> Optional[Dict]:
+        """
+        读取最近一次抓取结果
+
+        Args:
+            category: 板块键名
+            source: 数据源键名，为 None 时不限
+            max_age: 最大时效（秒），超过则视为没有
+            min_items: 至少需要的条目数（请求条目数不少于该值、但板块过滤后条目较少的抓取同样可用）
+
+        Returns:
+            {'poll_time', 'source', 'category', 'hot_list'}，没有符合条件的记录时返回 None
+        """
+        sql = 'SELECT id, poll_time, source FROM polls WHERE category = ? AND (item_count >= ? OR requested >= ?)'
+        params: list = [category, min_items, min_items]
+        if source:
+            sql += ' AND source = ?'
+            params.append(source)
+        if max_age is not None:
+            sql += ' AND poll_time >= ?'
+            params.append(int(time.time() - max_age))
+        sql += ' ORDER BY poll_time DESC, id DESC LIMIT 1'
+
+        with self._lock, span('history_store_read'):
+            row = self._conn.execute(sql, params).fetchone()
+            if row is None:
+                return None
+            poll_id, poll_time, poll_source = row
+            rows = self._conn.execute(
+                'SELECT h.rank, w.word, h.hot_value, h.label, h.event_time '
+                'FROM hot_items h JOIN words w ON w.id = h.word_id '
+                'WHERE h.poll_id = ? ORDER BY h.rank',
+                (poll_id,)
+            ).fetchall()
+
+        return {
+            'poll_time': poll_time,
+            'source': poll_source,
+            'category': category,
+            'hot_list': [
+                {
+                    'rank': rank,
+                    'word': word,
+                    'hot_value': hot_value,
+                    'label': label,
+                    'event_time': event_time if event_time is not None else '',
+                }
+                for rank, word, hot_value, label, event_time in rows
+            ],
+        }
+
+    def word_history(self, word: str, since: Optional[float] = None,
+                     until: Optional[float] = None) -> List[Dict]:
+        """
+        查询词条的历史排名和热度
+
+        Args:
+            word: 词条
+            since: 起始时间戳（秒）
+            until: 结束时间戳（秒）
+
+        Returns:
+            按时间排序的 [{'poll_time', 'source', 'category', 'rank', 'hot_value'}, ...]
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT id FROM words WHERE word = ?', (word,)).fetchone()
+            if row is None:
+                return []
+            rows = self._conn.execute(
+                'SELECT poll_time, source, category, rank, hot_value FROM hot_items '
+                'WHERE word_id = ? AND poll_time >= ? AND poll_time <= ? ORDER BY poll_time',
+                (row[0], int(since or 0), int(until if until is not None else 2 ** 62))
+            ).fetchall()
+        return [
+            {'poll_time': poll_time, 'source': source, 'category': category, 'rank': rank, 'hot_value': hot_value}
+            for poll_time, source, category, rank, hot_value in rows
+        ]
+
+    def top_words(self, since: float, until: Optional[float] = None, max_rank: int = 10,
+                  limit: int = 20) -> List[Dict]:
+        """
+        统计时间段内进入前 N 名次数最多的词条
+
+        Args:
+            since: 起始时间戳（秒）
+            until: 结束时间戳（秒）
+            max_rank: 排名上限
+            limit: 返回数量
+
+        Returns:
+            [{'word', 'polls', 'best_rank', 'peak_hot_value'}, ...]
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT w.word, t.polls, t.best_rank, t.peak_hot_value FROM ('
+                '  SELECT word_id, COUNT(*) AS polls, MIN(rank) AS best_rank, MAX(hot_value) AS peak_hot_value '
+                '  FROM hot_items WHERE poll_time >= ? AND poll_time <= ? AND rank <= ? '
+                '  GROUP BY word_id ORDER BY polls DESC, best_rank LIMIT ?'
+                ') t JOIN words w ON w.id = t.word_id ORDER BY t.polls DESC, t.best_rank',
+                (int(since), int(until if until is not None else 2 ** 62), max_rank, limit)
+            ).fetchall()
+        return [
+            {'word': word, 'polls': polls, 'best_rank': best_rank, 'peak_hot_value': peak_hot_value}
+            for word, polls, best_rank, peak_hot_value in rows
+        ]
+
+    def import_snapshots(self, snapshots: Iterable[Dict]) -> int:
+        """
+        导入 TrendArchive 的 JSONL 快照（用于迁移已有归档）
+
+        Args:
+            snapshots: 快照迭代器（TrendArchive.iter_snapshots）
+
+        Returns:
+            导入的抓取次数
+        """
+        count = 0
+        for snapshot in snapshots:
+            poll_time = datetime.strptime(snapshot['t'], '%Y-%m-%d %H:%M:%S').timestamp()
+            hot_list = [
+                {'rank': rank, 'word': word, 'hot_value': hot_value, 'label': label}
+                for rank, word, hot_value, label in snapshot['items']
+            ]
+            self.record_poll(hot_list, snapshot['source'], snapshot['category'], poll_time)
+            count += 1
+        logger.info("📥 已导入 %s 次抓取到 %s", count, self.db_path)
+        return count
+
+
+def open_default_store() -> Optional[HotListStore]:
+    """
+    按环境变量 HISTORY_DB 打开存储（新建连接，由调用方关闭；一般使用 default_store）
+
+    Returns:
+        存储实例，未配置时返回 None
+    """
+    if not DEFAULT_DB_PATH:
+        return None
+    try:
+        return HotListStore(DEFAULT_DB_PATH)
+    except sqlite3.Error as e:
+        logger.warning("历史数据库打开失败，已跳过: %s", e)
+        return None
+
+
+# 进程内共享的存储（首次使用时打开），False 表示打开失败不再重试
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def default_store() -> Optional[HotListStore]:
+    """
+    进程内共享的存储：整个进程只打开一次连接（词条 ID 缓存随之保留），进程退出时关闭
+
+    Returns:
+        存储实例，未配置或打开失败时返回 None
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = open_default_store() or False
+        return _default_store or None
+
+
+def close_default_store():
+    """关闭进程内共享的存储（之后再使用会重新打开）"""
+    global _default_store
+    with _default_store_lock:
+        store, _default_store = _default_store, None
+    if store:
+        store.close()
+
+
+def _forget_inherited_store():
+    """fork 出的子进程不能使用父进程的连接，只丢弃引用，由子进程重新打开"""
+    global _default_store, _default_store_lock
+    _default_store = None
+    _default_store_lock = threading.Lock()
+
+
+atexit.register(close_default_store)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_inherited_store)
+
+
+def fetch_with_store(scraper, limit: int, category: str = 'all',
+                     store: Optional[HotListStore] = None,
+                     max_age: float = DEFAULT_REUSE_SECONDS) -> List[Dict]:
+    """
+    抓取热榜，优先复用存储中足够新的结果，真实抓取的结果写回存储
+
+    Args:
+        scraper: DouyinScraper 实例（复用时会更新其数据源信息）
+        limit: 热榜数量
+        category: 板块键名
+        store: 历史存储，为 None 时直接抓取
+        max_age: 可复用结果的最大时效（秒），0 表示不复用
+
+    Returns:
+        热榜列表
+    """
+    if store is None:
+        return scraper.fetch_hot_list(limit=limit, category=category)
+
+    if max_age > 0:
+        # 只复用同一数据源的结果；不限数据源的抓取器按首选（第一个启用的）数据源查找，
+        # 避免把回退数据源或其他数据源的结果当作首选数据源的数据
+        source = scraper.source or next(iter(scraper.config_loader.get_enabled_data_sources()), None)
+        cached = store.latest_poll(category, source=source, max_age=max_age, min_items=limit)
+        if cached:
+            scraper.is_using_test_data = False
+            scraper.stale_seconds = None
+            scraper.current_source_key = cached['source']
+            scraper.current_source_name = scraper.config_loader.get_source_name(cached['source'])
+            logger.info("♻️  复用 %s 秒前的抓取结果（%s）",
+                        int(time.time() - cached['poll_time']), scraper.current_source_name)
+            return cached['hot_list'][:limit]
+
+    hot_list = scraper.fetch_hot_list(limit=limit, category=category)
+    if hot_list and not scraper.is_using_test_data and scraper.stale_seconds is None:
+        try:
+            store.record_poll(hot_list, scraper.current_source_key, category, requested=limit)
+        except sqlite3.Error as e:
+            logger.warning("写入历史数据库失败: %s", e)
+    return hot_list
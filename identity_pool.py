@@ -0,0 +1,346 @@
+"""
+请求身份池
+热榜请求使用配置中的请求身份（请求头 / Cookie / 可选的本地代理）发送：每个身份用令牌桶限制请求速率，
+在当前可用的身份中选择最久未使用的一个；按身份统计成功、限流和失败次数，
+被限流的 身份 x 接口 按 Retry-After（没有时指数退避）冷却，连续被限流过多时该身份暂停请求这个接口，
+代理连续失败的身份整体停用（未配置身份时的默认身份只冷却不停用）。冷却只影响被限流的接口，不影响其他接口和主机。
+所有身份都不可用时不发送请求（由抓取器回退到最近成功数据），限流只会让请求变慢，不会让请求变多
+"""
+import os
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from metrics import IDENTITY_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# 状态文件格式版本（2：冷却按 身份 x 接口 记录）
+STATE_VERSION = 2
+
+# 默认状态文件路径（冷却和停用状态跨运行保留）
+DEFAULT_STATE_PATH = os.getenv('IDENTITY_STATE_PATH', '.cache/identities.json')
+
+# 被限流后的基础冷却时间（秒），连续限流时按 2 倍递增
+DEFAULT_COOLDOWN = float(os.getenv('IDENTITY_COOLDOWN_SECONDS', '60'))
+
+# 冷却时间上限（秒）
+MAX_COOLDOWN = 3600.0
+
+# 连续限流（或代理失败）达到该次数时停用身份
+RETIRE_AFTER = int(os.getenv('IDENTITY_RETIRE_AFTER', '5'))
+
+# 停用时长（秒），之后重新尝试
+RETIRE_SECONDS = float(os.getenv('IDENTITY_RETIRE_HOURS', '24')) * 3600
+
+# 未配置 identities 时使用的身份名
+DEFAULT_IDENTITY = 'default'
+
+# 视为限流的 HTTP 状态码（403 见 classify_status）
+THROTTLE_STATUS = (403, 429)
+
+# 结果类型：成功 / 限流 / 代理失败（计入停用） / 其他失败（上游问题，不计入停用）
+OUTCOMES = ('ok', 'throttled', 'proxy_error', 'failed')
+
+
+@dataclass(frozen=True)
+class Identity:
+    """一个请求身份"""
+
+    name: str
+    headers: Dict[str, str]
+    proxy: Optional[str] = None
+    # 每分钟最多请求次数，None 表示不限制
+    rate_per_minute: Optional[float] = None
+    burst: int = 1
+
+    @property
+    def proxies(self) -> Optional[Dict[str, str]]:
+        """requests 使用的代理配置"""
+        return {'http': self.proxy, 'https': self.proxy} if self.proxy else None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头（只支持秒数）
+
+    Args:
+        value: 响应头的值
+
+    Returns:
+        等待秒数，无法解析时返回 None
+    """
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    return seconds if seconds >= 0 else None
+
+
+def classify_status(identity: Identity, status_code: int, retry_after: Optional[float]) -> str:
+    """
+    非 200 响应的结果类型
+
+    Args:
+        identity: 请求身份
+        status_code: HTTP 状态码
+        retry_after: Retry-After 秒数
+
+    Returns:
+        'throttled' 或 'failed'；默认身份收到不带 Retry-After 的 403 多半是接口本身拒绝访问，按普通失败处理
+    """
+    if status_code not in THROTTLE_STATUS:
+        return 'failed'
+    if status_code == 403 and identity.name == DEFAULT_IDENTITY and retry_after is None:
+        return 'failed'
+    return 'throttled'
+
+
+def request_scope(url: str) -> str:
+    """冷却的作用范围：接口地址（去掉查询参数）"""
+    return url.split('?', 1)[0]
+
+
+def _empty_entry() -> Dict:
+    return {
+        'requests': 0, 'ok': 0, 'throttled': 0, 'proxy_error': 0, 'failed': 0,
+        # 连续代理失败次数、最近使用时间、整体停用截止时间
+        'consecutive': 0, 'last_used': 0.0, 'retired_until': 0.0,
+        # 接口 -> 冷却状态
+        'scopes': {},
+    }
+
+
+def _empty_scope() -> Dict:
+    return {'consecutive': 0, 'cooldown_until': 0.0, 'retired_until': 0.0}
+
+
+class IdentityPool:
+    """请求身份池"""
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH, cooldown: float = DEFAULT_COOLDOWN,
+                 retire_after: int = RETIRE_AFTER, retire_seconds: float = RETIRE_SECONDS):
+        """
+        初始化身份池
+
+        Args:
+            path: 状态持久化文件路径
+            cooldown: 被限流后的基础冷却时间（秒）
+            retire_after: 连续限流多少次后停用
+            retire_seconds: 停用时长（秒）
+        """
+        self.path = path
+        self.cooldown = cooldown
+        self.retire_after = retire_after
+        self.retire_seconds = retire_seconds
+        self._lock = threading.Lock()
+        self._identities: Dict[str, Identity] = {}
+        self._signature: Optional[str] = None
+        # 令牌桶：身份 -> (令牌数, 更新时间)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._dirty = False
+
+    def configure(self, base_headers: Dict[str, str], identities: Optional[List[Dict]] = None):
+        """
+        根据配置同步身份列表（定义未变化时直接返回）
+
+        Args:
+            base_headers: 公共请求头（scraper.headers）
+            identities: scraper.identities 配置，每项可包含 name / headers / cookie / proxy /
+                        rate_per_minute / burst；为空时只使用公共请求头这一个身份
+        """
+        signature = json.dumps([base_headers, identities or []], sort_keys=True, ensure_ascii=False)
+        if signature == self._signature:
+            return
+
+        pool = {}
+        for index, entry in enumerate(identities or [], 1):
+            headers = dict(base_headers)
+            headers.update(entry.get('headers') or {})
+            if entry.get('cookie'):
+                headers['Cookie'] = entry['cookie']
+            name = str(entry.get('name') or f"identity-{index}")
+            rate = entry.get('rate_per_minute')
+            pool[name] = Identity(
+                name=name,
+                headers=headers,
+                proxy=entry.get('proxy') or None,
+                rate_per_minute=float(rate) if rate else None,
+                burst=max(1, int(entry.get('burst', 1))),
+            )
+        if not pool:
+            pool[DEFAULT_IDENTITY] = Identity(DEFAULT_IDENTITY, dict(base_headers))
+
+        with self._lock:
+            self._identities = pool
+            self._buckets = {name: bucket for name, bucket in self._buckets.items() if name in pool}
+            self._signature = signature
+        logger.debug("请求身份池: %s", ', '.join(pool))
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    data = json.load(f)
+                self._entries = data['identities'] if data.get('version') == STATE_VERSION else {}
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("请求身份状态读取失败，已重置: %s", e)
+                self._entries = {}
+        return self._entries
+
+    def _tokens(self, identity: Identity, now: float) -> float:
+        """身份当前的令牌数（不限速的身份始终可用）"""
+        if identity.rate_per_minute is None:
+            return float('inf')
+        tokens, updated = self._buckets.get(identity.name, (float(identity.burst), now))
+        return min(float(identity.burst), tokens + (now - updated) * identity.rate_per_minute / 60.0)
+
+    def acquire(self, url: str) -> Optional[Identity]:
+        """
+        选择一个可用的身份：对该接口未冷却、未停用且令牌桶有余量，其中最久未使用的一个
+
+        Args:
+            url: 要请求的接口
+
+        Returns:
+            请求身份，全部不可用时返回 None
+        """
+        scope = request_scope(url)
+        now = time.time()
+        with self._lock:
+            entries = self._load()
+            best = None
+            for identity in self._identities.values():
+                entry = entries.setdefault(identity.name, _empty_entry())
+                if entry['retired_until'] > now:
+                    continue
+                scope_state = entry['scopes'].get(scope)
+                if scope_state and (scope_state['cooldown_until'] > now or scope_state['retired_until'] > now):
+                    continue
+                if self._tokens(identity, now) < 1.0:
+                    continue
+                if best is None or entry['last_used'] < entries[best.name]['last_used']:
+                    best = identity
+            if best is None:
+                return None
+
+            if best.rate_per_minute is not None:
+                self._buckets[best.name] = (self._tokens(best, now) - 1.0, now)
+            entry = entries[best.name]
+            entry['last_used'] = now
+            entry['requests'] += 1
+            self._dirty = True
+            return best
+
+    def report(self, identity: Identity, url: str, outcome: str, retry_after: Optional[float] = None):
+        """
+        记录请求结果
+
+        Args:
+            identity: 请求身份
+            url: 请求的接口
+            outcome: 结果类型（见 OUTCOMES）
+            retry_after: 被限流时上游要求的等待秒数
+        """
+        IDENTITY_REQUESTS.inc(identity=identity.name, outcome=outcome)
+        scope = request_scope(url)
+        now = time.time()
+        # 未配置身份时的默认身份只冷却不停用，避免长时间完全停止抓取
+        can_retire = identity.name != DEFAULT_IDENTITY
+        with self._lock:
+            entry = self._load().setdefault(identity.name, _empty_entry())
+            entry[outcome] += 1
+            self._dirty = True
+            if outcome == 'failed':
+                # 上游自身的错误与身份无关
+                return
+            if outcome == 'ok':
+                entry['consecutive'] = 0
+                entry['scopes'].pop(scope, None)
+                return
+
+            if outcome == 'proxy_error':
+                # 代理失败与接口无关，连续失败时整个身份停用
+                entry['consecutive'] += 1
+                consecutive = entry['consecutive']
+                retired = can_retire and consecutive >= self.retire_after
+                if retired:
+                    entry['retired_until'] = now + self.retire_seconds
+                    entry['consecutive'] = 0
+            else:
+                # 限流只冷却这个 身份 x 接口
+                scope_state = entry['scopes'].setdefault(scope, _empty_scope())
+                scope_state['consecutive'] += 1
+                consecutive = scope_state['consecutive']
+                cooldown = retry_after if retry_after is not None else self.cooldown * 2 ** (consecutive - 1)
+                cooldown = min(cooldown, MAX_COOLDOWN)
+                scope_state['cooldown_until'] = now + cooldown
+                retired = can_retire and consecutive >= self.retire_after
+                if retired:
+                    scope_state['retired_until'] = now + self.retire_seconds
+                    scope_state['consecutive'] = 0
+
+        if outcome == 'throttled':
+            logger.warning("🚦 请求身份 %s 请求 %s 被限流，冷却 %.0f 秒", identity.name, scope, cooldown)
+            if retired:
+                logger.warning("⛔ 请求身份 %s 请求 %s 连续 %s 次被限流，停用 %.0f 小时",
+                               identity.name, scope, consecutive, self.retire_seconds / 3600)
+        elif retired:
+            logger.warning("⛔ 请求身份 %s 连续 %s 次代理失败，停用 %.0f 小时",
+                           identity.name, consecutive, self.retire_seconds / 3600)
+
+    def stats(self) -> List[Dict]:
+        """
+        各身份的统计
+
+        Returns:
+            每个身份一项：name / state（active / retired）/ cooling（正在冷却或停用的接口）/
+            requests / ok / throttled / proxy_error / failed / success_rate
+        """
+        now = time.time()
+        with self._lock:
+            entries = self._load()
+            rows = []
+            for name in self._identities:
+                entry = entries.get(name) or _empty_entry()
+                finished = sum(entry[outcome] for outcome in OUTCOMES)
+                cooling = sorted(
+                    scope for scope, scope_state in entry['scopes'].items()
+                    if scope_state['cooldown_until'] > now or scope_state['retired_until'] > now
+                )
+                rows.append({
+                    'name': name,
+                    'state': 'retired' if entry['retired_until'] > now else 'active',
+                    'cooling': cooling,
+                    **{key: entry[key] for key in ('requests',) + OUTCOMES},
+                    'success_rate': round(entry['ok'] / finished, 4) if finished else None,
+                })
+            return rows
+
+    def save(self):
+        """有新数据时写回状态文件"""
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            body = json.dumps({'version': STATE_VERSION, 'identities': self._entries}, ensure_ascii=False)
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(body)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("请求身份状态保存失败: %s", e)
+
+
+# 进程内共享的身份池
+IDENTITIES = IdentityPool()
@@ -0,0 +1,230 @@
+"""
+热榜条目校验模块
+每个数据源的字段约定（标题 / 热度字段、长度和数值范围）在配置加载时编译为 ItemSchema，
+抓取到的原始条目一次遍历完成提取和校验：能修正的条目修正后保留并标记异常，
+无法使用的条目（非对象、没有标题、重复）丢弃并按原因计数，不再因个别坏条目丢弃整个响应
+"""
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# 默认的标题字段（按优先级）
+DEFAULT_WORD_FIELDS = ('word', 'title', 'sentence', 'query', 'name', 'music_title')
+
+# 默认的热度字段（按优先级）
+DEFAULT_HOT_FIELDS = ('hot_value', 'view_count', 'hot_level', 'search_count')
+
+# 默认的标签字段（按优先级）
+DEFAULT_LABEL_FIELDS = ('label', 'tag')
+
+# 字段不存在的标记（与字段值为 None 区分）
+_MISSING = object()
+
+
+def format_label(label, label_map: Dict[int, str]) -> str:
+    """
+    格式化标签（将数字标签转换为文本）
+
+    Args:
+        label: 标签（可能是数字、字符串或空值）
+        label_map: 数字标签映射表
+
+    Returns:
+        格式化后的标签文本
+    """
+    if label is None or label == '':
+        return ''
+    if isinstance(label, str):
+        return label
+    if isinstance(label, int):
+        return label_map.get(label, '')
+    return str(label)
+
+
+@dataclass
+class ValidationResult:
+    """一次响应的校验结果"""
+
+    items: List[Dict]
+    scanned: int = 0
+    rejects: Dict[str, int] = field(default_factory=dict)
+    anomalies: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def rejected(self) -> int:
+        return sum(self.rejects.values())
+
+    @property
+    def reject_ratio(self) -> float:
+        return self.rejected / self.scanned if self.scanned else 0.0
+
+
+@dataclass(frozen=True)
+class ItemSchema:
+    """单个数据源的条目字段约定"""
+
+    word_fields: Tuple[str, ...] = DEFAULT_WORD_FIELDS
+    hot_fields: Tuple[str, ...] = DEFAULT_HOT_FIELDS
+    label_fields: Tuple[str, ...] = DEFAULT_LABEL_FIELDS
+    max_word_length: int = 200
+    max_hot_value: int = 10 ** 12
+    # 丢弃的条目超过该比例时视为整个响应异常
+    max_reject_ratio: float = 0.5
+
+    @classmethod
+    def from_config(cls, source_config: Optional[Dict]) -> 'ItemSchema':
+        """
+        根据数据源配置中的 schema 段生成（未配置的项使用默认值）
+
+        Args:
+            source_config: 数据源配置
+
+        Returns:
+            条目字段约定
+        """
+        schema = (source_config or {}).get('schema') or {}
+        defaults = cls()
+        return cls(
+            word_fields=tuple(schema.get('word_fields') or defaults.word_fields),
+            hot_fields=tuple(schema.get('hot_fields') or defaults.hot_fields),
+            label_fields=tuple(schema.get('label_fields') or defaults.label_fields),
+            max_word_length=int(schema.get('max_word_length', defaults.max_word_length)),
+            max_hot_value=int(schema.get('max_hot_value', defaults.max_hot_value)),
+            max_reject_ratio=float(schema.get('max_reject_ratio', defaults.max_reject_ratio)),
+        )
+
+    def validate(self, word_list: List, limit: int, label_map: Dict[int, str]) -> ValidationResult:
+        """
+        提取并校验原始条目，收集到 limit 条有效条目后停止
+
+        Args:
+            word_list: 原始热榜条目
+            limit: 需要的有效条目数量
+            label_map: 数字标签映射表
+
+        Returns:
+            校验结果：有效条目按原顺序重新编号，修正过的条目带 anomalies 字段
+        """
+        # 最常见的情况（第一个字段就有值、热度为范围内的整数、标签为字符串或数字）走内联的快速路径
+        first_word_field, *other_word_fields = self.word_fields
+        first_hot_field, *other_hot_fields = self.hot_fields
+        first_label_field, *other_label_fields = self.label_fields
+        max_word_length = self.max_word_length
+        max_hot_value = self.max_hot_value
+
+        items: List[Dict] = []
+        append = items.append
+        seen = set()
+        seen_add = seen.add
+        rejects: Dict[str, int] = {}
+        anomalies: Dict[str, int] = {}
+        scanned = 0
+        rank = 0
+
+        for raw in word_list:
+            if rank >= limit:
+                break
+            scanned += 1
+            if type(raw) is not dict:
+                rejects['not_object'] = rejects.get('not_object', 0) + 1
+                continue
+            get = raw.get
+            item_anomalies = None
+
+            # 标题：取第一个非空字段
+            word = get(first_word_field)
+            if not word:
+                for name in other_word_fields:
+                    word = get(name)
+                    if word:
+                        break
+            if type(word) is not str:
+                if isinstance(word, (int, float)) and not isinstance(word, bool) and word:
+                    word = str(word)
+                    item_anomalies = ['coerced_word']
+                else:
+                    reason = 'missing_word' if not word else 'invalid_word'
+                    rejects[reason] = rejects.get(reason, 0) + 1
+                    continue
+            word = word.strip()
+            if not word:
+                rejects['missing_word'] = rejects.get('missing_word', 0) + 1
+                continue
+            if len(word) > max_word_length:
+                word = word[:max_word_length]
+                item_anomalies = (item_anomalies or []) + ['word_truncated']
+            if word in seen:
+                rejects['duplicate'] = rejects.get('duplicate', 0) + 1
+                continue
+            seen_add(word)
+
+            # 热度：取第一个非零字段（都为零时取第一个存在的字段），类型或范围不对时修正为 0 并标记
+            hot_value = get(first_hot_field)
+            if not hot_value:
+                for name in other_hot_fields:
+                    value = get(name)
+                    if value:
+                        hot_value = value
+                        break
+                    if hot_value is None:
+                        hot_value = value
+            if type(hot_value) is not int or not 0 <= hot_value <= max_hot_value:
+                hot_value, anomaly = self._coerce_hot_value(hot_value)
+                if anomaly:
+                    item_anomalies = (item_anomalies or []) + [anomaly]
+
+            # 标签：取第一个存在的字段（字段存在但为空时不再往后找，与 item.get('label', item.get('tag')) 一致）
+            label = get(first_label_field, _MISSING)
+            if label is _MISSING:
+                label = ''
+                for name in other_label_fields:
+                    value = get(name, _MISSING)
+                    if value is not _MISSING:
+                        label = value
+                        break
+            if type(label) is not str:
+                label = label_map.get(label, '') if type(label) is int else format_label(label, label_map)
+
+            rank += 1
+            item = {
+                'rank': rank,
+                'word': word,
+                'hot_value': hot_value,
+                'label': label,
+                'event_time': get('event_time', ''),
+            }
+            if item_anomalies:
+                item['anomalies'] = item_anomalies
+                for anomaly in item_anomalies:
+                    anomalies[anomaly] = anomalies.get(anomaly, 0) + 1
+            append(item)
+
+        return ValidationResult(items, scanned, rejects, anomalies)
+
+    def _coerce_hot_value(self, value) -> Tuple[int, Optional[str]]:
+        """
+        修正非整数或超出范围的热度
+
+        Returns:
+            (热度, 异常类型)，无需标记时异常类型为 None
+        """
+        if value is None or value == '':
+            return 0, 'missing_hot_value'
+        if isinstance(value, bool):
+            return 0, 'invalid_hot_value'
+        anomaly = None
+        if isinstance(value, str):
+            try:
+                value = float(value.replace(',', '').strip())
+            except ValueError:
+                return 0, 'invalid_hot_value'
+            anomaly = 'coerced_hot_value'
+        elif not isinstance(value, (int, float)):
+            return 0, 'invalid_hot_value'
+        if not math.isfinite(value) or not 0 <= value <= self.max_hot_value:
+            return 0, 'hot_value_out_of_range'
+        return int(value), anomaly
+
+
+# 未配置 schema 的数据源使用的默认约定
+DEFAULT_SCHEMA = ItemSchema()
@@ -0,0 +1,242 @@
+"""
+抓取任务队列模块
+基于 SQLite 租约表分发 (数据源, 板块) 抓取任务，多个进程或容器共享同一个数据库文件领取任务，
+领取后在租约期内独占，进程崩溃时租约过期由其他 worker 接手
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    category TEXT NOT NULL,
+    due_at REAL NOT NULL,
+    round_id REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    done_round REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs(due_at);
+
+CREATE TABLE IF NOT EXISTS job_results (
+    job_key TEXT PRIMARY KEY,
+    round_id REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    owner TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+# 默认队列数据库路径
+DEFAULT_QUEUE_DB = os.getenv('JOB_QUEUE_DB', 'data/jobs.db')
+
+# 默认租约时长（秒），应大于单个任务的最长耗时
+DEFAULT_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '120'))
+
+# 单个任务最多尝试次数（租约过期视为一次失败尝试）
+MAX_ATTEMPTS = 3
+
+
+def job_key(source: str, category: str) -> str:
+    """任务键名：<数据源>:<板块>"""
+    return f"{source}:{category}"
+
+
+class JobQueue:
+    """SQLite 租约任务队列"""
+
+    def __init__(self, db_path: str = DEFAULT_QUEUE_DB):
+        """
+        打开（或创建）队列数据库
+
+        Args:
+            db_path: 数据库文件路径（多个容器共享时挂载到同一卷）
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._lock = threading.Lock()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def _transaction(self, func):
+        """在 BEGIN IMMEDIATE 事务中执行（写锁保证领取任务的原子性）"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = func(self._conn)
+                self._conn.execute('COMMIT')
+                return result
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def schedule(self, jobs: Iterable[Tuple[str, str]], round_id: Optional[float] = None) -> float:
+        """
+        开始新一轮：登记任务并全部设为立即可领取
+
+        Args:
+            jobs: (数据源, 板块) 列表
+            round_id: 轮次标识，默认为当前时间戳
+
+        Returns:
+            轮次标识
+        """
+        round_id = round_id if round_id is not None else time.time()
+        rows = [(job_key(source, category), source, category, round_id, round_id) for source, category in jobs]
+
+        def run(conn):
+            conn.executemany(
+                'INSERT INTO jobs(job_key, source, category, due_at, round_id) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(job_key) DO UPDATE SET due_at = excluded.due_at, round_id = excluded.round_id, '
+                'lease_owner = NULL, lease_expires = NULL, attempts = 0',
+                rows
+            )
+            # 配置中已移除的任务不再领取
+            keys = [row[0] for row in rows]
+            placeholders = ','.join('?' * len(keys)) or "''"
+            conn.execute(f'DELETE FROM jobs WHERE job_key NOT IN ({placeholders})', keys)
+
+        self._transaction(run)
+        logger.info("🗂️  新一轮任务: %s 个", len(rows))
+        return round_id
+
+    def claim(self, owner: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Dict]:
+        """
+        领取一个到期且未被占用（或租约已过期）的任务
+
+        Args:
+            owner: worker 标识
+            lease_seconds: 租约时长（秒）
+
+        Returns:
+            任务 {'job_key', 'source', 'category', 'round_id', 'attempts'}，没有可领取的任务时返回 None
+        """
+        def run(conn):
+            now = time.time()
+            row = conn.execute(
+                'SELECT job_key, source, category, round_id, attempts FROM jobs '
+                'WHERE due_at <= ? AND (done_round IS NULL OR done_round < round_id) '
+                'AND (lease_owner IS NULL OR lease_expires < ?) AND attempts < ? '
+                'ORDER BY due_at LIMIT 1',
+                (now, now, MAX_ATTEMPTS)
+            ).fetchone()
+            if row is None:
+                return None
+            key, source, category, round_id, attempts = row
+            conn.execute(
+                'UPDATE jobs SET lease_owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE job_key = ?',
+                (owner, now + lease_seconds, key)
+            )
+            return {
+                'job_key': key,
+                'source': source,
+                'category': category,
+                'round_id': round_id,
+                'attempts': attempts + 1,
+            }
+
+        return self._transaction(run)
+
+    def complete(self, job: Dict, owner: str, status: str, payload: Dict) -> bool:
+        """
+        提交任务结果并释放租约
+
+        Args:
+            job: claim 返回的任务
+            owner: worker 标识
+            status: 'ok' 或 'error'
+            payload: 结果数据（JSON 可序列化）
+
+        Returns:
+            是否提交成功（租约已被其他 worker 接手时返回 False）
+        """
+        def run(conn):
+            updated = conn.execute(
+                'UPDATE jobs SET lease_owner = NULL, lease_expires = NULL, done_round = round_id '
+                'WHERE job_key = ? AND lease_owner = ? AND round_id = ?',
+                (job['job_key'], owner, job['round_id'])
+            ).rowcount
+            if not updated:
+                return False
+            conn.execute(
+                'INSERT OR REPLACE INTO job_results(job_key, round_id, finished_at, owner, status, payload) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (job['job_key'], job['round_id'], time.time(), owner, status,
+                 json.dumps(payload, ensure_ascii=False))
+            )
+            return True
+
+        accepted = self._transaction(run)
+        if not accepted:
+            logger.warning("任务 %s 的租约已失效，结果被丢弃", job['job_key'])
+        return accepted
+
+    def release(self, job: Dict, owner: str):
+        """放弃租约（任务失败时调用，便于其他 worker 重试）"""
+        def run(conn):
+            conn.execute(
+                'UPDATE jobs SET lease_owner = NULL, lease_expires = NULL WHERE job_key = ? AND lease_owner = ?',
+                (job['job_key'], owner)
+            )
+
+        self._transaction(run)
+
+    def pending(self, round_id: float) -> int:
+        """
+        统计本轮尚未完成且仍可重试的任务数
+
+        Args:
+            round_id: 轮次标识
+
+        Returns:
+            未完成任务数
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT COUNT(*) FROM jobs WHERE round_id = ? AND (done_round IS NULL OR done_round < round_id) '
+                'AND (attempts < ? OR (lease_owner IS NOT NULL AND lease_expires >= ?))',
+                (round_id, MAX_ATTEMPTS, time.time())
+            ).fetchone()
+        return row[0]
+
+    def results(self, round_id: float) -> List[Dict]:
+        """
+        读取本轮的任务结果
+
+        Args:
+            round_id: 轮次标识
+
+        Returns:
+            [{'job_key', 'owner', 'status', 'finished_at', 'payload'}, ...]
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT job_key, owner, status, finished_at, payload FROM job_results '
+                'WHERE round_id = ? ORDER BY job_key',
+                (round_id,)
+            ).fetchall()
+        return [
+            {'job_key': key, 'owner': owner, 'status': status, 'finished_at': finished_at,
+             'payload': json.loads(payload)}
+            for key, owner, status, finished_at, payload in rows
+        ]
@@ -0,0 +1,153 @@
+"""
+最近一次成功数据缓存（last-known-good）
+每次真实抓取成功后按 数据源 x 板块 保存，所有 API 都失败时返回缓存数据并标注时效，
+常驻进程中同时在后台继续重试（单次运行的脚本退出时后台线程会被直接终止，因此不重试）；
+缓存超过最大时效后不再使用，由调用方发出错误通知
+"""
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 缓存目录
+DEFAULT_CACHE_DIR = os.getenv('LKG_CACHE_DIR', '.cache/last_known_good')
+
+# 缓存最大时效（小时），超过后视为没有缓存
+DEFAULT_MAX_STALENESS = float(os.getenv('LKG_MAX_STALENESS_HOURS', '6')) * 3600
+
+# 后台重试的等待间隔（秒），依次使用，最后一个间隔重复直到达到重试次数
+REVALIDATE_DELAYS = (15, 30, 60, 120, 300)
+REVALIDATE_ATTEMPTS = int(os.getenv('LKG_REVALIDATE_ATTEMPTS', '8'))
+
+
+def format_age(seconds: float) -> str:
+    """将秒数格式化为"N 分钟"/"N 小时"等中文描述"""
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return "不到 1 分钟"
+    if minutes < 60:
+        return f"{minutes} 分钟"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} 小时 {minutes} 分钟" if minutes else f"{hours} 小时"
+
+
+class LastKnownGoodCache:
+    """按 数据源 x 板块 保存的最近一次成功数据"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_staleness: float = DEFAULT_MAX_STALENESS):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_staleness: 最大时效（秒）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_staleness = max_staleness
+        self._revalidating = set()
+        self._lock = threading.Lock()
+        # 是否在后台重试，只有常驻进程（main.py、常驻 worker）开启
+        self.background_revalidate = False
+
+    def _path(self, source: str, category: str) -> Path:
+        return self.cache_dir / f"{source}.{category}.json"
+
+    def save(self, source: str, source_name: str, category: str, hot_list: List[Dict]):
+        """
+        保存一次成功抓取的结果
+
+        Args:
+            source: 数据源键名
+            source_name: 数据源名称
+            category: 板块键名
+            hot_list: 热榜数据
+        """
+        entry = {
+            'saved_at': time.time(),
+            'source': source,
+            'source_name': source_name,
+            'category': category,
+            'hot_list': hot_list,
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(source, category)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("保存最近成功数据失败: %s", e)
+
+    def load(self, sources: Iterable[str], category: str) -> Optional[Dict]:
+        """
+        读取指定数据源中最新且未超过最大时效的缓存
+
+        Args:
+            sources: 候选数据源键名
+            category: 板块键名
+
+        Returns:
+            缓存条目（附带 'age' 秒数），没有可用缓存时返回 None
+        """
+        best = None
+        for source in sources:
+            try:
+                entry = json.loads(self._path(source, category).read_text(encoding='utf-8'))
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                logger.warning("读取最近成功数据失败 (%s/%s): %s", source, category, e)
+                continue
+            if best is None or entry['saved_at'] > best['saved_at']:
+                best = entry
+
+        if best is None:
+            return None
+        best['age'] = max(0.0, time.time() - best['saved_at'])
+        if best['age'] > self.max_staleness:
+            logger.error("❌ 最近成功数据已过期（%s前），不再使用", format_age(best['age']))
+            return None
+        return best
+
+    def revalidate(self, key: str, fetch: Callable[[], bool]):
+        """
+        在后台线程中重试抓取，直到成功或达到重试次数（同一 key 同时只有一个重试线程）
+
+        Args:
+            key: 重试任务标识（数据源 x 板块）
+            fetch: 抓取函数，成功时返回 True（成功的结果由抓取器自己写入缓存）
+        """
+        if not self.background_revalidate:
+            # 单次运行的进程很快退出，后台线程来不及完成，下一次运行会重新抓取
+            logger.debug("未开启后台重试，跳过: %s", key)
+            return
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def run():
+            try:
+                for attempt in range(REVALIDATE_ATTEMPTS):
+                    time.sleep(REVALIDATE_DELAYS[min(attempt, len(REVALIDATE_DELAYS) - 1)])
+                    try:
+                        if fetch():
+                            logger.info("🔄 后台重试成功，已更新最近成功数据: %s", key)
+                            return
+                    except Exception as e:
+                        logger.warning("后台重试失败 (%s): %s", key, e)
+                logger.warning("后台重试 %s 次仍失败: %s", REVALIDATE_ATTEMPTS, key)
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=run, name=f"revalidate-{key}", daemon=True).start()
+
+
+# 进程内共享的缓存
+LKG_CACHE = LastKnownGoodCache()
@@ -0,0 +1,47 @@
+"""
+延迟导入工具
+模块在第一次访问属性时才真正导入，缩短单次运行脚本的启动时间
+"""
+import importlib
+from types import ModuleType
+
+
+class LazyModule:
+    """
+    模块代理，首次访问属性时才导入真实模块
+
+    不使用 importlib.util.LazyLoader：它在 Python 3.11 及更早版本中
+    多线程并发首次访问时可能拿到未初始化完成的模块。
+    importlib.import_module 自带按模块的导入锁，这里可以安全并发。
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self) -> ModuleType:
+        module = self._module
+        if module is None:
+            module = importlib.import_module(self._name)
+            self._module = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    延迟导入模块
+
+    Args:
+        name: 模块名，如 'requests'
+
+    Returns:
+        模块代理（首次访问属性时才导入）
+    """
+    return LazyModule(name)
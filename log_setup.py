@@ -0,0 +1,75 @@
+"""
+日志配置模块
+支持通过队列在后台线程写日志，避免磁盘 I/O 阻塞抓取和推送流程
+"""
+import os
+import sys
+import queue
+import atexit
+import logging
+import logging.handlers
+from typing import List, Optional
+
+DEFAULT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# 当前生效的后台日志监听器（重复配置时先停止旧的）
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """读取布尔型环境变量"""
+    value = os.getenv(name, '').strip().lower()
+    if not value:
+        return default
+    return value in ('1', 'true', 'yes', 'on')
+
+
+def stop_logging():
+    """停止后台日志线程并刷新剩余日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(log_file: Optional[str] = None, stream=None, fmt: str = DEFAULT_FORMAT):
+    """
+    配置日志系统
+
+    日志级别由 LOG_LEVEL 指定；LOG_ASYNC 为真（默认）时，根 logger 只挂一个
+    QueueHandler，真正的输出（控制台、文件）由后台 QueueListener 线程完成。
+
+    Args:
+        log_file: 日志文件路径，为 None 时只输出到控制台
+        stream: 控制台输出流，默认 sys.stderr
+        fmt: 日志格式
+    """
+    global _listener
+
+    log_level = os.getenv('LOG_LEVEL', 'INFO')
+    formatter = logging.Formatter(fmt)
+
+    handlers: List[logging.Handler] = [logging.StreamHandler(stream or sys.stderr)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, log_level))
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    stop_logging()
+
+    if _env_flag('LOG_ASYNC', True):
+        log_queue = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in handlers:
+            root.addHandler(handler)
+
+
+# 进程退出前确保队列中的日志全部写出
+atexit.register(stop_logging)
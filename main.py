@@ -9,39 +9,75 @@ import schedule
 from datetime import datetime
 from dotenv import load_dotenv
 
+from alert_engine import run_alerts
 from douyin_scraper import DouyinScraper
 from feishu_notifier import FeishuNotifier
+from fingerprint import FINGERPRINTS
+from history_store import default_store, fetch_with_store
+from last_known_good import LKG_CACHE
 from config_loader import ConfigLoader
+from log_setup import setup_logging
+from metrics import start_metrics_server
+from snapshot_ring import RECENT_SNAPSHOTS
+from tracing import traced
 
 
 # 配置日志
 def setup_logger():
-    """配置日志系统"""
-    log_level = os.getenv('LOG_LEVEL', 'INFO')
-    logging.basicConfig(
-        level=getattr(logging, log_level),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler('douyin_hot_scraper.log', encoding='utf-8')
-        ]
-    )
+    """配置日志系统（文件写入在后台线程完成）"""
+    setup_logging(log_file='douyin_hot_scraper.log')
 
 
 logger = logging.getLogger(__name__)
 
+# 关注提醒检查的热榜条数
+ALERT_POOL_LIMIT = 50
 
-def scrape_and_send(config_loader=None):
-    """抓取热榜并发送到飞书群"""
+
+def record_recent(hot_list, scraper, category):
+    """
+    将实时抓取结果记入内存中的最近快照（缓存数据不记录），并输出排名变化和内存占用
+
+    Args:
+        hot_list: 热榜数据
+        scraper: 抓取器
+        category: 板块键名
+    """
+    if scraper.stale_seconds is not None:
+        return
+    ring = RECENT_SNAPSHOTS.record(hot_list, scraper.current_source_key, category)
+    if len(ring) > 1:
+        deltas = ring.rank_deltas()
+        entered = sum(1 for delta in deltas.values() if delta is None)
+        risers = sorted(((delta, word) for word, delta in deltas.items() if delta), reverse=True)
+        logger.info("📈 与上次相比: 新上榜 %s 条%s", entered,
+                    f"，上升最多: {risers[0][1]}（+{risers[0][0]}）" if risers and risers[0][0] > 0 else "")
+    stats = RECENT_SNAPSHOTS.stats()
+    logger.info("🧠 最近快照: %s 个榜单, %s 次抓取, 占用 %.1f KB",
+                stats['boards'], stats['snapshots'], stats['bytes'] / 1024)
+
+
+@traced('scrape_and_send')
+def scrape_and_send(config_loader=None, webhook_url=None):
+    """
+    抓取热榜并发送到飞书群
+
+    Args:
+        config_loader: 配置加载器，为 None 时新建
+        webhook_url: 飞书 Webhook URL，为 None 时读取 FEISHU_WEBHOOK_URL
+
+    Returns:
+        是否发送成功
+    """
     try:
         logger.info("=" * 50)
         logger.info("开始执行热榜抓取任务")
 
         # 获取环境变量
-        webhook_url = os.getenv('FEISHU_WEBHOOK_URL')
+        webhook_url = webhook_url or os.getenv('FEISHU_WEBHOOK_URL')
         if not webhook_url:
             logger.error("未配置 FEISHU_WEBHOOK_URL，请检查 .env 文件")
-            return
+            return False
 
         # 使用传入的配置或创建新的
         if not config_loader:
@@ -60,17 +96,23 @@ def scrape_and_send(config_loader=None):
         notifier = FeishuNotifier(webhook_url)
 
         # 抓取热榜
-        hot_list = scraper.fetch_hot_list(limit=limit, category=category)
+        hot_list = fetch_with_store(scraper, limit, category, store=default_store())
 
         if not hot_list:
             logger.error("未能获取热榜数据")
             # 发送错误通知
             notifier.send_text_message("⚠️ 抖音热榜抓取失败，请检查服务状态")
-            return
+            return False
 
         # 检查是否使用了测试数据
         if scraper.is_using_test_data:
             logger.warning("⚠️  注意：当前使用的是测试数据，抖音 API 可能无法访问")
+        else:
+            record_recent(hot_list, scraper, category)
+
+        # 关注提醒（未启用时不做任何事）
+        run_alerts(config_loader, hot_list, scraper.current_source_name, webhook_url,
+                   scraper.is_using_test_data or scraper.stale_seconds is not None)
 
         # 发送到飞书
         # 如果使用测试数据，直接发送文本消息
@@ -93,9 +135,58 @@ def scrape_and_send(config_loader=None):
 
         logger.info("热榜抓取任务完成")
         logger.info("=" * 50)
+        return success
 
     except Exception as e:
         logger.error(f"执行任务时发生错误: {e}", exc_info=True)
+        return False
+    finally:
+        # 渲染缓存每轮写回一次
+        FINGERPRINTS.save()
+
+
+@traced('alert_poll')
+def alert_poll(config_loader, webhook_url=None):
+    """
+    单独检查关注提醒（比定时推送更频繁，尽早发现关注的话题）
+
+    Args:
+        config_loader: 配置加载器
+        webhook_url: 默认飞书 Webhook URL
+    """
+    try:
+        scraper = DouyinScraper(config_loader)
+        # 提醒检查全量热榜，不按板块过滤
+        hot_list = fetch_with_store(scraper, ALERT_POOL_LIMIT, 'all', store=default_store(), max_age=60)
+        run_alerts(config_loader, hot_list, scraper.current_source_name, webhook_url,
+                   scraper.is_using_test_data or scraper.stale_seconds is not None)
+    except Exception as e:
+        logger.error(f"检查关注提醒时发生错误: {e}", exc_info=True)
+
+
+# 上一次检查关注提醒的时间（time.monotonic），None 表示尚未检查
+_last_alert_poll = None
+
+
+def alert_tick(config_loader, webhook_url=None):
+    """
+    每分钟调用一次：按当前配置（支持热加载开启 / 关闭提醒和修改间隔）判断是否到了检查关注提醒的时间
+
+    Args:
+        config_loader: 配置加载器
+        webhook_url: 默认飞书 Webhook URL
+    """
+    global _last_alert_poll
+    alert_config = config_loader.get_alert_config()
+    alert_minutes = int(alert_config.get('poll_minutes', 0) or 0)
+    if not alert_config.get('enabled', False) or alert_minutes <= 0:
+        return
+    now = time.monotonic()
+    # 留几秒余量，避免调度抖动导致整整错过一个周期
+    if _last_alert_poll is not None and now - _last_alert_poll < alert_minutes * 60 - 5:
+        return
+    _last_alert_poll = now
+    alert_poll(config_loader, webhook_url)
 
 
 def main():
@@ -111,6 +202,9 @@ def main():
     # 加载配置
     config_loader = ConfigLoader()
 
+    # 常驻进程：返回缓存数据后在后台继续重试
+    LKG_CACHE.background_revalidate = True
+
     # 获取配置
     interval_hours = int(os.getenv('SCRAPE_INTERVAL_HOURS', '1'))
     webhook_url = os.getenv('FEISHU_WEBHOOK_URL')
@@ -131,6 +225,16 @@ def main():
     logger.info(f"   - 启用板块: {', '.join([c.get('name', k) for k, c in enabled_categories.items()])}")
     logger.info(f"   - Webhook: {webhook_url[:50]}...")
 
+    # 配置热加载（修改 config.yaml 无需重启）
+    watch_interval = float(os.getenv('CONFIG_WATCH_INTERVAL', '5'))
+    if watch_interval > 0:
+        config_loader.start_watching(watch_interval)
+
+    # 启动指标服务（可选）
+    metrics_port = os.getenv('METRICS_PORT', '').strip()
+    if metrics_port:
+        start_metrics_server(int(metrics_port))
+
     # 立即执行一次
     logger.info("🔄 立即执行首次抓取...")
     scrape_and_send(config_loader)
@@ -139,6 +243,12 @@ def main():
     logger.info(f"⏰ 设置定时任务: 每 {interval_hours} 小时执行一次")
     schedule.every(interval_hours).hours.do(scrape_and_send, config_loader)
 
+    # 关注提醒单独按分钟检查：始终调度，是否启用和检查间隔每次按当前配置判断（热加载开启提醒后无需重启）
+    alert_config = config_loader.get_alert_config()
+    if alert_config.get('enabled', False) and int(alert_config.get('poll_minutes', 0) or 0) > 0:
+        logger.info(f"🚨 关注提醒: 每 {alert_config['poll_minutes']} 分钟检查一次")
+    schedule.every(1).minutes.do(alert_tick, config_loader, webhook_url)
+
     # 循环执行
     logger.info("✅ 服务运行中，按 Ctrl+C 退出")
 
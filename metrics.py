@@ -0,0 +1,343 @@
+"""
+指标统计模块
+提供计数器和直方图，支持导出为 Prometheus 文本格式和 JSON
+"""
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 默认耗时分桶（秒），覆盖本地解析的毫秒级到慢接口的十秒级
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape_label(value: str) -> str:
+    """转义 Prometheus 标签值"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    """格式化标签为 {a="1",b="2"} 形式"""
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape_label(extra[1])}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value: float) -> str:
+    """格式化数值（整数不带小数点）"""
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """单调递增计数器"""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        """
+        增加计数
+
+        Args:
+            amount: 增加量
+            **labels: 标签值（需与 labelnames 一致）
+        """
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        """获取指定标签的当前值"""
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def render(self) -> List[str]:
+        """渲染为 Prometheus 文本行"""
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+            for key, value in items
+        ]
+
+    def to_dict(self) -> Dict:
+        """导出为 JSON 友好的字典"""
+        with self._lock:
+            items = sorted(self._values.items())
+        return {
+            'type': self.type_name,
+            'help': self.documentation,
+            'samples': [
+                {'labels': dict(zip(self.labelnames, key)), 'value': value}
+                for key, value in items
+            ],
+        }
+
+
+class Gauge(Counter):
+    """可任意设置的当前值"""
+
+    type_name = 'gauge'
+
+    def set(self, value: float, **labels):
+        """
+        设置当前值
+
+        Args:
+            value: 当前值
+            **labels: 标签值（需与 labelnames 一致）
+        """
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    """累积分桶直方图"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各桶计数..., 总和, 总数]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        """
+        记录一次观测值
+
+        Args:
+            value: 观测值（耗时为秒）
+            **labels: 标签值
+        """
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [0] * (len(self.buckets) + 2)
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """计时上下文管理器，退出时记录耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        """渲染为 Prometheus 文本行"""
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ('le', _format_number(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, ('le', '+Inf'))
+            lines.append(f"{self.name}_bucket{labels} {state[-1]}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+    def to_dict(self) -> Dict:
+        """导出为 JSON 友好的字典"""
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        return {
+            'type': self.type_name,
+            'help': self.documentation,
+            'buckets': list(self.buckets),
+            'samples': [
+                {
+                    'labels': dict(zip(self.labelnames, key)),
+                    'bucket_counts': state[:-2],
+                    'sum': state[-2],
+                    'count': state[-1],
+                }
+                for key, state in items
+            ],
+        }
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """注册（或获取已存在的）计数器"""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """注册（或获取已存在的）仪表"""
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """注册（或获取已存在的）直方图"""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render_prometheus(self) -> str:
+        """
+        导出为 Prometheus 文本格式
+
+        Returns:
+            text/plain; version=0.0.4 格式的文本
+        """
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def to_dict(self) -> Dict:
+        """导出所有指标为字典"""
+        return {name: metric.to_dict() for name, metric in list(self._metrics.items())}
+
+    def dump_json(self, path: str):
+        """
+        将所有指标写入 JSON 文件
+
+        Args:
+            path: 输出文件路径
+        """
+        data = {
+            'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'metrics': self.to_dict(),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        logger.info("📈 指标已导出到: %s", path)
+
+
+# 全局注册表
+REGISTRY = MetricsRegistry()
+
+# 抓取阶段
+FETCH_SECONDS = REGISTRY.histogram(
+    'douyin_fetch_seconds', '单个热榜 API 请求耗时（秒）', ['endpoint'])
+PARSE_SECONDS = REGISTRY.histogram(
+    'douyin_parse_seconds', '热榜响应解析耗时（秒）', ['endpoint'])
+FILTER_SECONDS = REGISTRY.histogram(
+    'douyin_filter_seconds', '板块关键词过滤耗时（秒）', ['category'])
+ENDPOINT_FAILURES = REGISTRY.counter(
+    'douyin_endpoint_failures_total', '热榜 API 失败次数', ['endpoint', 'reason'])
+TEST_DATA_FALLBACKS = REGISTRY.counter(
+    'douyin_test_data_fallbacks_total', '所有 API 失败后回退到测试数据的次数')
+STALE_FALLBACKS = REGISTRY.counter(
+    'douyin_stale_fallbacks_total', '所有 API 失败后返回最近成功数据的次数')
+HEDGED_REQUESTS = REGISTRY.counter(
+    'douyin_hedged_requests_total', '前一个 API 超过预期延迟后发出的对冲请求次数', ['endpoint'])
+ITEM_REJECTS = REGISTRY.counter(
+    'douyin_item_rejects_total', '校验时丢弃的热榜条目数', ['endpoint', 'reason'])
+ITEM_ANOMALIES = REGISTRY.counter(
+    'douyin_item_anomalies_total', '校验时修正并标记的热榜条目数', ['endpoint', 'kind'])
+COALESCED_FETCHES = REGISTRY.counter(
+    'douyin_coalesced_fetches_total', '与其他请求合并、未单独请求上游的抓取次数', ['kind'])
+IDENTITY_REQUESTS = REGISTRY.counter(
+    'douyin_identity_requests_total', '按请求身份统计的请求结果', ['identity', 'outcome'])
+
+# 渲染与推送阶段
+RENDER_SECONDS = REGISTRY.histogram(
+    'hot_list_render_seconds', '热榜消息渲染耗时（秒）', ['kind'])
+WEBHOOK_POST_SECONDS = REGISTRY.histogram(
+    'feishu_webhook_post_seconds', '飞书 Webhook 请求耗时（秒）', ['msg_type'])
+WEBHOOK_FAILURES = REGISTRY.counter(
+    'feishu_webhook_failures_total', '飞书消息发送失败次数', ['msg_type'])
+
+# 常驻进程内存
+RECENT_SNAPSHOT_BYTES = REGISTRY.gauge(
+    'recent_snapshot_bytes', '内存中最近快照环形缓冲区占用的字节数', ['source', 'category'])
+
+# 流量
+BYTES_TRANSFERRED = REGISTRY.counter(
+    'bytes_transferred_total', '网络传输字节数', ['target', 'direction'])
+
+
+def start_metrics_server(port: int, host: str = '0.0.0.0', registry: MetricsRegistry = REGISTRY):
+    """
+    在后台线程启动 /metrics 服务
+
+    Args:
+        port: 监听端口
+        host: 监听地址
+        registry: 要导出的指标注册表
+
+    Returns:
+        HTTP 服务器实例
+    """
+    # http.server 只有常驻进程需要，延迟导入以免拖慢单次运行的启动
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """/metrics 请求处理器"""
+
+        def log_message(self, format, *args):
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            if path == '/metrics':
+                body = registry.render_prometheus().encode('utf-8')
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            elif path == '/metrics.json':
+                body = json.dumps(registry.to_dict(), ensure_ascii=False).encode('utf-8')
+                content_type = 'application/json; charset=utf-8'
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    logger.info("📈 指标服务已启动: http://%s:%s/metrics", host, server.server_address[1])
+    return server
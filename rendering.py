@@ -0,0 +1,102 @@
+"""
+热榜条目渲染模块
+文本消息和飞书卡片共用的热度格式化（亿 / 万）、排名图标和单条渲染，
+单条渲染结果按 (词条, 标签, 热度分桶, 排名, 显示选项) 做 LRU 缓存，
+多个 webhook / 板块推送相同条目时直接复用已渲染的片段
+"""
+import os
+from functools import lru_cache
+from typing import Dict
+
+# 单条渲染缓存的最大条目数
+RENDER_CACHE_SIZE = int(os.getenv('RENDER_CACHE_SIZE', '4096'))
+
+# 前三名的排名图标
+RANK_ICONS = {1: "🥇", 2: "🥈", 3: "🥉"}
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE, typed=True)
+def format_hot_value(hot_value) -> str:
+    """
+    格式化热度值（亿 / 万保留一位小数），也是热度的分桶：同一分桶的展示结果相同。
+    同一轮中指纹、文本、卡片会对同一批热度各格式化一次，因此同样做缓存
+
+    Args:
+        hot_value: 热度值
+
+    Returns:
+        格式化后的热度
+    """
+    value = hot_value or 0
+    if not isinstance(value, (int, float)):
+        return str(value)
+    if value >= 100000000:
+        return f"{value / 100000000:.1f}亿"
+    if value >= 10000:
+        return f"{value / 10000:.1f}万"
+    return str(value)
+
+
+def rank_icon(rank: int) -> str:
+    """排名图标（前三名为奖牌，其余为序号）"""
+    return RANK_ICONS.get(rank) or f"{rank}."
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _text_line(word: str, label: str, hot_bucket: str, rank: int, show_hot_value: bool, show_label: bool) -> str:
+    hot_str = f" 🔥{hot_bucket}" if show_hot_value and hot_bucket else ""
+    label_str = f" [{label}]" if show_label and label else ""
+    return f"{rank_icon(rank)} {word}{label_str}{hot_str}"
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _card_content(word: str, label: str, hot_bucket: str, rank: int) -> str:
+    label_str = f" [{label}]" if label else ""
+    return f"{rank_icon(rank)} {word}{label_str}\n🔥 热度: {hot_bucket}"
+
+
+def render_text_line(item: Dict, show_hot_value: bool = True, show_label: bool = True) -> str:
+    """
+    渲染文本消息中的一行
+
+    Args:
+        item: 热榜条目
+        show_hot_value: 是否显示热度
+        show_label: 是否显示标签
+
+    Returns:
+        文本行
+    """
+    hot_value = item.get('hot_value')
+    # 没有热度时不显示热度
+    hot_bucket = format_hot_value(hot_value) if hot_value else ''
+    return _text_line(item['word'], item.get('label', '') or '', hot_bucket, item['rank'],
+                      bool(show_hot_value), bool(show_label))
+
+
+def render_card_content(item: Dict) -> str:
+    """
+    渲染卡片中一个条目的文字内容
+
+    Args:
+        item: 热榜条目
+
+    Returns:
+        条目内容（两行：排名词条标签 / 热度）
+    """
+    return _card_content(item['word'], item.get('label', '') or '',
+                         format_hot_value(item.get('hot_value')), item['rank'])
+
+
+def render_cache_info() -> Dict[str, Dict[str, int]]:
+    """
+    单条渲染缓存的命中统计
+
+    Returns:
+        {'hot_value': {...}, 'text': {...}, 'card': {...}}，每项包含 hits / misses / maxsize / currsize
+    """
+    return {name: info._asdict() for name, info in (
+        ('hot_value', format_hot_value.cache_info()),
+        ('text', _text_line.cache_info()),
+        ('card', _card_content.cache_info()),
+    )}
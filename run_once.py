@@ -4,32 +4,89 @@
 """
 import os
 import sys
+import atexit
 import logging
 from datetime import datetime
+from typing import Dict, List
 
+from alert_engine import run_alerts
 from douyin_scraper import DouyinScraper
 from feishu_notifier import FeishuNotifier
+from history_store import default_store, fetch_with_store
 from config_loader import ConfigLoader
+from log_setup import setup_logging
+from metrics import REGISTRY
+from tracing import traced
 
 
 def setup_logger():
     """配置日志系统"""
-    log_level = os.getenv('LOG_LEVEL', 'INFO')
-    logging.basicConfig(
-        level=getattr(logging, log_level),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-        ]
-    )
+    setup_logging(stream=sys.stdout)
 
 
 logger = logging.getLogger(__name__)
 
 
+def dump_metrics():
+    """退出时导出本次运行的指标（路径由 METRICS_JSON_PATH 指定，留空则不导出）"""
+    metrics_path = os.getenv('METRICS_JSON_PATH', 'metrics.json').strip()
+    if not metrics_path:
+        return
+    try:
+        REGISTRY.dump_json(metrics_path)
+    except Exception as e:
+        logger.warning(f"导出指标失败: {e}")
+
+
+def send_hot_list(config_loader: ConfigLoader, notifier: FeishuNotifier, scraper: DouyinScraper,
+                  hot_list: List[Dict], category: str, webhook_url: str) -> bool:
+    """
+    推送一个板块的热榜：关注提醒、日志预览、交互式卡片（失败时回退为文本消息）
+
+    Args:
+        config_loader: 配置加载器
+        notifier: 飞书通知器
+        scraper: 抓取该热榜的抓取器（提供数据源名称和测试数据标记）
+        hot_list: 热榜数据
+        category: 板块键名
+        webhook_url: 默认 webhook 地址（关注提醒使用）
+
+    Returns:
+        是否发送成功
+    """
+    # 关注提醒（未启用时不做任何事）
+    run_alerts(config_loader, hot_list, scraper.current_source_name, webhook_url,
+               scraper.is_using_test_data or scraper.stale_seconds is not None)
+
+    # 打印前3条热榜（用于日志查看）
+    logger.info("📌 热榜前3名:")
+    for item in hot_list[:3]:
+        logger.info(f"  {item['rank']}. {item['word']} - 热度: {item['hot_value']}")
+
+    # 发送到飞书
+    logger.info("📤 开始发送消息到飞书...")
+
+    # 如果使用测试数据，直接发送文本消息
+    if scraper.is_using_test_data:
+        text_content = scraper.format_hot_list_text(hot_list, is_test_data=True, category=category)
+        success = notifier.send_text_message(text_content)
+    else:
+        # 优先使用交互式卡片，失败则使用文本消息
+        success = notifier.send_interactive_message(hot_list, source_name=scraper.current_source_name)
+
+        if not success:
+            logger.warning("⚠️  交互式卡片发送失败，尝试使用文本消息")
+            text_content = scraper.format_hot_list_text(hot_list, is_test_data=False, category=category)
+            success = notifier.send_text_message(text_content)
+
+    return success
+
+
+@traced('run_once')
 def main():
     """主函数 - 执行一次抓取和推送"""
     setup_logger()
+    atexit.register(dump_metrics)
 
     logger.info("=" * 60)
     logger.info("🚀 开始执行抖音热榜抓取任务")
@@ -61,7 +118,7 @@ def main():
         logger.info(f"📊 开始抓取热榜 (板块: {category}, Top {limit})...")
 
         # 抓取热榜
-        hot_list = scraper.fetch_hot_list(limit=limit, category=category)
+        hot_list = fetch_with_store(scraper, limit, category, store=default_store())
 
         if not hot_list:
             logger.error("❌ 未能获取热榜数据")
@@ -75,26 +132,7 @@ def main():
         if scraper.is_using_test_data:
             logger.warning("⚠️  注意：当前使用的是测试数据，抖音 API 可能无法访问")
 
-        # 打印前3条热榜（用于日志查看）
-        logger.info("📌 热榜前3名:")
-        for item in hot_list[:3]:
-            logger.info(f"  {item['rank']}. {item['word']} - 热度: {item['hot_value']}")
-
-        # 发送到飞书
-        logger.info("📤 开始发送消息到飞书...")
-
-        # 如果使用测试数据，直接发送文本消息
-        if scraper.is_using_test_data:
-            text_content = scraper.format_hot_list_text(hot_list, is_test_data=True, category=category)
-            success = notifier.send_text_message(text_content)
-        else:
-            # 优先使用交互式卡片，失败则使用文本消息
-            success = notifier.send_interactive_message(hot_list, source_name=scraper.current_source_name)
-
-            if not success:
-                logger.warning("⚠️  交互式卡片发送失败，尝试使用文本消息")
-                text_content = scraper.format_hot_list_text(hot_list, is_test_data=False, category=category)
-                success = notifier.send_text_message(text_content)
+        success = send_hot_list(config_loader, notifier, scraper, hot_list, category, webhook_url)
 
         if success:
             logger.info("✅ 消息发送成功")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+启动耗时检查
+测量 run_once.py 从导入到即将发出第一个网络请求之前的耗时，超出预算时返回非零退出码
+
+用法:
+    python scripts/check_startup.py --budget-ms 100
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+project_root = Path(__file__).parent.parent
+
+# 在子进程中执行：导入入口模块、加载配置、创建抓取器，直到第一次网络请求之前
+PROBE = """
+import time
+start = time.perf_counter()
+import run_once
+from config_loader import ConfigLoader
+from douyin_scraper import DouyinScraper
+from feishu_notifier import FeishuNotifier
+scraper = DouyinScraper(ConfigLoader())
+FeishuNotifier('http://127.0.0.1/')
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def run_probe(env: Dict[str, str]) -> float:
+    """
+    运行一次启动探测
+
+    Returns:
+        启动耗时（毫秒）
+    """
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=project_root,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def import_breakdown(env: Dict[str, str], top: int) -> List[str]:
+    """
+    使用 -X importtime 统计导入耗时最高的模块
+
+    Args:
+        env: 子进程环境变量
+        top: 返回的条目数
+
+    Returns:
+        格式化后的统计行
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import run_once'],
+        cwd=project_root,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+
+    rows.sort(reverse=True)
+    return [f"{cumulative / 1000:8.1f} ms {self_us / 1000:8.1f} ms  {name}" for cumulative, self_us, name in rows[:top]]
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='检查 run_once.py 启动耗时')
+    parser.add_argument('--budget-ms', type=float, default=100, help='启动耗时预算（毫秒）')
+    parser.add_argument('--runs', type=int, default=5, help='测量次数（取中位数）')
+    parser.add_argument('--top', type=int, default=15, help='显示导入耗时最高的模块数量')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('LOG_ASYNC', 'true')
+
+    # 第一次运行会生成字节码和配置缓存，不计入统计
+    run_probe(env)
+    samples = [run_probe(env) for _ in range(max(1, args.runs))]
+    median = statistics.median(samples)
+
+    print("导入耗时（累计 / 自身）:")
+    for line in import_breakdown(env, args.top):
+        print(f"  {line}")
+
+    print(f"\n启动耗时: 中位数 {median:.1f} ms, 最小 {min(samples):.1f} ms, 最大 {max(samples):.1f} ms")
+    print(f"预算: {args.budget_ms:.0f} ms")
+
+    if median > args.budget_ms:
+        print("❌ 启动耗时超出预算")
+        return 1
+
+    print("✅ 启动耗时在预算内")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+热榜历史导出为 Parquet（按 date / source 分区，供 pandas / DuckDB 分析）
+增量导出：只重写新增或有变化的日期，需要安装 pyarrow
+
+用法:
+    python scripts/export_parquet.py                    # 增量导出到 data/parquet
+    python scripts/export_parquet.py --full             # 重新导出全部日期
+    python scripts/export_parquet.py --output /tmp/hot  # 指定导出目录
+
+读取示例:
+    pandas.read_parquet('data/parquet')
+    duckdb.sql("SELECT * FROM read_parquet('data/parquet/*/*/*.parquet', hive_partitioning = true)")
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from columnar_export import ParquetExporter, pyarrow_available
+from trend_archive import TrendArchive
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='热榜历史导出为 Parquet')
+    parser.add_argument('--history-dir', default=os.getenv('HISTORY_DIR') or str(project_root / 'data' / 'history'),
+                        help='归档目录')
+    parser.add_argument('--output', default=os.getenv('PARQUET_EXPORT_DIR') or str(project_root / 'data' / 'parquet'),
+                        help='导出目录')
+    parser.add_argument('--full', action='store_true', help='忽略导出状态，重新导出全部日期')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    if not pyarrow_available():
+        logger.error("❌ 未安装 pyarrow，请先执行: pip install pyarrow")
+        return 1
+
+    exporter = ParquetExporter(TrendArchive(args.history_dir), args.output)
+    start = time.perf_counter()
+    summary = exporter.export(full=args.full)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"✅ 导出 {summary['days']} 天（{summary['partitions']} 个分区, {summary['rows']} 行），"
+          f"未变化跳过 {summary['skipped']} 天")
+    print(f"📁 {exporter.output_dir}")
+    print(f"\n⏱️  耗时: {elapsed_ms:.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
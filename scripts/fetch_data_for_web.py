@@ -1,13 +1,12 @@
 #!/usr/bin/env python3
 """
-抓取热榜数据并保存为 JSON 文件，供网页展示使用
+抓取热榜数据并按 板块 x 数据源 发布为分片 JSON，供网页展示使用
 """
 import os
 import sys
-import json
 import logging
-from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional
 
 # 添加项目根目录到 Python 路径
 project_root = Path(__file__).parent.parent
@@ -15,6 +14,11 @@ sys.path.insert(0, str(project_root))
 
 from config_loader import ConfigLoader
 from douyin_scraper import DouyinScraper
+from fingerprint import content_fingerprint
+from history_store import HotListStore, default_store, fetch_with_store
+from trend_archive import TrendArchive
+from trend_score import numpy_available
+from web_publisher import WebPublisher, board_key
 
 # 配置日志
 logging.basicConfig(
@@ -23,6 +27,254 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 每个板块展示的条数
+BOARD_LIMIT = 20
+
+# 每个数据源抓取的候选条数（板块从中过滤）
+POOL_LIMIT = 50
+
+# 跨数据源趋势榜统计的时间窗口（小时）
+TRENDING_HOURS = 24
+
+
+def fetch_pool(config_loader: ConfigLoader, source: str, store: Optional[HotListStore] = None) -> Optional[Dict]:
+    """
+    抓取一个数据源的候选数据
+
+    Args:
+        config_loader: 配置加载器
+        source: 数据源键名
+        store: SQLite 历史存储，传入时写入真实数据
+
+    Returns:
+        {'source', 'source_name', 'is_test_data', 'stale_seconds', 'pool', 'scraper'}，未获取到数据时返回 None
+    """
+    scraper = DouyinScraper(config_loader, source=source)
+    # 网页数据每次都重新抓取，结果写入历史存储供推送流程复用
+    pool = fetch_with_store(scraper, POOL_LIMIT, 'all', store=store, max_age=0)
+    if not pool:
+        logger.warning("⚠️  数据源 %s 未获取到数据", source)
+        return None
+
+    logger.info("✅ %s: 获取 %s 条候选数据", scraper.current_source_name, len(pool))
+    return {
+        'source': 'test' if scraper.is_using_test_data else scraper.current_source_key,
+        'source_name': scraper.current_source_name,
+        'is_test_data': scraper.is_using_test_data,
+        'stale_seconds': scraper.stale_seconds,
+        'pool': pool,
+        # 推送流程用它格式化文本消息
+        'scraper': scraper,
+    }
+
+
+def collect_pools(results: List[Optional[Dict]]) -> List[Dict]:
+    """
+    按数据源顺序整理抓取结果：跳过失败的数据源，测试数据与数据源无关，只保留第一份
+
+    Args:
+        results: 各数据源的 fetch_pool 结果
+
+    Returns:
+        候选数据列表
+    """
+    pools = []
+    for result in results:
+        if result is None:
+            continue
+        pools.append(result)
+        if result['is_test_data']:
+            break
+    return pools
+
+
+def fetch_pools(config_loader: ConfigLoader, store: Optional[HotListStore] = None) -> List[Dict]:
+    """
+    依次抓取每个启用的数据源（抓到测试数据后不再继续）
+
+    Args:
+        config_loader: 配置加载器
+        store: SQLite 历史存储
+
+    Returns:
+        候选数据列表
+    """
+    results = []
+    for source in config_loader.get_enabled_data_sources():
+        results.append(fetch_pool(config_loader, source, store))
+        if results[-1] is not None and results[-1]['is_test_data']:
+            break
+    return collect_pools(results)
+
+
+def archive_pools(archive: TrendArchive, pools: List[Dict]):
+    """
+    归档各数据源的真实数据（测试数据和最近成功数据（缓存）不归档）
+
+    Args:
+        archive: 历史归档
+        pools: 候选数据列表
+    """
+    for pool in pools:
+        if not pool['is_test_data'] and pool['stale_seconds'] is None:
+            archive.record(pool['pool'], pool['source'])
+
+
+def make_board(config_loader: ConfigLoader, pool: Dict, category: str, limit: int = BOARD_LIMIT) -> Dict:
+    """
+    从候选数据中过滤出一个板块的热榜
+
+    Args:
+        config_loader: 配置加载器
+        pool: 候选数据
+        category: 板块键名
+        limit: 条目数量
+
+    Returns:
+        热榜（分片）
+    """
+    items = pool['pool'] if category == 'all' else config_loader.filter_by_category(pool['pool'], category)
+    return {
+        'category': category,
+        'category_name': config_loader.get_category_name(category),
+        'source': pool['source'],
+        'source_name': pool['source_name'],
+        'is_test_data': pool['is_test_data'],
+        # 过滤后重新编号，保证每个分片的排名从 1 开始
+        'hot_list': [dict(item, rank=index) for index, item in enumerate(items[:limit], 1)],
+    }
+
+
+def boards_from_pools(config_loader: ConfigLoader, pools: List[Dict]) -> List[Dict]:
+    """
+    按启用的板块过滤每个数据源的候选数据
+
+    Args:
+        config_loader: 配置加载器
+        pools: 候选数据列表
+
+    Returns:
+        热榜列表（每项对应一个分片）
+    """
+    categories = [c for c in config_loader.get_enabled_categories() if c != 'all']
+    return [
+        make_board(config_loader, pool, category)
+        for pool in pools
+        for category in ['all'] + categories
+    ]
+
+
+def build_boards(config_loader: ConfigLoader, archive: Optional[TrendArchive] = None,
+                 store: Optional[HotListStore] = None) -> List[Dict]:
+    """
+    为每个启用的数据源抓取一次热榜，再按启用的板块过滤
+
+    Args:
+        config_loader: 配置加载器
+        archive: 历史归档，传入时归档每个数据源的真实数据
+        store: SQLite 历史存储，传入时写入每个数据源的真实数据
+
+    Returns:
+        热榜列表（每项对应一个分片）
+    """
+    pools = fetch_pools(config_loader, store)
+    if archive is not None:
+        archive_pools(archive, pools)
+    return boards_from_pools(config_loader, pools)
+
+
+def build_trending_board(archive: TrendArchive) -> Optional[Dict]:
+    """
+    根据归档快照生成跨数据源趋势榜（按趋势分排序，需要 numpy）
+
+    Args:
+        archive: 历史归档
+
+    Returns:
+        热榜（分片），没有 numpy 或没有历史数据时返回 None
+    """
+    if not numpy_available():
+        logger.info("未安装 numpy，跳过跨数据源趋势榜")
+        return None
+    rows = archive.trending(TRENDING_HOURS, BOARD_LIMIT)
+    if not rows:
+        return None
+    hot_list = [
+        {
+            'rank': index,
+            'word': row['word'],
+            'hot_value': row['hot_value'],
+            'label': row['label'],
+            'event_time': '',
+            'score': row['score'],
+        }
+        for index, row in enumerate(rows, 1)
+    ]
+    return {
+        'category': 'trending',
+        'category_name': '跨平台趋势',
+        'source': 'all',
+        'source_name': '综合趋势分',
+        'is_test_data': False,
+        'hot_list': hot_list,
+        # 趋势分和精确热度每次都会变化，按实际内容判断分片能否沿用
+        'fingerprint': content_fingerprint(hot_list),
+    }
+
+
+def current_words(boards: List[Dict]) -> Dict[str, List[str]]:
+    """
+    收集各数据源当前上榜的词条（综合榜在前，按排名去重）
+
+    Args:
+        boards: 热榜列表
+
+    Returns:
+        数据源键名 -> 词条列表
+    """
+    words_by_source: Dict[str, List[str]] = {}
+    for board in sorted(boards, key=lambda b: b['category'] != 'all'):
+        words = words_by_source.setdefault(board['source'], [])
+        for item in board['hot_list']:
+            if item['word'] not in words:
+                words.append(item['word'])
+    return words_by_source
+
+
+def publish_boards(archive: TrendArchive, boards: List[Dict], category: str = 'all') -> Dict:
+    """
+    追加迷你趋势图序列和跨数据源趋势榜后发布分片
+
+    Args:
+        archive: 历史归档（应已记录本次抓取）
+        boards: 热榜列表
+        category: 页面默认展示的板块
+
+    Returns:
+        WebPublisher.publish 的结果
+    """
+    default_key = next(
+        (board_key(b['category'], b['source']) for b in boards if b['category'] == category),
+        None
+    )
+
+    # 网页迷你趋势图使用的预聚合序列
+    series = archive.series.export(current_words(boards))
+
+    # 跨数据源趋势榜（没有对应的迷你趋势图序列）
+    trending = build_trending_board(archive)
+    if trending:
+        boards = boards + [trending]
+
+    publisher = WebPublisher(project_root / 'docs' / 'data')
+    result = publisher.publish(boards, default_key=default_key, extra={'series': series})
+
+    manifest = result['manifest']
+    total_bytes = sum(entry['bytes'] for entry in manifest['shards'])
+    logger.info("📦 %s 个分片, 共 %s 字节, 默认: %s", len(manifest['shards']), total_bytes, manifest['default'])
+    logger.info("✅ 网页数据已更新" if result['changed'] else "✅ 网页数据未变化")
+    return result
+
 
 def main():
     """主函数"""
@@ -34,62 +286,26 @@ def main():
         # 加载配置
         config_loader = ConfigLoader()
 
-        # 获取配置的板块（默认使用 'all'）
+        # 页面默认展示的板块（默认使用 'all'）
         category = os.environ.get('CONTENT_CATEGORY', 'all')
-        logger.info(f"📂 使用内容板块: {category}")
+        logger.info("📂 默认展示板块: %s", category)
 
-        # 创建爬虫实例
-        scraper = DouyinScraper(config_loader)
-
-        # 抓取热榜数据（默认 20 条）
-        hot_list = scraper.fetch_hot_list(limit=20, category=category)
-
-        if not hot_list:
+        archive = TrendArchive(os.getenv('HISTORY_DIR') or project_root / 'data' / 'history')
+        boards = build_boards(config_loader, archive, default_store())
+        if not boards:
             logger.error("❌ 未能获取热榜数据")
-            # 创建空数据文件
-            data = {
-                "hot_list": [],
-                "update_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "source": "数据获取失败",
-                "category": category
-            }
-        else:
-            logger.info(f"✅ 成功获取 {len(hot_list)} 条热榜数据")
-
-            # 构建 JSON 数据结构
-            data = {
-                "hot_list": hot_list,
-                "update_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "source": scraper.current_source_name,
-                "category": category,
-                "is_test_data": scraper.is_using_test_data
-            }
-
-            # 打印前 3 条数据预览
-            logger.info("📊 数据预览（前3条）:")
-            for item in hot_list[:3]:
-                logger.info(f"   {item['rank']}. {item['word']} - 热度: {item['hot_value']}")
-
-        # 确保数据目录存在
-        data_dir = project_root / 'docs' / 'data'
-        data_dir.mkdir(parents=True, exist_ok=True)
-
-        # 保存为 JSON 文件
-        output_file = data_dir / 'hot_list.json'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-
-        logger.info(f"💾 数据已保存到: {output_file}")
-        logger.info(f"📦 文件大小: {output_file.stat().st_size} 字节")
+            return 1
+
+        publish_boards(archive, boards, category)
 
         logger.info("=" * 60)
-        logger.info("✅ 数据抓取完成")
+        logger.info("✅ 数据发布完成")
         logger.info("=" * 60)
 
         return 0
 
     except Exception as e:
-        logger.error(f"❌ 发生错误: {e}")
+        logger.error("❌ 发生错误: %s", e)
         import traceback
         traceback.print_exc()
         return 1
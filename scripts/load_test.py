@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+端到端压测脚本
+针对本地模拟上游（scripts/mock_upstream.py）并发执行完整的抓取 + 推送流程，
+统计吞吐量和尾延迟。默认关闭抓取合并（每个周期都真实请求上游），加 --coalesce 测量合并后的表现
+
+用法:
+    # 启动内置模拟服务并压测
+    python scripts/load_test.py --cycles 200 --concurrency 16 --latency-ms 200 --jitter-ms 800
+
+    # 压测已在运行的模拟服务
+    python scripts/load_test.py --target http://127.0.0.1:8900 --cycles 200
+
+    # 开启抓取合并（同时进行的抓取合并、刚完成的结果复用 FETCH_COALESCE_SECONDS 秒）
+    python scripts/load_test.py --cycles 200 --coalesce
+"""
+import sys
+import copy
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config_loader import ConfigLoader
+from main import scrape_and_send
+from metrics import COALESCED_FETCHES
+from mock_upstream import FEISHU_PATH_PREFIX, add_server_arguments, start_server_from_args
+from single_flight import FETCH_FLIGHTS
+
+logger = logging.getLogger(__name__)
+
+
+def point_config_at(config_loader: ConfigLoader, base_url: str):
+    """
+    将配置中所有数据源的 API 地址改写到模拟服务（保留原路径）
+
+    Args:
+        config_loader: 配置加载器
+        base_url: 模拟服务地址，如 http://127.0.0.1:8900
+    """
+    config = copy.deepcopy(config_loader.config)
+    for source in config.get('data_sources', {}).values():
+        for api in source.get('apis', []):
+            path = urlsplit(api.get('url', '')).path
+            api['url'] = f"{base_url}{path}"
+    config_loader.update_config(config)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    计算百分位数（最近秩法）
+
+    Args:
+        sorted_values: 已排序的数值列表
+        pct: 百分位（0~100）
+
+    Returns:
+        百分位数值
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_load(config_loader: ConfigLoader, webhook_base: str, cycles: int,
+             concurrency: int, webhooks: int) -> Dict:
+    """
+    并发执行抓取推送周期
+
+    Args:
+        config_loader: 已指向模拟服务的配置加载器
+        webhook_base: 飞书 Webhook 基础地址（不含 token）
+        cycles: 总执行次数
+        concurrency: 并发数
+        webhooks: 使用的 Webhook 数量（每个 Webhook 单独限流）
+
+    Returns:
+        压测结果统计
+    """
+    def one_cycle(index: int):
+        webhook_url = f"{webhook_base}load-test-{index % webhooks}"
+        start = time.perf_counter()
+        success = scrape_and_send(config_loader, webhook_url=webhook_url)
+        return time.perf_counter() - start, bool(success)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one_cycle, range(cycles)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    succeeded = sum(1 for _, success in results if success)
+
+    return {
+        'cycles': cycles,
+        'succeeded': succeeded,
+        'failed': cycles - succeeded,
+        'elapsed': elapsed,
+        'throughput': cycles / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 50),
+        'p90': percentile(latencies, 90),
+        'p99': percentile(latencies, 99),
+        'max': latencies[-1] if latencies else 0.0,
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='抓取 + 推送全流程压测')
+    add_server_arguments(parser)
+    parser.add_argument('--target', help='已运行的模拟服务地址（不指定则启动内置模拟服务）')
+    parser.add_argument('--cycles', type=int, default=100, help='总执行次数')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发数')
+    parser.add_argument('--webhooks', type=int, default=1, help='轮流使用的 Webhook 数量')
+    parser.add_argument('--coalesce', action='store_true',
+                        help='开启抓取合并（默认关闭，每个周期都请求上游）')
+    parser.add_argument('--config', default=str(project_root / 'config.yaml'), help='配置文件路径')
+    parser.add_argument('--log-level', default='WARNING', help='业务日志级别')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, args.log_level),
+        format='%(levelname)s - %(message)s'
+    )
+    logger.setLevel(logging.INFO)
+
+    server = None
+    if args.target:
+        base_url = args.target.rstrip('/')
+    else:
+        if args.port == 8900:
+            args.port = 0
+        server = start_server_from_args(args)
+        base_url = server.base_url
+
+    config_loader = ConfigLoader(args.config)
+    point_config_at(config_loader, base_url)
+    FETCH_FLIGHTS.enabled = args.coalesce
+
+    logger.info(f"🚀 开始压测: {args.cycles} 次, 并发 {args.concurrency}, 目标 {base_url}, "
+                f"抓取合并 {'开启' if args.coalesce else '关闭'}")
+    result = run_load(
+        config_loader,
+        f"{base_url}{FEISHU_PATH_PREFIX}",
+        args.cycles,
+        args.concurrency,
+        max(1, args.webhooks),
+    )
+
+    logger.info("=" * 60)
+    logger.info(f"完成: {result['succeeded']}/{result['cycles']} 成功, 耗时 {result['elapsed']:.2f}s")
+    logger.info(f"吞吐量: {result['throughput']:.2f} 次/秒")
+    logger.info(
+        f"端到端延迟: p50={result['p50'] * 1000:.0f}ms "
+        f"p90={result['p90'] * 1000:.0f}ms "
+        f"p99={result['p99'] * 1000:.0f}ms "
+        f"max={result['max'] * 1000:.0f}ms"
+    )
+    logger.info(
+        f"合并的抓取: 等待进行中 {COALESCED_FETCHES.get(kind='inflight'):.0f} 次, "
+        f"复用刚完成 {COALESCED_FETCHES.get(kind='memo'):.0f} 次"
+    )
+    if server:
+        logger.info(f"模拟服务统计: {server.stats}")
+        server.shutdown()
+    logger.info("=" * 60)
+
+    return 0 if result['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
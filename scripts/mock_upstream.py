@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+本地模拟上游服务（压测用）
+模拟 config.yaml 中的四个抖音热榜接口，以及一个带限流的飞书 Webhook
+
+用法:
+    python scripts/mock_upstream.py --port 8900 --latency-ms 200 --error-rate 0.1
+"""
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# 与 config.yaml 中抖音数据源一致的接口路径
+DOUYIN_PATHS = [
+    '/aweme/v1/hot/search/list/',
+    '/web/api/v2/hotsearch/billboard/word/',
+    '/aweme/v1/hotsearch/star/billboard/',
+    '/aweme/v1/chart/music/list/',
+]
+
+# 飞书 Webhook 路径前缀
+FEISHU_PATH_PREFIX = '/open-apis/bot/v2/hook/'
+
+# 支持的响应结构（对应 DouyinScraper._parse_response 的各种格式）
+SHAPES = ['status_code', 'data_word_list', 'data_list', 'list', 'extra_list', 'items']
+
+SAMPLE_WORDS = [
+    "比亚迪新车发布", "特斯拉降价", "蔚来换电站", "春节档电影", "AI 大模型",
+    "演唱会门票", "华为新手机", "A股收盘", "旅游目的地", "美食探店",
+]
+
+
+class EndpointProfile:
+    """单个模拟接口的行为配置"""
+
+    def __init__(self, latency_ms: float = 50, jitter_ms: float = 0, error_rate: float = 0.0,
+                 items: int = 50, word_padding: int = 0, shape: str = 'status_code'):
+        """
+        初始化接口配置
+
+        Args:
+            latency_ms: 基础延迟（毫秒）
+            jitter_ms: 延迟抖动上限（毫秒），实际延迟为 latency_ms + [0, jitter_ms)
+            error_rate: 返回 5xx 的概率（0~1）
+            items: 每次返回的条目数量
+            word_padding: 每个标题额外填充的字符数，用于放大 payload
+            shape: 响应结构，取值见 SHAPES
+        """
+        if shape not in SHAPES:
+            raise ValueError(f"未知的响应结构: {shape}，可选: {', '.join(SHAPES)}")
+
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.items = items
+        self.word_padding = word_padding
+        self.shape = shape
+        self._body_cache: Optional[bytes] = None
+
+    def delay(self) -> float:
+        """返回本次请求应模拟的延迟（秒）"""
+        return (self.latency_ms + random.random() * self.jitter_ms) / 1000.0
+
+    def body(self) -> bytes:
+        """
+        生成响应体（同一配置只序列化一次）
+
+        Returns:
+            JSON 编码后的响应体
+        """
+        if self._body_cache is None:
+            now = int(time.time())
+            padding = 'x' * self.word_padding
+            word_list = [
+                {
+                    'word': f"{SAMPLE_WORDS[i % len(SAMPLE_WORDS)]}{i + 1}{padding}",
+                    'hot_value': (self.items - i) * 100000,
+                    'label': i % 6,
+                    'event_time': now - i * 60,
+                }
+                for i in range(self.items)
+            ]
+            self._body_cache = json.dumps(self._wrap(word_list), ensure_ascii=False).encode('utf-8')
+        return self._body_cache
+
+    def _wrap(self, word_list: List[Dict]):
+        """按配置的响应结构包装数据"""
+        if self.shape == 'status_code':
+            return {'status_code': 0, 'word_list': word_list}
+        if self.shape == 'data_word_list':
+            return {'data': {'word_list': word_list}}
+        if self.shape == 'data_list':
+            return {'data': word_list}
+        if self.shape == 'list':
+            return word_list
+        if self.shape == 'extra_list':
+            return {'extra': {'list': word_list}}
+        return {'items': word_list}
+
+
+class FeishuRateLimiter:
+    """
+    飞书自定义机器人限流模拟
+
+    飞书自定义机器人的频控为单租户单机器人 100 次/分钟、5 次/秒，
+    超限时返回 code 9499。
+    """
+
+    def __init__(self, per_second: int = 5, per_minute: int = 100):
+        self.per_second = per_second
+        self.per_minute = per_minute
+        self._hits: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, token: str) -> bool:
+        """
+        检查并记录一次调用
+
+        Args:
+            token: Webhook 的 token 部分（每个机器人独立计数）
+
+        Returns:
+            是否允许本次调用
+        """
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.setdefault(token, deque())
+            while hits and now - hits[0] >= 60:
+                hits.popleft()
+
+            last_second = sum(1 for t in reversed(hits) if now - t < 1)
+            if last_second >= self.per_second or len(hits) >= self.per_minute:
+                return False
+
+            hits.append(now)
+            return True
+
+
+class MockUpstreamServer(ThreadingHTTPServer):
+    """模拟上游服务器（抖音接口 + 飞书 Webhook）"""
+
+    daemon_threads = True
+
+    def __init__(self, address, profiles: Dict[str, EndpointProfile],
+                 rate_limiter: FeishuRateLimiter, feishu_max_bytes: int = 30 * 1024,
+                 feishu_latency_ms: float = 30):
+        super().__init__(address, MockUpstreamHandler)
+        self.profiles = profiles
+        self.rate_limiter = rate_limiter
+        self.feishu_max_bytes = feishu_max_bytes
+        self.feishu_latency_ms = feishu_latency_ms
+
+        # 统计信息
+        self.stats_lock = threading.Lock()
+        self.stats = {
+            'douyin_requests': 0,
+            'douyin_errors': 0,
+            'feishu_requests': 0,
+            'feishu_accepted': 0,
+            'feishu_throttled': 0,
+            'feishu_rejected': 0,
+        }
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key: str):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+
+class MockUpstreamHandler(BaseHTTPRequestHandler):
+    """模拟上游请求处理器"""
+
+    server: MockUpstreamServer
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        profile = self.server.profiles.get(path)
+
+        if path == '/_stats':
+            with self.server.stats_lock:
+                body = json.dumps(self.server.stats).encode('utf-8')
+            self._send_json(200, body)
+            return
+
+        if profile is None:
+            self._send_json(404, b'{"status_code": 404}')
+            return
+
+        self.server.count('douyin_requests')
+        time.sleep(profile.delay())
+
+        if random.random() < profile.error_rate:
+            self.server.count('douyin_errors')
+            self._send_json(503, b'{"status_code": 503, "status_msg": "mock error"}')
+            return
+
+        self._send_json(200, profile.body())
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        if not path.startswith(FEISHU_PATH_PREFIX):
+            self._send_json(404, b'{"code": 404, "msg": "not found"}')
+            return
+
+        self.server.count('feishu_requests')
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        time.sleep(self.server.feishu_latency_ms / 1000.0)
+
+        token = path[len(FEISHU_PATH_PREFIX):]
+        if not self.server.rate_limiter.allow(token):
+            self.server.count('feishu_throttled')
+            self._send_json(200, json.dumps({'code': 9499, 'msg': 'too many request'}).encode('utf-8'))
+            return
+
+        if length > self.server.feishu_max_bytes:
+            self.server.count('feishu_rejected')
+            self._send_json(400, json.dumps({'code': 9499, 'msg': 'request body too large'}).encode('utf-8'))
+            return
+
+        try:
+            json.loads(body)
+        except ValueError:
+            self.server.count('feishu_rejected')
+            self._send_json(400, json.dumps({'code': 9499, 'msg': 'invalid json'}).encode('utf-8'))
+            return
+
+        self.server.count('feishu_accepted')
+        self._send_json(200, json.dumps({'code': 0, 'msg': 'success', 'data': {}}).encode('utf-8'))
+
+
+def build_profiles(args) -> Dict[str, EndpointProfile]:
+    """
+    根据命令行参数构建各接口的配置
+
+    Args:
+        args: argparse 解析结果
+
+    Returns:
+        路径 -> 接口配置
+    """
+    overrides = {}
+    if args.profile:
+        import yaml
+        with open(args.profile, 'r', encoding='utf-8') as f:
+            overrides = yaml.safe_load(f) or {}
+
+    profiles = {}
+    for path in DOUYIN_PATHS:
+        options = {
+            'latency_ms': args.latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'error_rate': args.error_rate,
+            'items': args.items,
+            'word_padding': args.word_padding,
+            'shape': args.shape,
+        }
+        options.update(overrides.get(path, {}))
+        profiles[path] = EndpointProfile(**options)
+
+    return profiles
+
+
+def start_server(host: str, port: int, profiles: Dict[str, EndpointProfile],
+                 rate_limiter: Optional[FeishuRateLimiter] = None,
+                 feishu_max_bytes: int = 30 * 1024, feishu_latency_ms: float = 30) -> MockUpstreamServer:
+    """
+    在后台线程中启动模拟服务器
+
+    Returns:
+        已启动的服务器实例（调用 shutdown() 停止）
+    """
+    server = MockUpstreamServer(
+        (host, port),
+        profiles,
+        rate_limiter or FeishuRateLimiter(),
+        feishu_max_bytes=feishu_max_bytes,
+        feishu_latency_ms=feishu_latency_ms,
+    )
+    thread = threading.Thread(target=server.serve_forever, name='mock-upstream', daemon=True)
+    thread.start()
+    logger.info(f"🧪 模拟上游服务已启动: {server.base_url}")
+    return server
+
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    """添加模拟服务器相关的命令行参数（load_test.py 复用）"""
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8900, help='监听端口（0 表示随机端口）')
+    parser.add_argument('--latency-ms', type=float, default=50, help='接口基础延迟（毫秒）')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='接口延迟抖动（毫秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='接口返回 503 的概率')
+    parser.add_argument('--items', type=int, default=50, help='每次返回的条目数量')
+    parser.add_argument('--word-padding', type=int, default=0, help='标题填充字符数（放大 payload）')
+    parser.add_argument('--shape', choices=SHAPES, default='status_code', help='响应结构')
+    parser.add_argument('--profile', help='按接口路径覆盖配置的 YAML 文件')
+    parser.add_argument('--feishu-per-second', type=int, default=5, help='飞书每秒限流次数')
+    parser.add_argument('--feishu-per-minute', type=int, default=100, help='飞书每分钟限流次数')
+    parser.add_argument('--feishu-max-bytes', type=int, default=30 * 1024, help='飞书请求体大小上限')
+    parser.add_argument('--feishu-latency-ms', type=float, default=30, help='飞书接口延迟（毫秒）')
+
+
+def start_server_from_args(args) -> MockUpstreamServer:
+    """根据命令行参数启动模拟服务器"""
+    return start_server(
+        args.host,
+        args.port,
+        build_profiles(args),
+        FeishuRateLimiter(args.feishu_per_second, args.feishu_per_minute),
+        feishu_max_bytes=args.feishu_max_bytes,
+        feishu_latency_ms=args.feishu_latency_ms,
+    )
+
+
+def main():
+    """主函数"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='本地模拟抖音接口和飞书 Webhook')
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_server_from_args(args)
+    logger.info("抖音接口:")
+    for path in DOUYIN_PATHS:
+        logger.info(f"   - {server.base_url}{path}")
+    logger.info(f"飞书 Webhook: {server.base_url}{FEISHU_PATH_PREFIX}<token>")
+    logger.info(f"统计信息: {server.base_url}/_stats")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        logger.info("👋 模拟服务已停止")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+端到端流水线：一次抓取，同时推送飞书、发布网页分片、写入归档
+run_once.py 和 fetch_data_for_web.py 各自抓取同一份热榜并依次执行各环节，
+这里各数据源并发抓取一次，之后各环节共享同一份结果并发执行，总耗时约等于最慢的环节
+
+用法:
+    python scripts/run_pipeline.py                 # 推送 + 网页 + 归档
+    python scripts/run_pipeline.py --no-feishu     # 只更新网页数据和归档
+    python scripts/run_pipeline.py --no-web        # 只推送和归档
+"""
+import os
+import sys
+import time
+import atexit
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config_loader import ConfigLoader
+from feishu_notifier import FeishuNotifier
+from history_store import default_store
+from log_setup import setup_logging
+from run_once import dump_metrics, send_hot_list
+from trend_archive import TrendArchive
+from tracing import span, traced
+from fetch_data_for_web import (
+    BOARD_LIMIT, archive_pools, boards_from_pools, collect_pools, fetch_pool, make_board, publish_boards,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def timed(name: str, timings: Dict[str, float], func, *args):
+    """在线程中执行阻塞的环节并记录耗时"""
+    start = time.perf_counter()
+    try:
+        with span(f"pipeline_{name}"):
+            return await asyncio.to_thread(func, *args)
+    finally:
+        timings[name] = (time.perf_counter() - start) * 1000
+
+
+def push_board(boards: List[Dict], pools: List[Dict], config_loader: ConfigLoader,
+               category: str, limit: int) -> Dict:
+    """
+    取出要推送的热榜：第一个成功的数据源（与 run_once 的数据源回退顺序一致）的指定板块，
+    网页分片中已有时直接共用，否则从同一份候选数据中过滤
+
+    Args:
+        boards: 网页分片
+        pools: 候选数据列表
+        config_loader: 配置加载器
+        category: 板块键名
+        limit: 条目数量
+
+    Returns:
+        热榜（分片）
+    """
+    primary = pools[0]
+    if limit <= BOARD_LIMIT:
+        for board in boards:
+            if board['source'] == primary['source'] and board['category'] == category:
+                return dict(board, hot_list=board['hot_list'][:limit])
+    return make_board(config_loader, primary, category, limit)
+
+
+async def run_pipeline(config_loader: ConfigLoader, webhook_url: Optional[str], category: str, limit: int,
+                       web_category: str = 'all', publish_web: bool = True) -> bool:
+    """
+    执行一次流水线
+
+    Args:
+        config_loader: 配置加载器
+        webhook_url: 飞书 webhook 地址，为空时不推送
+        category: 推送的板块
+        limit: 推送的条目数量
+        web_category: 网页默认展示的板块
+        publish_web: 是否发布网页分片
+
+    Returns:
+        所有环节是否都成功
+    """
+    store = default_store()
+    archive = TrendArchive(os.getenv('HISTORY_DIR') or project_root / 'data' / 'history')
+    notifier = FeishuNotifier(webhook_url) if webhook_url else None
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    # 各数据源并发抓取，结果按配置顺序整理
+    sources = list(config_loader.get_enabled_data_sources())
+    results = await asyncio.gather(*(
+        timed(f"fetch_{source}", timings, fetch_pool, config_loader, source, store) for source in sources
+    ))
+    pools = collect_pools(results)
+    fetch_ms = (time.perf_counter() - start) * 1000
+    if not pools:
+        logger.error("❌ 未能获取热榜数据")
+        if notifier:
+            notifier.send_text_message("⚠️ 抖音热榜抓取失败，请检查服务状态")
+        return False
+
+    # 所有环节共享的结果
+    boards = boards_from_pools(config_loader, pools)
+    logger.info("✅ 抓取完成: %s 个数据源, %s 个分片（%.0f ms）", len(pools), len(boards), fetch_ms)
+
+    async def feishu_sink() -> bool:
+        board = push_board(boards, pools, config_loader, category, limit)
+        return await timed('feishu', timings, send_hot_list, config_loader, notifier, pools[0]['scraper'],
+                           board['hot_list'], category, webhook_url)
+
+    async def archive_and_web_sink() -> bool:
+        await timed('archive', timings, archive_pools, archive, pools)
+        # 迷你趋势图和趋势榜读取归档，需在本次快照写入之后发布
+        if publish_web:
+            await timed('web', timings, publish_boards, archive, boards, web_category)
+        return True
+
+    sinks = {'archive_web': archive_and_web_sink()}
+    if notifier:
+        sinks['feishu'] = feishu_sink()
+    else:
+        logger.warning("⚠️  未配置 FEISHU_WEBHOOK_URL，跳过飞书推送")
+
+    outcomes = await asyncio.gather(*sinks.values(), return_exceptions=True)
+    success = True
+    for name, outcome in zip(sinks, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error("❌ 环节 %s 执行失败: %s", name, outcome, exc_info=outcome)
+            success = False
+        elif not outcome:
+            logger.error("❌ 环节 %s 未成功", name)
+            success = False
+
+    sink_ms = ', '.join(f"{name} {ms:.0f} ms" for name, ms in timings.items() if not name.startswith('fetch_'))
+    logger.info("⏱️  抓取 %.0f ms, %s，总耗时 %.0f ms", fetch_ms, sink_ms, (time.perf_counter() - start) * 1000)
+    return success
+
+
+@traced('run_pipeline')
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='端到端流水线（抓取一次，并发推送 / 发布 / 归档）')
+    parser.add_argument('--no-feishu', action='store_true', help='不推送飞书')
+    parser.add_argument('--no-web', action='store_true', help='不发布网页分片')
+    args = parser.parse_args()
+
+    setup_logging(stream=sys.stdout)
+    atexit.register(dump_metrics)
+
+    logger.info("=" * 60)
+    logger.info("🚀 开始执行热榜流水线")
+    logger.info("=" * 60)
+
+    webhook_url = None if args.no_feishu else os.getenv('FEISHU_WEBHOOK_URL')
+    limit = int(os.getenv('HOT_LIST_LIMIT', '20'))
+    enabled_categories = os.getenv('ENABLED_CATEGORIES', '').strip()
+    category = enabled_categories.split(',')[0].strip() if enabled_categories else 'all'
+
+    try:
+        success = asyncio.run(run_pipeline(
+            ConfigLoader(), webhook_url, category, limit,
+            web_category=os.getenv('CONTENT_CATEGORY', 'all'), publish_web=not args.no_web,
+        ))
+    except Exception as e:
+        logger.error("❌ 流水线执行失败: %s", e, exc_info=True)
+        return 1
+
+    logger.info("=" * 60)
+    logger.info("🎉 流水线执行完成" if success else "⚠️  流水线部分环节失败")
+    logger.info("=" * 60)
+    return 0 if success else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+运行状态摘要
+计算需要跨运行延续的状态（最近成功数据 / 热榜指纹 / 请求身份）中内容稳定部分的哈希，
+GitHub Actions 用它作为缓存键：只有内容真正变化时才保存新的缓存条目。
+每次运行都会变化的字段不计入：请求身份的请求计数和最近使用时间；
+最近成功数据的保存时间按最大时效的一半分桶（内容不变时缓存中的保存时间最多比实际早这么久）
+
+用法:
+    python scripts/state_digest.py            # 输出 16 位十六进制摘要（没有任何状态文件时输出为空）
+"""
+import sys
+import json
+import hashlib
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fingerprint import DEFAULT_CACHE_PATH
+from identity_pool import DEFAULT_STATE_PATH, OUTCOMES
+from last_known_good import DEFAULT_CACHE_DIR, DEFAULT_MAX_STALENESS
+
+# 请求身份状态中每次请求都会变化的字段
+VOLATILE_IDENTITY_FIELDS = ('requests', 'last_used') + OUTCOMES
+
+
+def _read_json(path: Path):
+    """读取 JSON 文件，不存在或损坏时返回 None"""
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def stable_state() -> dict:
+    """
+    收集状态文件中内容稳定的部分
+
+    Returns:
+        {'fingerprints', 'last_known_good', 'identities'}
+    """
+    last_known_good = {}
+    bucket = max(DEFAULT_MAX_STALENESS / 2, 1.0)
+    for path in sorted(Path(DEFAULT_CACHE_DIR).glob('*.json')):
+        entry = _read_json(path)
+        if isinstance(entry, dict):
+            entry = dict(entry, saved_at=int(entry.get('saved_at', 0) // bucket))
+        last_known_good[path.name] = entry
+
+    identities = _read_json(Path(DEFAULT_STATE_PATH))
+    if isinstance(identities, dict):
+        identities = dict(identities, identities={
+            name: {key: value for key, value in entry.items() if key not in VOLATILE_IDENTITY_FIELDS}
+            for name, entry in (identities.get('identities') or {}).items()
+        })
+
+    return {
+        'fingerprints': _read_json(Path(DEFAULT_CACHE_PATH)),
+        'last_known_good': last_known_good,
+        'identities': identities,
+    }
+
+
+def main():
+    """主函数"""
+    state = stable_state()
+    if not any(state.values()):
+        return 0
+    body = json.dumps(state, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    print(hashlib.sha256(body).hexdigest()[:16])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+历史热点检索："某个话题上过热榜吗？"
+基于 search_index 的 n-gram 倒排索引，每次查询前增量索引新归档的快照
+
+用法:
+    python scripts/topic_search.py 关键词                  # 包含关键词的历史词条及最近上榜记录
+    python scripts/topic_search.py 关键词 --history 0      # 只看汇总
+    python scripts/topic_search.py --rebuild               # 从归档重新生成索引
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from search_index import DEFAULT_INDEX_DIR, SearchIndex
+from trend_archive import TrendArchive
+
+logger = logging.getLogger(__name__)
+
+
+def print_topic(topic: Dict):
+    """打印单个词条的检索结果"""
+    print(f"📌 {topic['word']}")
+    print(f"   上榜 {topic['polls']} 次，最高第 {topic['best_rank']} 名（{', '.join(topic['sources'])}）")
+    print(f"   首次: {topic['first_seen']}  最后: {topic['last_seen']}")
+    if topic['history']:
+        ranks = ' '.join(f"{record['t'][5:16]}#{record['rank']}" for record in topic['history'])
+        print(f"   最近: {ranks}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='历史热点检索')
+    parser.add_argument('query', nargs='?', help='查询关键词（子串匹配）')
+    parser.add_argument('--history-dir', default=os.getenv('HISTORY_DIR') or str(project_root / 'data' / 'history'),
+                        help='归档目录')
+    parser.add_argument('--index-dir', default=DEFAULT_INDEX_DIR, help='索引目录')
+    parser.add_argument('--limit', type=int, default=20, help='最多返回的词条数')
+    parser.add_argument('--history', type=int, default=12, help='每个词条显示的最近上榜记录数')
+    parser.add_argument('--rebuild', action='store_true', help='从归档重新生成索引')
+    parser.add_argument('--no-update', action='store_true', help='查询前不增量索引新快照')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    if not args.query and not args.rebuild:
+        parser.error('请提供查询关键词或 --rebuild')
+
+    archive = TrendArchive(args.history_dir)
+    index = SearchIndex(args.index_dir)
+
+    start = time.perf_counter()
+    if args.rebuild:
+        index.rebuild(archive)
+    elif not args.no_update:
+        index.update(archive)
+    index.save()
+    update_ms = (time.perf_counter() - start) * 1000
+
+    if not args.query:
+        print(f"✅ 已重新生成索引: {len(index.words)} 个词条, {index.entries} 条上榜记录（{update_ms:.0f} ms）")
+        return 0
+
+    start = time.perf_counter()
+    results = index.search(args.query, args.limit, args.history)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0 if results else 1
+
+    if not results:
+        print(f"❌ 没有上过热榜: {args.query}")
+    for topic in results:
+        print_topic(topic)
+
+    print(f"\n⏱️  查询耗时: {elapsed_ms:.1f} ms（索引更新 {update_ms:.0f} ms）")
+    return 0 if results else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+热榜历史趋势查询
+基于 trend_archive 的增量汇总，毫秒级返回
+
+用法:
+    python scripts/trend_query.py word "某个话题"          # 首次/最后出现、最高排名、在榜时长
+    python scripts/trend_query.py daily "某个话题"         # 每天的最高排名和最高热度
+    python scripts/trend_query.py search 关键词            # 按关键词查找词条
+    python scripts/trend_query.py top --by top10_hours --days 7
+    python scripts/trend_query.py labels --days 7         # 本周最多的标签
+    python scripts/trend_query.py trending --hours 24     # 跨数据源趋势分排行（需要 numpy）
+    python scripts/trend_query.py rebuild                 # 从快照重新生成汇总
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from rendering import format_hot_value
+from trend_archive import TrendArchive
+
+logger = logging.getLogger(__name__)
+
+
+def print_word_stats(stats: Dict):
+    """打印单个词条的汇总"""
+    print(f"📌 {stats['word']}")
+    print(f"   首次出现: {stats['first_seen']}")
+    print(f"   最后出现: {stats['last_seen']}")
+    print(f"   最高排名: {stats['peak_rank']}（{stats['peak_rank_time']}）")
+    print(f"   最高热度: {format_hot_value(stats['peak_hot_value'])}（{stats['peak_hot_value_time']}）")
+    print(f"   在榜时长: {stats['hours']} 小时，其中前十 {stats['top10_hours']} 小时")
+    print(f"   数据来源: {', '.join(stats['sources'])}")
+
+
+def print_word_table(rows: List[Dict]):
+    """打印词条列表"""
+    for index, stats in enumerate(rows, 1):
+        print(
+            f"{index:>3}. {stats['word']}  "
+            f"在榜 {stats['hours']}h / 前十 {stats['top10_hours']}h  "
+            f"最高第 {stats['peak_rank']} 名  最高热度 {format_hot_value(stats['peak_hot_value'])}"
+        )
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='热榜历史趋势查询')
+    parser.add_argument('--history-dir', default=os.getenv('HISTORY_DIR') or str(project_root / 'data' / 'history'),
+                        help='归档目录')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    word_parser = subparsers.add_parser('word', help='查询单个词条')
+    word_parser.add_argument('word')
+
+    daily_parser = subparsers.add_parser('daily', help='查询词条每天的最高排名和热度')
+    daily_parser.add_argument('word')
+
+    search_parser = subparsers.add_parser('search', help='按关键词查找词条')
+    search_parser.add_argument('keyword')
+    search_parser.add_argument('--limit', type=int, default=20)
+
+    top_parser = subparsers.add_parser('top', help='词条排行')
+    top_parser.add_argument('--by', default='hours',
+                            choices=['hours', 'top10_hours', 'peak_hot_value', 'peak_rank'])
+    top_parser.add_argument('--days', type=int, help='只统计最近 N 天出现过的词条')
+    top_parser.add_argument('--limit', type=int, default=20)
+
+    labels_parser = subparsers.add_parser('labels', help='标签排行')
+    labels_parser.add_argument('--days', type=int, default=7)
+    labels_parser.add_argument('--limit', type=int, default=10)
+
+    trending_parser = subparsers.add_parser('trending', help='跨数据源趋势分排行（需要 numpy）')
+    trending_parser.add_argument('--hours', type=int, default=24, help='统计最近 N 小时')
+    trending_parser.add_argument('--limit', type=int, default=20)
+
+    subparsers.add_parser('rebuild', help='从快照重新生成汇总')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    archive = TrendArchive(args.history_dir)
+    start = time.perf_counter()
+
+    if args.command == 'word':
+        result = archive.word_stats(args.word)
+    elif args.command == 'daily':
+        result = archive.daily(args.word)
+    elif args.command == 'search':
+        result = archive.search(args.keyword, args.limit)
+    elif args.command == 'top':
+        result = archive.top_words(args.by, args.days, args.limit)
+    elif args.command == 'labels':
+        result = archive.top_labels(args.days, args.limit)
+    elif args.command == 'trending':
+        result = archive.trending(args.hours, args.limit)
+    else:
+        rollups = archive.rebuild()
+        result = {'polls': rollups['polls'], 'words': len(rollups['words'])}
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0 if result is not None else 1
+
+    if args.command == 'word':
+        if result is None:
+            print(f"❌ 未找到词条: {args.word}")
+            return 1
+        print_word_stats(result)
+    elif args.command == 'daily':
+        for row in result:
+            print(f"{row['date']}  最高第 {row['best_rank']} 名  最高热度 {format_hot_value(row['peak_hot_value'])}")
+    elif args.command in ('search', 'top'):
+        print_word_table(result)
+    elif args.command == 'labels':
+        for row in result:
+            print(f"{row['label']}: {row['count']}")
+    elif args.command == 'trending':
+        for index, row in enumerate(result, 1):
+            print(
+                f"{index:>3}. {row['word']}  趋势分 {row['score']:.3f}  "
+                f"百分位 {row['percentile']:.2f} / z {row['zscore']:+.2f} / 动量 {row['momentum']:+.2f}  "
+                f"({', '.join(row['sources'])})"
+            )
+    else:
+        print(f"✅ 已重新生成: {result['polls']} 次抓取, {result['words']} 个词条")
+
+    print(f"\n⏱️  查询耗时: {elapsed_ms:.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
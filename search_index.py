@@ -0,0 +1,422 @@
+"""
+热榜全文检索模块
+对归档中出现过的所有词条建立字符二元 / 三元组（n-gram）倒排索引，不依赖中文分词库；
+倒排表和每个词条的上榜记录（抓取时间、排名、数据源）都以差值 + 变长整数压缩存储，
+按归档快照增量更新
+"""
+import os
+import json
+import bisect
+import logging
+import unicodedata
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# 索引格式版本
+INDEX_VERSION = 1
+
+# 默认索引目录（可随时从归档重建，不需要提交）
+DEFAULT_INDEX_DIR = os.getenv('SEARCH_INDEX_DIR', '.cache/search_index')
+
+# 索引文件：元数据、词条和 n-gram 文本（NUL 分隔）、偏移表、压缩倒排表
+META_FILE = 'index.json'
+TERMS_FILE = 'terms.txt'
+OFFSETS_FILE = 'offsets.bin'
+POSTINGS_FILE = 'postings.bin'
+
+# 建立索引的 n-gram 长度
+NGRAM_SIZES = (2, 3)
+
+# 时间格式（与 trend_archive 一致）
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def normalize(text: str) -> str:
+    """统一全角 / 半角和大小写"""
+    return unicodedata.normalize('NFKC', text).lower().strip()
+
+
+def ngrams(text: str, sizes: Iterable[int] = NGRAM_SIZES) -> Set[str]:
+    """
+    提取字符 n-gram
+
+    Args:
+        text: 已归一化的文本
+        sizes: n-gram 长度
+
+    Returns:
+        n-gram 集合
+    """
+    grams = set()
+    for size in sizes:
+        grams.update(text[i:i + size] for i in range(len(text) - size + 1))
+    return grams
+
+
+def encode_varint(value: int, out: bytearray):
+    """将非负整数以变长编码（每字节 7 位）追加到 out"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varints(data) -> List[int]:
+    """解码一段变长整数序列"""
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+class SearchIndex:
+    """
+    热榜词条倒排索引
+
+    已保存的 n-gram 按字典序存放，查询时二分查找，加载时不需要重建字典；
+    增量写入的倒排表放在覆盖层中（写时复制），保存时再合并
+    """
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR):
+        """
+        初始化索引（首次使用时从文件加载）
+
+        Args:
+            index_dir: 索引目录
+        """
+        self.index_dir = Path(index_dir)
+        self._loaded = False
+        self._dirty = False
+        self._reset()
+
+    def _reset(self):
+        # 增量位置：最后一次索引的快照时间，以及该时间下已索引的 数据源/板块
+        self.last_t: Optional[str] = None
+        self.boundary: List[str] = []
+        self.sources: List[str] = []
+        self.words: List[str] = []
+        self.entries = 0
+        self._source_ids: Dict[str, int] = {}
+        # 词条 -> ID（首次写入时才建立）
+        self._word_ids: Optional[Dict[str, int]] = None
+
+        # 已保存的部分
+        self._blob = memoryview(b'')
+        self._gram_keys: List[str] = []
+        self._gram_offsets = array('q', [0])
+        self._occurrence_offsets = array('q', [0])
+        # 每个词条最后一次上榜的时间
+        self._last_seen = array('q')
+
+        # 覆盖层：n-gram -> [最后一个词条 ID, 词条 ID 差值序列]
+        self._gram_updates: Dict[str, list] = {}
+        # 覆盖层：词条 ID -> (时间差值, 排名, 数据源 ID) 序列
+        self._occurrence_updates: Dict[int, bytearray] = {}
+
+    # ------------------------------------------------------------------
+    # 读写
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            meta = json.loads((self.index_dir / META_FILE).read_text(encoding='utf-8'))
+            if meta.get('version') != INDEX_VERSION:
+                logger.info("检索索引版本变化，将重新生成")
+                return
+            terms = (self.index_dir / TERMS_FILE).read_text(encoding='utf-8').split('\0')
+            offsets = array('q')
+            offsets.frombytes((self.index_dir / OFFSETS_FILE).read_bytes())
+            blob = memoryview((self.index_dir / POSTINGS_FILE).read_bytes())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("检索索引读取失败，将重新生成: %s", e)
+            return
+
+        word_count, gram_count = meta['words'], meta['grams']
+        if len(terms) != word_count + gram_count or len(offsets) != 2 * word_count + gram_count + 2:
+            logger.warning("检索索引文件不完整，将重新生成")
+            return
+
+        self.last_t = meta['last_t']
+        self.boundary = meta['boundary']
+        self.sources = meta['sources']
+        self.entries = meta['entries']
+        self._source_ids = {source: index for index, source in enumerate(self.sources)}
+        self.words = terms[:word_count]
+        self._gram_keys = terms[word_count:]
+        self._gram_offsets = offsets[:gram_count + 1]
+        self._occurrence_offsets = offsets[gram_count + 1:gram_count + word_count + 2]
+        self._last_seen = offsets[gram_count + word_count + 2:]
+        self._blob = blob
+
+    def save(self):
+        """有新数据时合并覆盖层并写回索引文件"""
+        if not self._dirty:
+            return
+        blob = bytearray()
+
+        gram_keys = sorted(set(self._gram_keys).union(self._gram_updates)) if self._gram_updates else self._gram_keys
+        gram_offsets = array('q', [0])
+        for gram in gram_keys:
+            blob += self._gram_postings(gram)
+            gram_offsets.append(len(blob))
+
+        occurrence_offsets = array('q', [len(blob)])
+        for word_id in range(len(self.words)):
+            blob += self._occurrences(word_id)
+            occurrence_offsets.append(len(blob))
+
+        meta = {
+            'version': INDEX_VERSION,
+            'last_t': self.last_t,
+            'boundary': self.boundary,
+            'entries': self.entries,
+            'sources': self.sources,
+            'words': len(self.words),
+            'grams': len(gram_keys),
+        }
+        files = (
+            (POSTINGS_FILE, bytes(blob)),
+            (OFFSETS_FILE, (gram_offsets + occurrence_offsets + self._last_seen).tobytes()),
+            (TERMS_FILE, '\0'.join(self.words + gram_keys).encode('utf-8')),
+            # 元数据最后写入，其余文件不完整时加载会发现数量不一致
+            (META_FILE, json.dumps(meta, ensure_ascii=False).encode('utf-8')),
+        )
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        for name, body in files:
+            path = self.index_dir / name
+            tmp_path = path.with_name(f"{name}.tmp")
+            tmp_path.write_bytes(body)
+            os.replace(tmp_path, path)
+
+        self._blob = memoryview(bytes(blob))
+        self._gram_keys = gram_keys
+        self._gram_offsets = gram_offsets
+        self._occurrence_offsets = occurrence_offsets
+        self._gram_updates = {}
+        self._occurrence_updates = {}
+        self._dirty = False
+        logger.info("🔎 检索索引已保存: %s 个词条, %s 条上榜记录, %s 字节", len(self.words), self.entries, len(blob))
+
+    def _gram_postings(self, gram: str):
+        """n-gram 的倒排表（词条 ID 差值序列），不存在时返回 None"""
+        entry = self._gram_updates.get(gram)
+        if entry is not None:
+            return entry[1]
+        index = bisect.bisect_left(self._gram_keys, gram)
+        if index < len(self._gram_keys) and self._gram_keys[index] == gram:
+            return self._blob[self._gram_offsets[index]:self._gram_offsets[index + 1]]
+        return None
+
+    def _occurrences(self, word_id: int):
+        """词条的上榜记录（压缩序列）"""
+        data = self._occurrence_updates.get(word_id)
+        if data is not None:
+            return data
+        if word_id + 1 < len(self._occurrence_offsets):
+            return self._blob[self._occurrence_offsets[word_id]:self._occurrence_offsets[word_id + 1]]
+        return b''
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def _word_id(self, word: str) -> int:
+        if self._word_ids is None:
+            self._word_ids = {w: index for index, w in enumerate(self.words)}
+        word_id = self._word_ids.get(word)
+        if word_id is None:
+            word_id = self._word_ids[word] = len(self.words)
+            self.words.append(word)
+            self._last_seen.append(0)
+            # 新词条 ID 单调递增，追加到倒排表末尾即可保持有序
+            for gram in ngrams(normalize(word)):
+                entry = self._gram_updates.get(gram)
+                if entry is None:
+                    saved = self._gram_postings(gram)
+                    entry = self._gram_updates[gram] = [
+                        sum(decode_varints(saved)) if saved is not None else 0,
+                        bytearray(saved or b''),
+                    ]
+                encode_varint(word_id - entry[0], entry[1])
+                entry[0] = word_id
+        return word_id
+
+    def add_snapshot(self, snapshot: Dict):
+        """
+        索引一条归档快照
+
+        Args:
+            snapshot: 快照字典 {'t', 'source', 'category', 'items'}
+        """
+        self._load()
+        poll_time = int(datetime.strptime(snapshot['t'], TIME_FORMAT).timestamp())
+        source_id = self._source_ids.get(snapshot['source'])
+        if source_id is None:
+            source_id = self._source_ids[snapshot['source']] = len(self.sources)
+            self.sources.append(snapshot['source'])
+
+        for rank, word, _hot_value, _label in snapshot['items']:
+            word_id = self._word_id(word)
+            data = self._occurrence_updates.get(word_id)
+            if data is None:
+                data = self._occurrence_updates[word_id] = bytearray(self._occurrences(word_id))
+            # 快照按时间顺序写入，同一次抓取的不同板块时间差值为 0
+            encode_varint(max(poll_time - self._last_seen[word_id], 0), data)
+            encode_varint(rank, data)
+            encode_varint(source_id, data)
+            self._last_seen[word_id] = max(self._last_seen[word_id], poll_time)
+        self.entries += len(snapshot['items'])
+
+        board = f"{snapshot['source']}/{snapshot.get('category', 'all')}"
+        if snapshot['t'] != self.last_t:
+            self.last_t = snapshot['t']
+            self.boundary = []
+        self.boundary.append(board)
+        self._dirty = True
+
+    def update(self, archive) -> int:
+        """
+        索引归档中尚未索引的快照
+
+        Args:
+            archive: TrendArchive 实例
+
+        Returns:
+            新索引的快照数
+        """
+        self._load()
+        since = datetime.strptime(self.last_t, TIME_FORMAT) if self.last_t else None
+        added = 0
+        for snapshot in archive.iter_snapshots(since=since):
+            board = f"{snapshot['source']}/{snapshot.get('category', 'all')}"
+            if self.last_t is not None and (
+                    snapshot['t'] < self.last_t or (snapshot['t'] == self.last_t and board in self.boundary)):
+                continue
+            self.add_snapshot(snapshot)
+            added += 1
+        if added:
+            logger.info("🔎 新索引 %s 条快照", added)
+        return added
+
+    def rebuild(self, archive) -> int:
+        """
+        从全部归档快照重新生成索引
+
+        Args:
+            archive: TrendArchive 实例
+
+        Returns:
+            索引的快照数
+        """
+        self._reset()
+        self._loaded = True
+        self._dirty = True
+        return self.update(archive)
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def _candidates(self, query: str) -> List[int]:
+        """按 n-gram 倒排表求交集，得到可能包含查询串的词条 ID"""
+        size = max((n for n in NGRAM_SIZES if n <= len(query)), default=None)
+        if size is None:
+            # 查询串短于最小 n-gram，直接扫描词条
+            return [word_id for word_id, word in enumerate(self.words) if query in normalize(word)]
+
+        postings = []
+        for gram in ngrams(query, (size,)):
+            data = self._gram_postings(gram)
+            if data is None:
+                return []
+            postings.append(data)
+
+        # 从最短的倒排表开始求交集
+        postings.sort(key=len)
+        candidates = None
+        for data in postings:
+            ids = set()
+            word_id = 0
+            for delta in decode_varints(data):
+                word_id += delta
+                ids.add(word_id)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+        return sorted(candidates)
+
+    def history(self, word_id: int) -> List[Dict]:
+        """
+        解码词条的全部上榜记录
+
+        Args:
+            word_id: 词条 ID
+
+        Returns:
+            [{'t', 'rank', 'source'}, ...]，按时间顺序
+        """
+        values = decode_varints(self._occurrences(word_id))
+        records = []
+        poll_time = 0
+        for index in range(0, len(values), 3):
+            poll_time += values[index]
+            records.append({
+                't': datetime.fromtimestamp(poll_time).strftime(TIME_FORMAT),
+                'rank': values[index + 1],
+                'source': self.sources[values[index + 2]],
+            })
+        return records
+
+    def search(self, query: str, limit: int = 20, history_limit: int = 24) -> List[Dict]:
+        """
+        查找包含查询串的历史词条
+
+        Args:
+            query: 查询串
+            limit: 最多返回的词条数
+            history_limit: 每个词条返回的最近上榜记录数
+
+        Returns:
+            按最后上榜时间倒序的词条列表：
+            [{'word', 'first_seen', 'last_seen', 'polls', 'best_rank', 'sources', 'history'}, ...]
+        """
+        self._load()
+        query = normalize(query)
+        if not query:
+            return []
+
+        matched = [
+            word_id for word_id in self._candidates(query)
+            if query in normalize(self.words[word_id])
+        ]
+        # 最近上榜的词条在前
+        matched.sort(key=lambda word_id: self._last_seen[word_id], reverse=True)
+
+        results = []
+        for word_id in matched[:limit]:
+            records = self.history(word_id)
+            results.append({
+                'word': self.words[word_id],
+                'first_seen': records[0]['t'],
+                'last_seen': records[-1]['t'],
+                'polls': len(records),
+                'best_rank': min(record['rank'] for record in records),
+                'sources': sorted({record['source'] for record in records}),
+                'history': records[-history_limit:] if history_limit else [],
+            })
+        return results
@@ -0,0 +1,116 @@
+"""
+抓取请求合并模块（single-flight）
+网页服务、定时推送、关注提醒等在几秒内对同一 (数据源, 板块, 数量) 发起的抓取，
+只有第一个真正请求上游，其余等待并共享同一结果；完成后的结果再短暂保留，
+紧随其后的请求直接复用，突发负载下上游 QPS 不随消费者数量增长
+"""
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from metrics import COALESCED_FETCHES
+
+logger = logging.getLogger(__name__)
+
+# 抓取结果的复用时间（秒），0 表示只合并同时进行的请求
+DEFAULT_MEMO_SECONDS = float(os.getenv('FETCH_COALESCE_SECONDS', '3'))
+
+
+class _Flight:
+    """一次进行中的调用"""
+
+    __slots__ = ('done', 'result', 'error', 'finished_at')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.finished_at = 0.0
+
+
+class SingleFlight:
+    """按键合并同时进行的调用，并短暂复用完成的结果"""
+
+    def __init__(self, memo_seconds: float = DEFAULT_MEMO_SECONDS):
+        """
+        初始化
+
+        Args:
+            memo_seconds: 完成的结果可复用的时间（秒）
+        """
+        self.memo_seconds = memo_seconds
+        # 关闭时每次调用都直接执行（压测测量未合并的上游负载时使用）
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._memo: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, func: Callable[[], Any],
+           memoize: Callable[[Any], bool] = lambda result: True) -> Tuple[Any, bool]:
+        """
+        执行调用；同一个键已有进行中的调用时等待其结果，最近完成的结果未过期时直接返回
+
+        Args:
+            key: 合并键
+            func: 实际执行的调用
+            memoize: 判断结果是否可以在完成后继续复用（如失败结果不复用）
+
+        Returns:
+            (结果, 是否为共享的结果)；进行中的调用抛出异常时，等待者同样抛出该异常
+        """
+        if not self.enabled:
+            return func(), False
+
+        with self._lock:
+            memo = self._memo.get(key)
+            if memo is not None:
+                if time.monotonic() - memo.finished_at <= self.memo_seconds:
+                    COALESCED_FETCHES.inc(kind='memo')
+                    return memo.result, True
+                del self._memo[key]
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            COALESCED_FETCHES.inc(kind='inflight')
+            logger.debug("🔗 等待进行中的抓取: %s", key)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = func()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            flight.finished_at = time.monotonic()
+            with self._lock:
+                self._flights.pop(key, None)
+                if flight.error is None and self.memo_seconds > 0 and memoize(flight.result):
+                    self._memo[key] = flight
+            flight.done.set()
+        return flight.result, False
+
+    def forget(self, key: Optional[Hashable] = None):
+        """
+        丢弃复用的结果（不影响进行中的调用）
+
+        Args:
+            key: 合并键，为 None 时丢弃全部
+        """
+        with self._lock:
+            if key is None:
+                self._memo.clear()
+            else:
+                self._memo.pop(key, None)
+
+
+# 进程内共享的抓取合并器
+FETCH_FLIGHTS = SingleFlight()
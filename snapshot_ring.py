@@ -0,0 +1,309 @@
+"""
+最近快照环形缓冲区
+常驻进程（main.py）在内存中保留每个 数据源 x 板块 最近 N 次抓取结果，供排名变化、趋势等使用。
+快照按列存储在定长 array 中（词条、标签、数据源和板块为驻留字符串表中的编号），容量固定，
+追加时覆盖最旧的一次抓取并释放不再引用的字符串，内存占用有上限且可随时统计
+"""
+import os
+import sys
+import threading
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from metrics import RECENT_SNAPSHOT_BYTES
+
+# 每个榜单保留的抓取次数
+DEFAULT_CAPACITY = int(os.getenv('RECENT_SNAPSHOTS', '48'))
+
+# 每次抓取最多保留的条目数
+DEFAULT_MAX_ITEMS = int(os.getenv('RECENT_SNAPSHOT_ITEMS', '50'))
+
+# 时间格式（与 trend_archive 一致）
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class _StringTable:
+    """引用计数的字符串驻留表，编号在字符串不再被引用后回收复用"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._strings: List[Optional[str]] = []
+        self._refs = array('l')
+        self._free: List[int] = []
+        self._string_bytes = 0
+
+    def acquire(self, value: str) -> int:
+        """取得字符串编号并增加引用"""
+        string_id = self._ids.get(value)
+        if string_id is None:
+            if self._free:
+                string_id = self._free.pop()
+                self._strings[string_id] = value
+            else:
+                string_id = len(self._strings)
+                self._strings.append(value)
+                self._refs.append(0)
+            self._ids[value] = string_id
+            self._string_bytes += sys.getsizeof(value)
+        self._refs[string_id] += 1
+        return string_id
+
+    def release(self, string_id: int):
+        """减少引用，没有引用时回收编号"""
+        self._refs[string_id] -= 1
+        if self._refs[string_id] == 0:
+            value = self._strings[string_id]
+            del self._ids[value]
+            self._strings[string_id] = None
+            self._free.append(string_id)
+            self._string_bytes -= sys.getsizeof(value)
+
+    def lookup(self, value: str) -> Optional[int]:
+        """查找字符串编号（不增加引用）"""
+        return self._ids.get(value)
+
+    def __getitem__(self, string_id: int) -> str:
+        return self._strings[string_id]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def memory_bytes(self) -> int:
+        """字符串及索引结构占用的字节数"""
+        return (self._string_bytes + sys.getsizeof(self._ids) + sys.getsizeof(self._strings)
+                + sys.getsizeof(self._refs) + sys.getsizeof(self._free))
+
+
+class SnapshotRing:
+    """单个榜单的定长快照环形缓冲区（列式存储）"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, max_items: int = DEFAULT_MAX_ITEMS):
+        """
+        初始化缓冲区（所有列按容量一次性分配）
+
+        Args:
+            capacity: 保留的抓取次数
+            max_items: 每次抓取最多保留的条目数
+        """
+        self.capacity = capacity
+        self.max_items = max_items
+        self._strings = _StringTable()
+        self._times = array('d', bytes(8 * capacity))
+        self._counts = array('H', bytes(2 * capacity))
+        self._sources = array('i', bytes(4 * capacity))
+        self._categories = array('i', bytes(4 * capacity))
+        slots = capacity * max_items
+        self._words = array('i', bytes(4 * slots))
+        self._labels = array('i', bytes(4 * slots))
+        self._ranks = array('H', bytes(2 * slots))
+        self._hots = array('q', bytes(8 * slots))
+        # 下一次写入的位置和已保存的抓取次数
+        self._head = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, hot_list: List[Dict], source: str, category: str = 'all',
+               poll_time: Optional[float] = None):
+        """
+        追加一次抓取结果，已满时覆盖最旧的一次
+
+        Args:
+            hot_list: 热榜数据（超过 max_items 的部分丢弃）
+            source: 数据源键名
+            category: 板块键名
+            poll_time: 抓取时间戳，默认为当前时间
+        """
+        with self._lock:
+            slot = self._head
+            base = slot * self.max_items
+            strings = self._strings
+
+            # 覆盖前释放旧快照引用的字符串
+            if self._size == self.capacity:
+                strings.release(self._sources[slot])
+                strings.release(self._categories[slot])
+                for index in range(base, base + self._counts[slot]):
+                    strings.release(self._words[index])
+                    strings.release(self._labels[index])
+
+            items = hot_list[:self.max_items]
+            for index, item in enumerate(items, base):
+                self._words[index] = strings.acquire(item['word'])
+                self._labels[index] = strings.acquire(item.get('label', '') or '')
+                self._ranks[index] = item['rank']
+                self._hots[index] = int(item.get('hot_value') or 0)
+            self._counts[slot] = len(items)
+            self._sources[slot] = strings.acquire(source)
+            self._categories[slot] = strings.acquire(category)
+            self._times[slot] = datetime.now().timestamp() if poll_time is None else poll_time
+
+            self._head = (slot + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def _slots(self, k: Optional[int]) -> List[int]:
+        """最近 k 次抓取的位置（从旧到新）"""
+        k = self._size if k is None else max(0, min(k, self._size))
+        return [(self._head - k + offset) % self.capacity for offset in range(k)]
+
+    def window(self, k: Optional[int] = None) -> List[Dict]:
+        """
+        最近 k 次抓取（格式与归档快照一致，可直接用于 trend_score）
+
+        Args:
+            k: 抓取次数，默认全部
+
+        Returns:
+            快照列表（从旧到新），每项为 {'t', 'source', 'category', 'items': [[rank, word, hot_value, label], ...]}
+        """
+        with self._lock:
+            strings = self._strings
+            snapshots = []
+            for slot in self._slots(k):
+                base = slot * self.max_items
+                snapshots.append({
+                    't': datetime.fromtimestamp(self._times[slot]).strftime(TIME_FORMAT),
+                    'source': strings[self._sources[slot]],
+                    'category': strings[self._categories[slot]],
+                    'items': [
+                        [self._ranks[index], strings[self._words[index]], self._hots[index], strings[self._labels[index]]]
+                        for index in range(base, base + self._counts[slot])
+                    ],
+                })
+            return snapshots
+
+    def rank_history(self, word: str, k: Optional[int] = None) -> List[Optional[int]]:
+        """
+        词条最近 k 次抓取的排名（迷你趋势图用）
+
+        Args:
+            word: 词条
+            k: 抓取次数，默认全部
+
+        Returns:
+            排名列表（从旧到新），未上榜为 None
+        """
+        with self._lock:
+            word_id = self._strings.lookup(word)
+            slots = self._slots(k)
+            if word_id is None:
+                return [None] * len(slots)
+            history = []
+            for slot in slots:
+                base = slot * self.max_items
+                rank = None
+                for index in range(base, base + self._counts[slot]):
+                    if self._words[index] == word_id:
+                        rank = self._ranks[index]
+                        break
+                history.append(rank)
+            return history
+
+    def rank_deltas(self, k: int = 1) -> Dict[str, Optional[int]]:
+        """
+        最新一次抓取中各词条相对 k 次之前的排名变化
+
+        Args:
+            k: 比较的间隔次数
+
+        Returns:
+            词条 -> 排名上升的名次（负数为下降），k 次之前未上榜为 None
+        """
+        with self._lock:
+            slots = self._slots(k + 1)
+            if not slots:
+                return {}
+            latest = slots[-1]
+            previous_ranks: Dict[int, int] = {}
+            if len(slots) > k:
+                base = slots[0] * self.max_items
+                for index in range(base, base + self._counts[slots[0]]):
+                    previous_ranks.setdefault(self._words[index], self._ranks[index])
+
+            deltas = {}
+            base = latest * self.max_items
+            for index in range(base, base + self._counts[latest]):
+                word = self._strings[self._words[index]]
+                if word in deltas:
+                    continue
+                previous = previous_ranks.get(self._words[index])
+                deltas[word] = None if previous is None else previous - self._ranks[index]
+            return deltas
+
+    @property
+    def string_count(self) -> int:
+        """字符串表中的字符串数量"""
+        return len(self._strings)
+
+    def memory_bytes(self) -> int:
+        """缓冲区占用的字节数（定长列 + 字符串表）"""
+        with self._lock:
+            columns = (self._times, self._counts, self._sources, self._categories,
+                       self._words, self._labels, self._ranks, self._hots)
+            return sum(sys.getsizeof(column) for column in columns) + self._strings.memory_bytes()
+
+
+class RecentSnapshots:
+    """按 数据源 x 板块 管理环形缓冲区"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, max_items: int = DEFAULT_MAX_ITEMS):
+        """
+        初始化
+
+        Args:
+            capacity: 每个榜单保留的抓取次数
+            max_items: 每次抓取最多保留的条目数
+        """
+        self.capacity = capacity
+        self.max_items = max_items
+        self._rings: Dict[Tuple[str, str], SnapshotRing] = {}
+        self._lock = threading.Lock()
+
+    def record(self, hot_list: List[Dict], source: str, category: str = 'all',
+               poll_time: Optional[float] = None) -> SnapshotRing:
+        """
+        记录一次抓取结果
+
+        Args:
+            hot_list: 热榜数据
+            source: 数据源键名
+            category: 板块键名
+            poll_time: 抓取时间戳，默认为当前时间
+
+        Returns:
+            该榜单的缓冲区
+        """
+        with self._lock:
+            ring = self._rings.get((source, category))
+            if ring is None:
+                ring = self._rings[(source, category)] = SnapshotRing(self.capacity, self.max_items)
+            ring.append(hot_list, source, category, poll_time)
+            RECENT_SNAPSHOT_BYTES.set(ring.memory_bytes(), source=source, category=category)
+        return ring
+
+    def get(self, source: str, category: str = 'all') -> Optional[SnapshotRing]:
+        """获取榜单的缓冲区，没有记录过时返回 None"""
+        return self._rings.get((source, category))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        内存统计
+
+        Returns:
+            {'boards', 'snapshots', 'strings', 'bytes'}
+        """
+        with self._lock:
+            rings = list(self._rings.values())
+            return {
+                'boards': len(rings),
+                'snapshots': sum(len(ring) for ring in rings),
+                'strings': sum(ring.string_count for ring in rings),
+                'bytes': sum(ring.memory_bytes() for ring in rings),
+            }
+
+
+# 常驻进程共享的最近快照
+RECENT_SNAPSHOTS = RecentSnapshots()
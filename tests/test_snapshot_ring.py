@@ -0,0 +1,44 @@
+"""
+最近快照环形缓冲区测试
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from snapshot_ring import SnapshotRing
+
+pytest.importorskip('numpy')
+from trend_score import score_snapshots
+
+
+def _hot_list(words, hot_value=1000):
+    return [{'rank': rank, 'word': word, 'hot_value': hot_value * (10 - rank), 'label': ''}
+            for rank, word in enumerate(words, 1)]
+
+
+def test_window_includes_source_and_category():
+    ring = SnapshotRing(capacity=2, max_items=5)
+    ring.append(_hot_list(['a', 'b']), 'douyin', 'tech', poll_time=1_700_000_000)
+    ring.append(_hot_list(['b', 'c']), 'douyin', 'tech', poll_time=1_700_000_600)
+    ring.append(_hot_list(['c', 'd']), 'weibo', 'tech', poll_time=1_700_001_200)
+
+    window = ring.window()
+    assert [(snapshot['source'], snapshot['category']) for snapshot in window] == [
+        ('douyin', 'tech'), ('weibo', 'tech'),
+    ]
+    # 被覆盖的快照引用的字符串已释放
+    assert ring.string_count == len({'b', 'c', 'd', '', 'douyin', 'weibo', 'tech'})
+
+
+def test_window_feeds_score_snapshots():
+    ring = SnapshotRing(capacity=4, max_items=5)
+    for offset, words in enumerate([['a', 'b', 'c'], ['b', 'a', 'c'], ['c', 'b', 'a']]):
+        ring.append(_hot_list(words), 'douyin', 'all', poll_time=1_700_000_000 + offset * 600)
+
+    scored = score_snapshots(ring.window(), limit=3)
+    assert {row['word'] for row in scored} == {'a', 'b', 'c'}
+    assert all(row['sources'] == ['douyin'] for row in scored)
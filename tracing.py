@@ -0,0 +1,190 @@
+"""
+轻量级链路追踪模块
+以嵌套 span 记录一次抓取周期内各阶段的耗时，并导出为 Chrome trace-event 文件
+
+设置环境变量 TRACE_DIR 后启用，每天一个文件（trace-YYYYMMDD.json），
+可直接用 chrome://tracing、Perfetto 或 speedscope 打开查看火焰图。
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """一次被追踪的操作"""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'attributes', 'start_time', '_start')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any):
+        """设置 span 属性"""
+        self.attributes[key] = value
+
+    def elapsed(self) -> float:
+        """已耗时（秒）"""
+        return time.perf_counter() - self._start
+
+
+class _NoopSpan:
+    """追踪关闭时使用的空 span"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+# 当前上下文中正在执行的 span
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('current_span', default=None)
+
+
+class ChromeTraceExporter:
+    """
+    Chrome trace-event 文件导出器
+
+    文件采用 JSON Array Format，省略结尾的 ]（该格式允许），
+    因此可以跨进程、跨运行持续追加。
+    """
+
+    def __init__(self, trace_dir: str):
+        self.trace_dir = trace_dir
+        self._lock = threading.Lock()
+        os.makedirs(trace_dir, exist_ok=True)
+
+    def _path(self, timestamp: float) -> str:
+        return os.path.join(self.trace_dir, f"trace-{time.strftime('%Y%m%d', time.localtime(timestamp))}.json")
+
+    def export(self, span: Span, duration: float):
+        """
+        写出一个已结束的 span
+
+        Args:
+            span: 已结束的 span
+            duration: 耗时（秒）
+        """
+        args = {key: value for key, value in span.attributes.items()}
+        args['trace_id'] = span.trace_id
+        args['span_id'] = span.span_id
+        if span.parent_id:
+            args['parent_id'] = span.parent_id
+
+        event = {
+            'name': span.name,
+            'cat': 'douyin',
+            'ph': 'X',
+            'ts': int(span.start_time * 1_000_000),
+            'dur': int(duration * 1_000_000),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args,
+        }
+        line = json.dumps(event, ensure_ascii=False, default=str)
+
+        path = self._path(span.start_time)
+        with self._lock:
+            try:
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(('[\n' if f.tell() == 0 else ',\n') + line)
+            except OSError as e:
+                logger.warning("写入追踪文件失败: %s", e)
+
+
+# 当前生效的导出器，None 表示追踪关闭
+_exporter: Optional[ChromeTraceExporter] = None
+_configured = False
+
+
+def configure(trace_dir: Optional[str] = None):
+    """
+    配置追踪导出目录
+
+    Args:
+        trace_dir: 追踪文件目录，为 None 时读取 TRACE_DIR 环境变量；为空则关闭追踪
+    """
+    global _exporter, _configured
+    if trace_dir is None:
+        trace_dir = os.getenv('TRACE_DIR', '').strip()
+    _exporter = ChromeTraceExporter(trace_dir) if trace_dir else None
+    _configured = True
+
+
+def _get_exporter() -> Optional[ChromeTraceExporter]:
+    if not _configured:
+        configure()
+    return _exporter
+
+
+def current_span():
+    """获取当前上下文中的 span（追踪关闭时返回空 span）"""
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    追踪一段代码
+
+    用法:
+        with span('fetch_api', url=api_url) as s:
+            ...
+            s.set_attribute('status', 200)
+
+    Args:
+        name: span 名称
+        **attributes: 初始属性
+    """
+    exporter = _get_exporter()
+    if exporter is None:
+        yield NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    trace_id = parent.trace_id if parent else uuid.uuid4().hex
+    current = Span(name, trace_id, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        if not isinstance(e, (SystemExit, GeneratorExit)):
+            current.set_attribute('error', type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        exporter.export(current, current.elapsed())
+
+
+def traced(name: Optional[str] = None):
+    """
+    函数追踪装饰器
+
+    Args:
+        name: span 名称，默认使用函数名
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,505 @@
+"""
+热榜历史归档模块
+按天追加保存每次抓取的快照（JSONL），并在写入时增量维护按词条汇总的统计，
+查询时只读汇总文件，不需要扫描全部快照。汇总按月分区保存，每次写入只重写当月的分区，
+历史月份的分区不再变化（归档提交到仓库时只产生当月分区的变更）
+"""
+import os
+import json
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from fingerprint import content_fingerprint
+from trend_score import score_snapshots
+from trend_series import RETENTION, TrendSeries
+
+logger = logging.getLogger(__name__)
+
+# 汇总文件格式版本（2：按月分区）
+ROLLUP_VERSION = 2
+
+SNAPSHOT_DIR = 'snapshots'
+ROLLUP_DIR = 'rollups'
+META_FILE = '_meta.json'
+
+# 旧版（单文件）汇总，加载时自动迁移为按月分区
+LEGACY_ROLLUP_FILE = 'rollups.json'
+
+# 前 N 名视为"进入前十"
+TOP_N = 10
+
+# 时间格式
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+HOUR_FORMAT = '%Y-%m-%d %H'
+DATE_FORMAT = '%Y-%m-%d'
+
+# 默认归档目录
+DEFAULT_HISTORY_DIR = os.getenv('HISTORY_DIR', 'data/history')
+
+
+def _empty_rollups() -> Dict:
+    return {
+        'polls': 0,
+        'last_poll': None,
+        'words': {},
+        'labels': {},
+        # 数据源/板块 -> [上一次快照内容的摘要, 所在小时]（只在月分区中记录）
+        'last_snapshots': {},
+    }
+
+
+def _merge_rollups(merged: Dict, partition: Dict):
+    """
+    将一个月分区合并进汇总（各月的小时和日期互不重叠，在榜小时数可直接相加）
+
+    Args:
+        merged: 合并后的汇总（原地更新）
+        partition: 月分区
+    """
+    words = merged['words']
+    for word, part in partition['words'].items():
+        stats = words.get(word)
+        if stats is None:
+            words[word] = dict(part, sources=list(part['sources']), daily=dict(part['daily']))
+            continue
+        stats['first_seen'] = min(stats['first_seen'], part['first_seen'])
+        stats['last_seen'] = max(stats['last_seen'], part['last_seen'])
+        if (part['peak_rank'], part['peak_rank_time']) < (stats['peak_rank'], stats['peak_rank_time']):
+            stats['peak_rank'] = part['peak_rank']
+            stats['peak_rank_time'] = part['peak_rank_time']
+        if part['peak_hot_value'] > stats['peak_hot_value']:
+            stats['peak_hot_value'] = part['peak_hot_value']
+            stats['peak_hot_value_time'] = part['peak_hot_value_time']
+        stats['hours'] += part['hours']
+        stats['top10_hours'] += part['top10_hours']
+        for key in ('last_hour', 'last_top10_hour'):
+            if part[key] is not None and (stats[key] is None or part[key] > stats[key]):
+                stats[key] = part[key]
+        for source in part['sources']:
+            if source not in stats['sources']:
+                stats['sources'].append(source)
+        stats['daily'].update(part['daily'])
+
+    merged['labels'].update(partition['labels'])
+    merged['polls'] += partition['polls']
+    if partition['last_poll'] and (merged['last_poll'] is None or partition['last_poll'] > merged['last_poll']):
+        merged['last_poll'] = partition['last_poll']
+
+
+class TrendArchive:
+    """热榜历史归档与趋势查询"""
+
+    def __init__(self, history_dir: Optional[str] = None):
+        """
+        初始化归档
+
+        Args:
+            history_dir: 归档目录，默认使用环境变量 HISTORY_DIR 或 data/history
+        """
+        self.history_dir = Path(history_dir or DEFAULT_HISTORY_DIR)
+        self.snapshot_dir = self.history_dir / SNAPSHOT_DIR
+        self.rollup_dir = self.history_dir / ROLLUP_DIR
+        self._rollups: Optional[Dict] = None
+        # 本进程写入过的月分区（月份 -> 分区）
+        self._partitions: Dict[str, Dict] = {}
+        self.series = TrendSeries(self.history_dir)
+
+    @property
+    def rollups(self) -> Dict:
+        """所有月分区合并后的汇总（首次访问时从文件加载，之后随写入增量更新）"""
+        if self._rollups is None:
+            self._rollups = self._load_rollups()
+        return self._rollups
+
+    def _partition_path(self, month: str) -> Path:
+        return self.rollup_dir / f"{month}.json"
+
+    def _partition_files(self) -> List[Path]:
+        if not self.rollup_dir.exists():
+            return []
+        return sorted(path for path in self.rollup_dir.glob('*.json') if path.name != META_FILE)
+
+    def _load_rollups(self) -> Dict:
+        try:
+            meta = json.loads((self.rollup_dir / META_FILE).read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            if (self.history_dir / LEGACY_ROLLUP_FILE).exists():
+                logger.info("汇总文件格式变化（改为按月分区），重新生成")
+                return self.rebuild()
+            return _empty_rollups()
+        except (OSError, ValueError) as e:
+            logger.warning("汇总文件读取失败，将重新生成: %s", e)
+            return self.rebuild()
+        if meta.get('version') != ROLLUP_VERSION:
+            logger.info("汇总文件版本变化，重新生成")
+            return self.rebuild()
+
+        merged = _empty_rollups()
+        try:
+            for path in self._partition_files():
+                _merge_rollups(merged, json.loads(path.read_text(encoding='utf-8')))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("汇总分区读取失败，将重新生成: %s", e)
+            return self.rebuild()
+        return merged
+
+    def _partition(self, month: str) -> Dict:
+        """读取（或新建）一个月分区"""
+        partition = self._partitions.get(month)
+        if partition is None:
+            try:
+                partition = json.loads(self._partition_path(month).read_text(encoding='utf-8'))
+            except FileNotFoundError:
+                partition = _empty_rollups()
+            self._partitions[month] = partition
+        return partition
+
+    def _write_json(self, path: Path, data: Dict):
+        self.rollup_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.json.tmp')
+        tmp_path.write_text(
+            json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True),
+            encoding='utf-8'
+        )
+        os.replace(tmp_path, path)
+
+    def _save_partition(self, month: str):
+        self._write_json(self._partition_path(month), self._partitions[month])
+        meta_path = self.rollup_dir / META_FILE
+        if not meta_path.exists():
+            self._write_json(meta_path, {'version': ROLLUP_VERSION})
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def record(self, hot_list: List[Dict], source: str, category: str = 'all',
+               poll_time: Optional[datetime] = None) -> Optional[Dict]:
+        """
+        归档一次抓取结果并更新汇总和趋势序列
+
+        Args:
+            hot_list: 热榜数据
+            source: 数据源键名
+            category: 板块键名
+            poll_time: 抓取时间，默认为当前时间
+
+        Returns:
+            写入的快照，热榜为空或与同一小时内上一次快照完全相同时返回 None
+        """
+        if not hot_list:
+            return None
+        poll_time = (poll_time or datetime.now()).replace(microsecond=0)
+
+        items = [
+            [item['rank'], item['word'], int(item.get('hot_value') or 0), item.get('label', '')]
+            for item in hot_list
+        ]
+        # 同一小时内内容（含精确热度）完全相同的快照不再追加：这样的快照不会改变任何汇总值，
+        # 而热度有任何变化都要写入，否则峰值热度和每日统计会丢失（在榜时长按小时计，跨小时的快照始终写入）
+        digest = content_fingerprint(items)
+        hour = poll_time.strftime(HOUR_FORMAT)
+        month = hour[:7]
+        rollups = self.rollups
+        partition = self._partition(month)
+        last_snapshots = partition['last_snapshots']
+        board = f"{source}/{category}"
+        if last_snapshots.get(board) == [digest, hour]:
+            logger.info("📭 %s 与本小时上一次快照完全相同，跳过归档", board)
+            return None
+        snapshot = {
+            't': poll_time.strftime(TIME_FORMAT),
+            'source': source,
+            'category': category,
+            'items': items,
+        }
+
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        snapshot_path = self.snapshot_dir / f"{poll_time.strftime(DATE_FORMAT)}.jsonl"
+        with open(snapshot_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(snapshot, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+        # 合并后的汇总和当月分区做相同的增量更新，只写回当月分区
+        self._apply(rollups, snapshot)
+        self._apply(partition, snapshot)
+        last_snapshots[board] = [digest, hour]
+        self._save_partition(month)
+        self.series.apply(snapshot)
+        self.series.save()
+        logger.info("🗄️  已归档 %s 条热榜（%s/%s）", len(hot_list), source, category)
+        return snapshot
+
+    @staticmethod
+    def _apply(rollups: Dict, snapshot: Dict):
+        """将一条快照合并进汇总（增量更新）"""
+        poll_time = snapshot['t']
+        hour = poll_time[:13]
+        date = poll_time[:10]
+        source = snapshot['source']
+        words = rollups['words']
+        day_labels = rollups['labels'].setdefault(date, {})
+
+        for rank, word, hot_value, label in snapshot['items']:
+            stats = words.get(word)
+            if stats is None:
+                stats = words[word] = {
+                    'first_seen': poll_time,
+                    'last_seen': poll_time,
+                    'peak_rank': rank,
+                    'peak_rank_time': poll_time,
+                    'peak_hot_value': hot_value,
+                    'peak_hot_value_time': poll_time,
+                    'hours': 0,
+                    'top10_hours': 0,
+                    'last_hour': None,
+                    'last_top10_hour': None,
+                    'sources': [],
+                    'daily': {},
+                }
+
+            stats['last_seen'] = max(stats['last_seen'], poll_time)
+            if rank < stats['peak_rank']:
+                stats['peak_rank'] = rank
+                stats['peak_rank_time'] = poll_time
+            if hot_value > stats['peak_hot_value']:
+                stats['peak_hot_value'] = hot_value
+                stats['peak_hot_value_time'] = poll_time
+
+            # 在榜时长按小时计，同一小时内多次抓取（或多个数据源）只算一次
+            if stats['last_hour'] != hour:
+                stats['hours'] += 1
+                stats['last_hour'] = hour
+                if label:
+                    day_labels[label] = day_labels.get(label, 0) + 1
+            if rank <= TOP_N and stats['last_top10_hour'] != hour:
+                stats['top10_hours'] += 1
+                stats['last_top10_hour'] = hour
+
+            if source not in stats['sources']:
+                stats['sources'].append(source)
+
+            # 每日: [最高排名, 最高热度]
+            daily = stats['daily'].get(date)
+            if daily is None:
+                stats['daily'][date] = [rank, hot_value]
+            else:
+                daily[0] = min(daily[0], rank)
+                daily[1] = max(daily[1], hot_value)
+
+        rollups['polls'] += 1
+        if rollups['last_poll'] is None or poll_time > rollups['last_poll']:
+            rollups['last_poll'] = poll_time
+
+    def snapshot_files(self) -> List[Path]:
+        """
+        按日期排序的快照文件（每天一个，文件名为日期）
+
+        Returns:
+            快照文件路径列表
+        """
+        if not self.snapshot_dir.exists():
+            return []
+        return sorted(self.snapshot_dir.glob('*.jsonl'))
+
+    @staticmethod
+    def read_snapshot_file(path: Path) -> Iterator[Dict]:
+        """
+        逐行读取一个快照文件（跳过损坏的行）
+
+        Args:
+            path: 快照文件路径
+
+        Yields:
+            快照字典
+        """
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning("跳过损坏的快照行: %s", path.name)
+
+    def iter_snapshots(self, since: Optional[datetime] = None) -> Iterator[Dict]:
+        """
+        按时间顺序遍历归档快照
+
+        Args:
+            since: 只返回该时间之后的快照
+
+        Yields:
+            快照字典 {'t', 'source', 'category', 'items': [[rank, word, hot_value, label], ...]}
+        """
+        since_text = since.strftime(TIME_FORMAT) if since else None
+        for path in self.snapshot_files():
+            if since_text and path.stem < since_text[:10]:
+                continue
+            for snapshot in self.read_snapshot_file(path):
+                if since_text and snapshot['t'] < since_text:
+                    continue
+                yield snapshot
+
+    def rebuild(self, save: bool = True) -> Dict:
+        """
+        从全部快照重新生成汇总（按月分区）和趋势序列
+
+        Args:
+            save: 是否写回汇总文件
+
+        Returns:
+            新的汇总数据（所有月份合并）
+        """
+        rollups = _empty_rollups()
+        partitions: Dict[str, Dict] = {}
+        for snapshot in self.iter_snapshots():
+            self._apply(rollups, snapshot)
+            month = snapshot['t'][:7]
+            self._apply(partitions.setdefault(month, _empty_rollups()), snapshot)
+        self._rollups = rollups
+        self._partitions = partitions
+
+        if rollups['last_poll']:
+            last_poll = datetime.strptime(rollups['last_poll'], TIME_FORMAT)
+            self.series.rebuild(self.iter_snapshots(since=last_poll - timedelta(seconds=RETENTION)))
+
+        if save:
+            for path in self._partition_files():
+                if path.stem not in partitions:
+                    path.unlink()
+            self._write_json(self.rollup_dir / META_FILE, {'version': ROLLUP_VERSION})
+            for month in partitions:
+                self._save_partition(month)
+            legacy_path = self.history_dir / LEGACY_ROLLUP_FILE
+            if legacy_path.exists():
+                legacy_path.unlink()
+            self.series.save()
+        logger.info("🔁 汇总已重新生成: %s 次抓取, %s 个词条", rollups['polls'], len(rollups['words']))
+        return rollups
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def word_stats(self, word: str) -> Optional[Dict]:
+        """
+        查询单个词条的汇总统计
+
+        Args:
+            word: 词条
+
+        Returns:
+            统计字典，未出现过则返回 None
+        """
+        stats = self.rollups['words'].get(word)
+        if stats is None:
+            return None
+        return {
+            'word': word,
+            'first_seen': stats['first_seen'],
+            'last_seen': stats['last_seen'],
+            'peak_rank': stats['peak_rank'],
+            'peak_rank_time': stats['peak_rank_time'],
+            'peak_hot_value': stats['peak_hot_value'],
+            'peak_hot_value_time': stats['peak_hot_value_time'],
+            'hours': stats['hours'],
+            'top10_hours': stats['top10_hours'],
+            'sources': list(stats['sources']),
+        }
+
+    def daily(self, word: str) -> List[Dict]:
+        """
+        查询词条每天的最高排名和最高热度
+
+        Args:
+            word: 词条
+
+        Returns:
+            按日期排序的列表 [{'date', 'best_rank', 'peak_hot_value'}, ...]
+        """
+        stats = self.rollups['words'].get(word)
+        if stats is None:
+            return []
+        return [
+            {'date': date, 'best_rank': best_rank, 'peak_hot_value': peak_hot_value}
+            for date, (best_rank, peak_hot_value) in sorted(stats['daily'].items())
+        ]
+
+    def search(self, keyword: str, limit: int = 20) -> List[Dict]:
+        """
+        按关键词查找词条（子串匹配），按在榜时长排序
+
+        Args:
+            keyword: 关键词
+            limit: 返回数量
+
+        Returns:
+            词条统计列表
+        """
+        matched = [word for word in self.rollups['words'] if keyword in word]
+        matched.sort(key=lambda word: self.rollups['words'][word]['hours'], reverse=True)
+        return [self.word_stats(word) for word in matched[:limit]]
+
+    def top_words(self, by: str = 'hours', days: Optional[int] = None, limit: int = 20) -> List[Dict]:
+        """
+        查询排行靠前的词条
+
+        Args:
+            by: 排序字段（hours / top10_hours / peak_hot_value / peak_rank）
+            days: 只统计最近 N 天内出现过的词条
+            limit: 返回数量
+
+        Returns:
+            词条统计列表
+        """
+        words = self.rollups['words']
+        since = None
+        if days:
+            since = (datetime.now() - timedelta(days=days)).strftime(TIME_FORMAT)
+
+        candidates = [word for word, stats in words.items() if since is None or stats['last_seen'] >= since]
+        if by == 'peak_rank':
+            candidates.sort(key=lambda word: (words[word]['peak_rank'], -words[word]['hours']))
+        else:
+            candidates.sort(key=lambda word: words[word][by], reverse=True)
+        return [self.word_stats(word) for word in candidates[:limit]]
+
+    def top_labels(self, days: int = 7, limit: int = 10) -> List[Dict]:
+        """
+        统计最近 N 天出现最多的标签（按词条在榜小时数计）
+
+        Args:
+            days: 统计天数
+            limit: 返回数量
+
+        Returns:
+            [{'label', 'count'}, ...]
+        """
+        since = (datetime.now() - timedelta(days=days - 1)).strftime(DATE_FORMAT)
+        totals: Dict[str, int] = {}
+        for date, labels in self.rollups['labels'].items():
+            if date < since:
+                continue
+            for label, count in labels.items():
+                totals[label] = totals.get(label, 0) + count
+        ranked = sorted(totals.items(), key=lambda pair: pair[1], reverse=True)
+        return [{'label': label, 'count': count} for label, count in ranked[:limit]]
+
+    def trending(self, hours: int = 24, limit: int = 20, category: str = 'all') -> List[Dict]:
+        """
+        跨数据源的趋势排行（按 trend_score 的混合趋势分，需要 numpy）
+
+        Args:
+            hours: 统计最近 N 小时的快照
+            limit: 返回数量
+            category: 板块键名
+
+        Returns:
+            [{'word', 'score', 'percentile', 'zscore', 'momentum', 'sources', ...}, ...]
+        """
+        since = datetime.now() - timedelta(hours=hours)
+        snapshots = (s for s in self.iter_snapshots(since=since) if s.get('category', 'all') == category)
+        return score_snapshots(snapshots, now=datetime.now().timestamp(), limit=limit)
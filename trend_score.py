@@ -0,0 +1,237 @@
+"""
+跨数据源趋势评分模块（NumPy 向量化）
+各数据源的热度字段含义和量级不同（hot_value / view_count / hot_level / search_count），
+这里把归档快照转换为列式数组，在每次抓取内计算热度的 z 分数和百分位，
+再在每个数据源内按时间衰减计算动量，混合为可以跨数据源比较的趋势分
+"""
+import os
+import importlib.util
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from lazy_import import lazy_import
+
+# numpy 为可选依赖，只有评分时才导入
+np = lazy_import('numpy')
+
+# 时间格式（与 trend_archive 一致）
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 时间衰减半衰期（小时）
+DEFAULT_HALF_LIFE_HOURS = float(os.getenv('TREND_HALF_LIFE_HOURS', '6'))
+
+# 趋势分的混合权重：当前百分位、当前 z 分数、动量
+SCORE_WEIGHTS = {'percentile': 0.5, 'zscore': 0.2, 'momentum': 0.3}
+
+
+def numpy_available() -> bool:
+    """是否安装了 numpy"""
+    return importlib.util.find_spec('numpy') is not None
+
+
+@dataclass(frozen=True)
+class PollArrays:
+    """列式存储的多次抓取结果，每个数组的一行对应一个热榜条目"""
+
+    words: List[str]
+    sources: List[str]
+    labels: List[str]
+    poll: 'np.ndarray'
+    word: 'np.ndarray'
+    source: 'np.ndarray'
+    time: 'np.ndarray'
+    rank: 'np.ndarray'
+    hot: 'np.ndarray'
+
+    @classmethod
+    def from_snapshots(cls, snapshots: Iterable[Dict]) -> 'PollArrays':
+        """
+        从归档快照（{'t', 'source', 'category', 'items'}）构建数组
+
+        Args:
+            snapshots: 快照序列
+
+        Returns:
+            列式数组
+        """
+        word_ids: Dict[str, int] = {}
+        source_ids: Dict[str, int] = {}
+        labels: List[str] = []
+        poll, word, source, times, ranks, hots = [], [], [], [], [], []
+
+        for poll_id, snapshot in enumerate(snapshots):
+            poll_time = datetime.strptime(snapshot['t'], TIME_FORMAT).timestamp()
+            source_id = source_ids.setdefault(snapshot['source'], len(source_ids))
+            items = snapshot['items']
+            poll.extend([poll_id] * len(items))
+            source.extend([source_id] * len(items))
+            times.extend([poll_time] * len(items))
+            for rank, item_word, hot_value, label in items:
+                word.append(word_ids.setdefault(item_word, len(word_ids)))
+                ranks.append(rank)
+                hots.append(hot_value)
+                labels.append(label)
+
+        return cls(
+            words=list(word_ids),
+            sources=list(source_ids),
+            labels=labels,
+            poll=np.asarray(poll, dtype=np.int64),
+            word=np.asarray(word, dtype=np.int64),
+            source=np.asarray(source, dtype=np.int64),
+            time=np.asarray(times, dtype=np.float64),
+            rank=np.asarray(ranks, dtype=np.float64),
+            hot=np.asarray(hots, dtype=np.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+
+def normalize_polls(arrays: PollArrays):
+    """
+    在每次抓取内归一化热度（每次抓取只来自一个数据源，因此即按数据源归一化）
+
+    Args:
+        arrays: 列式数组
+
+    Returns:
+        (zscore, percentile) 两个数组：log 热度的 z 分数，以及热度在本次抓取中的百分位（0~1）
+    """
+    poll = arrays.poll
+    counts = np.bincount(poll).astype(np.float64)
+    group_size = counts[poll]
+
+    log_hot = np.log1p(np.maximum(arrays.hot, 0.0))
+    mean = np.bincount(poll, log_hot) / counts
+    var = np.maximum(np.bincount(poll, log_hot * log_hot) / counts - mean * mean, 0.0)
+    std = np.sqrt(var)[poll]
+    zscore = np.divide(log_hot - mean[poll], std, out=np.zeros_like(log_hot), where=std > 1e-12)
+
+    # 按 (抓取, 热度, 排名倒序) 排序后的组内位置即为百分位，热度相同（或没有热度）时按排名区分
+    order = np.lexsort((-arrays.rank, arrays.hot, poll))
+    starts = np.concatenate(([0.0], np.cumsum(counts)[:-1]))
+    position = np.empty_like(log_hot)
+    position[order] = np.arange(len(order)) - starts[poll[order]]
+    percentile = np.divide(position, group_size - 1, out=np.ones_like(log_hot), where=group_size > 1)
+    return zscore, percentile
+
+
+def score_arrays(arrays: PollArrays, now: Optional[float] = None,
+                 half_life_hours: float = DEFAULT_HALF_LIFE_HOURS, limit: int = 20) -> List[Dict]:
+    """
+    计算每个词条的趋势分
+
+    当前百分位 / z 分数取词条最近一次出现时各数据源的平均值，并按距今时间衰减；
+    动量为每个数据源内百分位随时间变化的加权回归斜率（只使用该数据源的抓取，越近的抓取权重越大，
+    未上榜的抓取按 0 计），再对词条出现过的数据源取平均，其他数据源的抓取不会拉低动量
+
+    Args:
+        arrays: 列式数组
+        now: 当前时间戳（秒），默认为最后一次抓取的时间
+        half_life_hours: 时间衰减半衰期（小时）
+        limit: 返回数量
+
+    Returns:
+        按趋势分从高到低排列的词条列表
+    """
+    if len(arrays) == 0:
+        return []
+    word = arrays.word
+    n_words = len(arrays.words)
+    now = float(arrays.time.max()) if now is None else now
+
+    zscore, percentile = normalize_polls(arrays)
+
+    # 时间衰减权重（x 为距今小时数，取负值）
+    hours = (arrays.time - now) / 3600.0
+    weight = np.power(0.5, np.maximum(-hours, 0.0) / half_life_hours)
+
+    # 词条最近一次出现时的百分位和 z 分数（多个数据源同时出现时取平均）
+    latest_time = np.full(n_words, -np.inf)
+    np.maximum.at(latest_time, word, arrays.time)
+    is_latest = (arrays.time == latest_time[word]).astype(np.float64)
+    latest_count = np.bincount(word, is_latest, minlength=n_words)
+    freshness = np.power(0.5, np.maximum(now - latest_time, 0.0) / 3600.0 / half_life_hours)
+    current = np.bincount(word, percentile * is_latest, minlength=n_words) / latest_count * freshness
+    current_z = np.bincount(word, zscore * is_latest, minlength=n_words) / latest_count
+
+    # 按 (词条, 数据源) 的加权最小二乘斜率（百分位 / 小时）：词条在该数据源未出现的抓取按百分位 0 计，
+    # 因此 x 相关的求和对同一数据源的所有词条相同，只需按数据源对其抓取求一次
+    n_sources = len(arrays.sources)
+    poll_first = np.unique(arrays.poll, return_index=True)[1]
+    poll_source = arrays.source[poll_first]
+    poll_hours = hours[poll_first]
+    poll_weight = weight[poll_first]
+    sw = np.bincount(poll_source, poll_weight, minlength=n_sources)
+    sx = np.bincount(poll_source, poll_weight * poll_hours, minlength=n_sources)
+    sxx = np.bincount(poll_source, poll_weight * poll_hours * poll_hours, minlength=n_sources)
+    pair = word * n_sources + arrays.source
+    n_pairs = n_words * n_sources
+    pair_source = np.arange(n_pairs) % n_sources
+    present = np.bincount(pair, minlength=n_pairs) > 0
+    sy = np.bincount(pair, weight * percentile, minlength=n_pairs)
+    sxy = np.bincount(pair, weight * hours * percentile, minlength=n_pairs)
+    denominator = (sw * sxx - sx * sx)[pair_source]
+    slope = np.divide(sw[pair_source] * sxy - sx[pair_source] * sy, denominator,
+                      out=np.zeros(n_pairs), where=denominator > 1e-9)
+    # 该数据源所有抓取在同一时间时无法回归，视为从 0 升入（取该数据源的当前百分位）
+    pair_freshness = np.repeat(freshness, n_sources)
+    pair_momentum = np.where(denominator > 1e-9, np.tanh(slope * half_life_hours),
+                             sy / np.maximum(sw[pair_source], 1e-12) * pair_freshness)
+    pair_momentum = np.where(present, pair_momentum, 0.0).reshape(n_words, n_sources)
+    momentum = pair_momentum.sum(axis=1) / present.reshape(n_words, n_sources).sum(axis=1)
+
+    score = (
+        SCORE_WEIGHTS['percentile'] * current
+        + SCORE_WEIGHTS['zscore'] * 0.5 * (1.0 + np.tanh(current_z / 2.0)) * freshness
+        + SCORE_WEIGHTS['momentum'] * momentum
+    )
+
+    # 出现过的数据源（位掩码）和最近一次出现的条目（同一时间取百分位最高的一条）
+    source_mask = np.zeros(n_words, dtype=np.int64)
+    np.bitwise_or.at(source_mask, word, np.left_shift(1, arrays.source))
+    order = np.lexsort((percentile, arrays.time, word))
+    sorted_word = word[order]
+    group_end = np.append(sorted_word[1:] != sorted_word[:-1], True)
+    last_row = np.empty(n_words, dtype=np.int64)
+    last_row[sorted_word[group_end]] = order[group_end]
+
+    limit = min(limit, n_words)
+    top = np.argpartition(-score, limit - 1)[:limit]
+    top = top[np.argsort(-score[top], kind='stable')]
+
+    results = []
+    for word_id in top.tolist():
+        row = int(last_row[word_id])
+        results.append({
+            'word': arrays.words[word_id],
+            'score': round(float(score[word_id]), 4),
+            'percentile': round(float(current[word_id]), 4),
+            'zscore': round(float(current_z[word_id]), 4),
+            'momentum': round(float(momentum[word_id]), 4),
+            'sources': [source for bit, source in enumerate(arrays.sources) if source_mask[word_id] >> bit & 1],
+            'last_seen': datetime.fromtimestamp(float(latest_time[word_id])).strftime(TIME_FORMAT),
+            'rank': int(arrays.rank[row]),
+            'hot_value': int(arrays.hot[row]),
+            'label': arrays.labels[row],
+        })
+    return results
+
+
+def score_snapshots(snapshots: Iterable[Dict], now: Optional[float] = None,
+                    half_life_hours: float = DEFAULT_HALF_LIFE_HOURS, limit: int = 20) -> List[Dict]:
+    """
+    对归档快照计算趋势分（PollArrays.from_snapshots + score_arrays）
+
+    Args:
+        snapshots: 快照序列
+        now: 当前时间戳（秒），默认为最后一次抓取的时间
+        half_life_hours: 时间衰减半衰期（小时）
+        limit: 返回数量
+
+    Returns:
+        按趋势分从高到低排列的词条列表
+    """
+    return score_arrays(PollArrays.from_snapshots(snapshots), now, half_life_hours, limit)
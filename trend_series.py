@@ -0,0 +1,232 @@
+"""
+热榜趋势序列模块
+在归档时增量维护每个词条最近 7 天的小时级分桶（热度和排名的 最小/最大/最后值），
+并为网页导出当前上榜词条的 24 小时 / 7 天降采样序列，输出大小受字节预算限制
+"""
+import os
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 状态文件格式版本
+SERIES_VERSION = 1
+
+SERIES_FILE = 'series.json'
+
+HOUR = 3600
+
+# 导出窗口：名称 -> (窗口长度, 分桶宽度)，单位秒
+WINDOWS = {
+    '24h': (24 * HOUR, HOUR),
+    '7d': (7 * 24 * HOUR, 6 * HOUR),
+}
+
+# 状态中保留的最长历史
+RETENTION = max(length for length, _ in WINDOWS.values())
+
+# 默认导出字节预算
+DEFAULT_BYTE_BUDGET = int(os.getenv('SERIES_BYTE_BUDGET', str(48 * 1024)))
+
+
+def _epoch(poll_time: str) -> int:
+    """将归档时间字符串转换为秒级时间戳"""
+    return int(datetime.strptime(poll_time, '%Y-%m-%d %H:%M:%S').timestamp())
+
+
+def _merge(bucket: Optional[List[int]], hot_value: int, rank: int) -> List[int]:
+    """
+    合并一个观测值到分桶
+
+    分桶格式: [热度最小, 热度最大, 热度最后, 排名最小, 排名最大, 排名最后]
+    """
+    if bucket is None:
+        return [hot_value, hot_value, hot_value, rank, rank, rank]
+    bucket[0] = min(bucket[0], hot_value)
+    bucket[1] = max(bucket[1], hot_value)
+    bucket[2] = hot_value
+    bucket[3] = min(bucket[3], rank)
+    bucket[4] = max(bucket[4], rank)
+    bucket[5] = rank
+    return bucket
+
+
+class TrendSeries:
+    """热度 / 排名时间序列"""
+
+    def __init__(self, history_dir: str):
+        """
+        初始化序列存储
+
+        Args:
+            history_dir: 归档目录（与 TrendArchive 相同）
+        """
+        self.path = Path(history_dir) / SERIES_FILE
+        self._state: Optional[Dict] = None
+
+    @property
+    def state(self) -> Dict:
+        """序列状态（首次访问时从文件加载）"""
+        if self._state is None:
+            self._state = self._load()
+        return self._state
+
+    def _load(self) -> Dict:
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            if data.get('version') == SERIES_VERSION:
+                return data
+            logger.info("序列文件版本变化，重新开始累计")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning("序列文件读取失败，重新开始累计: %s", e)
+        return {'version': SERIES_VERSION, 'last_poll': 0, 'hourly': {}}
+
+    def save(self):
+        """写回序列状态"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        tmp_path.write_text(
+            json.dumps(self.state, ensure_ascii=False, separators=(',', ':'), sort_keys=True),
+            encoding='utf-8'
+        )
+        os.replace(tmp_path, self.path)
+
+    def apply(self, snapshot: Dict):
+        """
+        合并一条归档快照（TrendArchive.record 的返回值）
+
+        Args:
+            snapshot: 快照字典 {'t', 'source', 'category', 'items'}
+        """
+        poll_epoch = _epoch(snapshot['t'])
+        hour_key = str(poll_epoch - poll_epoch % HOUR)
+        words = self.state['hourly'].setdefault(snapshot['source'], {})
+
+        for rank, word, hot_value, _label in snapshot['items']:
+            buckets = words.setdefault(word, {})
+            buckets[hour_key] = _merge(buckets.get(hour_key), hot_value, rank)
+
+        self.state['last_poll'] = max(self.state['last_poll'], poll_epoch)
+        self._prune()
+
+    def _prune(self):
+        """删除超出保留期的分桶和词条"""
+        cutoff = self.state['last_poll'] - RETENTION
+        for source, words in list(self.state['hourly'].items()):
+            for word, buckets in list(words.items()):
+                for hour_key in [key for key in buckets if int(key) <= cutoff]:
+                    del buckets[hour_key]
+                if not buckets:
+                    del words[word]
+            if not words:
+                del self.state['hourly'][source]
+
+    def rebuild(self, snapshots: Iterable[Dict]):
+        """
+        从归档快照重新生成状态
+
+        Args:
+            snapshots: 按时间顺序的快照（TrendArchive.iter_snapshots）
+        """
+        self._state = {'version': SERIES_VERSION, 'last_poll': 0, 'hourly': {}}
+        for snapshot in snapshots:
+            self.apply(snapshot)
+
+    def _window(self, buckets: Dict[str, List[int]], length: int, step: int, end: int) -> List[List[int]]:
+        """
+        将小时分桶降采样到指定窗口
+
+        Returns:
+            [[桶序号, 热度最小, 热度最大, 热度最后, 排名最小, 排名最大, 排名最后], ...]
+            桶序号从窗口起点算起
+        """
+        start = end - length + HOUR
+        start -= start % step
+        merged: Dict[int, List[int]] = {}
+        for hour_key in sorted(buckets, key=int):
+            hour = int(hour_key)
+            if hour < start:
+                continue
+            index = (hour - start) // step
+            bucket = buckets[hour_key]
+            current = merged.get(index)
+            if current is None:
+                merged[index] = list(bucket)
+            else:
+                current[0] = min(current[0], bucket[0])
+                current[1] = max(current[1], bucket[1])
+                current[2] = bucket[2]
+                current[3] = min(current[3], bucket[3])
+                current[4] = max(current[4], bucket[4])
+                current[5] = bucket[5]
+        return [[index] + values for index, values in sorted(merged.items())]
+
+    def export(self, words_by_source: Dict[str, List[str]], byte_budget: int = DEFAULT_BYTE_BUDGET) -> Dict:
+        """
+        导出当前上榜词条的降采样序列
+
+        词条按传入顺序（排名）保留，超出字节预算时从排名靠后的词条开始舍弃。
+        输出只依赖归档内容，数据未变化时输出字节也不变。
+
+        Args:
+            words_by_source: 数据源键名 -> 当前上榜词条（按排名排序）
+            byte_budget: 输出 JSON 的最大字节数
+
+        Returns:
+            序列数据
+        """
+        end = self.state['last_poll']
+        end -= end % HOUR
+        windows = {}
+        for name, (length, step) in WINDOWS.items():
+            start = end - length + HOUR
+            windows[name] = {'start': start - start % step, 'step': step}
+
+        # (排名, 数据源, 词条, 序列)，按排名交错合并各数据源，舍弃时各数据源均衡
+        entries = []
+        for source, words in words_by_source.items():
+            hourly = self.state['hourly'].get(source, {})
+            for position, word in enumerate(words):
+                buckets = hourly.get(word)
+                if not buckets:
+                    continue
+                series = {
+                    name: self._window(buckets, length, step, end)
+                    for name, (length, step) in WINDOWS.items()
+                }
+                entries.append((position, source, word, series))
+        entries.sort(key=lambda entry: entry[0])
+
+        def build(count: int) -> Dict:
+            series: Dict[str, Dict] = {}
+            for _, source, word, data in entries[:count]:
+                series.setdefault(source, {})[word] = data
+            return {
+                'version': SERIES_VERSION,
+                'end': end,
+                'windows': windows,
+                'fields': ['i', 'hot_min', 'hot_max', 'hot_last', 'rank_min', 'rank_max', 'rank_last'],
+                'series': series,
+            }
+
+        # 逐条累加字节数，找到预算内能容纳的最多词条
+        base_size = len(json.dumps(build(0), ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        size = base_size
+        count = 0
+        for _, source, word, data in entries:
+            entry_size = len(json.dumps({word: data}, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            # 新数据源还需要 "source":{} 的开销
+            entry_size += len(source.encode('utf-8')) + 6
+            if size + entry_size > byte_budget:
+                break
+            size += entry_size
+            count += 1
+
+        if count < len(entries):
+            logger.info("✂️  序列超出 %s 字节预算，保留 %s/%s 个词条", byte_budget, count, len(entries))
+        return build(count)
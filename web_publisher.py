@@ -0,0 +1,211 @@
+"""
+网页数据发布模块
+按 板块 x 数据源 输出内容寻址的 JSON 分片（附带 gzip / brotli 预压缩文件）和一个小清单文件，
+热榜指纹未变化的分片直接沿用（热榜可自带精确指纹，如趋势榜），浏览器可以永久缓存分片文件
+"""
+import os
+import gzip
+import json
+import hashlib
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fingerprint import hot_list_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# 清单格式版本
+MANIFEST_VERSION = 1
+
+# 分片子目录和文件名
+SHARD_DIR = 'shards'
+MANIFEST_FILE = 'manifest.json'
+LEGACY_FILE = 'hot_list.json'
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖
+    brotli = None
+
+
+def _dumps(data) -> bytes:
+    """最小化 JSON 序列化（键排序，保证相同内容得到相同字节）"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+def board_key(category: str, source: str) -> str:
+    """分片键名：<板块>.<数据源>"""
+    return f"{category}.{source}"
+
+
+class WebPublisher:
+    """网页数据发布器"""
+
+    def __init__(self, data_dir: str, write_legacy: bool = True):
+        """
+        初始化发布器
+
+        Args:
+            data_dir: 数据输出目录（如 docs/data）
+            write_legacy: 是否同时输出兼容旧版页面的 hot_list.json
+        """
+        self.data_dir = Path(data_dir)
+        self.shard_dir = self.data_dir / SHARD_DIR
+        self.write_legacy = write_legacy
+
+    def _write_file(self, key: str, data) -> Dict:
+        """
+        按内容哈希写出单个文件（已存在则跳过）
+
+        Args:
+            key: 文件键名
+            data: 文件内容
+
+        Returns:
+            {'path': 相对数据目录的路径, 'bytes': 字节数}
+        """
+        body = _dumps(data)
+        digest = hashlib.sha256(body).hexdigest()
+        filename = f"{key}.{digest[:16]}.json"
+        path = self.shard_dir / filename
+
+        if not path.exists():
+            tmp_path = path.with_suffix('.json.tmp')
+            tmp_path.write_bytes(body)
+            os.replace(tmp_path, path)
+            # mtime=0 保证相同内容生成相同的压缩文件
+            (self.shard_dir / f"{filename}.gz").write_bytes(gzip.compress(body, compresslevel=9, mtime=0))
+            if brotli is not None:
+                (self.shard_dir / f"{filename}.br").write_bytes(brotli.compress(body))
+            logger.info("🧩 写入分片: %s (%s 字节)", filename, len(body))
+        else:
+            logger.info("♻️  分片未变化: %s", filename)
+
+        return {'path': f"{SHARD_DIR}/{filename}", 'bytes': len(body)}
+
+    def _write_shard(self, key: str, board: Dict) -> Dict:
+        """
+        写出单个热榜分片
+
+        Args:
+            key: 分片键名
+            board: 分片内容
+
+        Returns:
+            清单中的分片条目
+        """
+        return {
+            'key': key,
+            'category': board['category'],
+            'category_name': board['category_name'],
+            'source': board['source'],
+            'source_name': board['source_name'],
+            'count': len(board['hot_list']),
+            **self._write_file(key, board),
+        }
+
+    def _load_manifest(self) -> Optional[Dict]:
+        """读取现有清单"""
+        try:
+            return json.loads((self.data_dir / MANIFEST_FILE).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def _prune(self, manifest: Dict):
+        """删除清单中不再引用的分片文件"""
+        entries = manifest['shards'] + list(manifest.get('extra', {}).values())
+        keep = {Path(entry['path']).name for entry in entries}
+        for path in self.shard_dir.iterdir():
+            base = path.name
+            for suffix in ('.gz', '.br'):
+                if base.endswith(suffix):
+                    base = base[:-len(suffix)]
+            if base not in keep:
+                path.unlink()
+                logger.info("🗑️  删除过期分片: %s", path.name)
+
+    def publish(self, boards: List[Dict], default_key: Optional[str] = None,
+                extra: Optional[Dict[str, Dict]] = None) -> Dict:
+        """
+        发布一组热榜
+
+        Args:
+            boards: 热榜列表，每项包含 category, category_name, source, source_name,
+                    hot_list, is_test_data，可选 fingerprint（沿用分片的依据，默认按展示精度计算热榜指纹）
+            default_key: 页面默认展示的分片键名，默认取第一个
+            extra: 附加数据文件（名称 -> 内容，如趋势序列），同样按内容哈希命名
+
+        Returns:
+            发布结果：{'manifest': 清单, 'changed': 清单是否变化}
+        """
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        previous = self._load_manifest()
+        previous_entries = {entry['key']: entry for entry in (previous or {}).get('shards', [])}
+
+        entries = []
+        for board in boards:
+            key = board_key(board['category'], board['source'])
+            fingerprint = board.get('fingerprint') or hot_list_fingerprint(board['hot_list'])
+
+            # 指纹和名称都与上一次相同的分片直接沿用，不再序列化和计算哈希
+            reused = previous_entries.get(key)
+            if (reused and reused.get('fingerprint') == fingerprint
+                    and reused['category_name'] == board['category_name']
+                    and reused['source_name'] == board['source_name']
+                    and (self.data_dir / reused['path']).exists()):
+                logger.info("♻️  分片指纹未变化: %s", key)
+                entries.append(reused)
+                continue
+
+            shard = {
+                'category': board['category'],
+                'category_name': board['category_name'],
+                'source': board['source'],
+                'source_name': board['source_name'],
+                'is_test_data': bool(board.get('is_test_data', False)),
+                'hot_list': board['hot_list'],
+            }
+            entries.append(dict(self._write_shard(key, shard), fingerprint=fingerprint))
+
+        keys = [entry['key'] for entry in entries]
+        if default_key not in keys:
+            default_key = keys[0] if keys else None
+
+        extra_entries = {name: self._write_file(name, data) for name, data in (extra or {}).items()}
+
+        if (previous and previous.get('shards') == entries and previous.get('default') == default_key
+                and previous.get('extra', {}) == extra_entries):
+            logger.info("📭 数据未变化，跳过写入清单")
+            return {'manifest': previous, 'changed': False}
+
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'update_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'default': default_key,
+            'shards': entries,
+            'extra': extra_entries,
+        }
+        manifest_path = self.data_dir / MANIFEST_FILE
+        tmp_path = manifest_path.with_suffix('.json.tmp')
+        tmp_path.write_bytes(_dumps(manifest))
+        os.replace(tmp_path, manifest_path)
+        logger.info("📋 清单已更新: %s (%s 个分片)", manifest_path, len(entries))
+
+        if self.write_legacy and default_key:
+            self._write_legacy(manifest, boards[keys.index(default_key)])
+
+        self._prune(manifest)
+        return {'manifest': manifest, 'changed': True}
+
+    def _write_legacy(self, manifest: Dict, board: Dict):
+        """输出兼容旧版页面和外部引用的 hot_list.json（只在数据变化时写入）"""
+        data = {
+            'hot_list': board['hot_list'],
+            'update_time': manifest['update_time'],
+            'source': board['source_name'],
+            'category': board['category'],
+            'is_test_data': bool(board.get('is_test_data', False)),
+        }
+        (self.data_dir / LEGACY_FILE).write_bytes(_dumps(data))
@@ -0,0 +1,311 @@
+"""
+多进程分片抓取 - 协调器 / worker 模式
+协调器把每个数据源的抓取任务写入 SQLite 租约队列，本机进程池和其他容器中的 worker
+共同领取并执行（每个数据源只抓取一次，再按启用的板块过滤），结果写回队列后由协调器统一推送到飞书。
+本机进程池结束后协调器继续领取剩余任务，外部 worker 崩溃时其任务在租约过期后即由协调器接手
+
+用法:
+    python workers.py coordinator --processes 4          # 协调器 + 本机 4 个 worker 进程
+    python workers.py coordinator --processes 0 --once   # 只调度一轮，由其他容器中的 worker 执行
+    python workers.py worker                             # 独立 worker（可在多个容器中运行）
+"""
+import os
+import sys
+import time
+import socket
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from config_loader import ConfigLoader
+from alert_engine import run_alerts
+from douyin_scraper import DouyinScraper
+from feishu_digest import DEFAULT_CARD_MAX_BYTES
+from feishu_notifier import FeishuNotifier
+from history_store import close_default_store, default_store, fetch_with_store
+from job_queue import DEFAULT_LEASE_SECONDS, DEFAULT_QUEUE_DB, JobQueue, job_key
+from last_known_good import LKG_CACHE
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# 每个数据源抓取的候选条数（各板块从中过滤）
+POOL_LIMIT = 50
+
+
+def build_jobs(config_loader: ConfigLoader) -> List[Tuple[str, str]]:
+    """
+    生成所有任务：每个数据源一个（抓取综合榜后在 worker 内按板块过滤，板块字段固定为 all）
+
+    Args:
+        config_loader: 配置加载器
+
+    Returns:
+        (数据源, 板块) 任务列表
+    """
+    return [(source, 'all') for source in config_loader.get_enabled_data_sources()]
+
+
+def run_job(config_loader: ConfigLoader, source: str, limit: int) -> Dict:
+    """
+    执行单个抓取任务：抓取一次数据源的综合榜，再按启用的板块过滤
+
+    Args:
+        config_loader: 配置加载器
+        source: 数据源键名
+        limit: 每个板块的热榜数量
+
+    Returns:
+        标准化后的结果，'hot_list' 为综合榜候选数据，'boards' 为各板块的热榜
+    """
+    start = time.perf_counter()
+    scraper = DouyinScraper(config_loader, source=source)
+    pool = fetch_with_store(scraper, max(limit, POOL_LIMIT), 'all', store=default_store(), max_age=0) or []
+    boards = []
+    for category in list(config_loader.get_enabled_categories()) or ['all']:
+        items = pool if category == 'all' else config_loader.filter_by_category(pool, category)
+        boards.append({
+            'category': category,
+            'category_name': config_loader.get_category_name(category),
+            'hot_list': items[:limit],
+        })
+    return {
+        'source': source,
+        'source_name': scraper.current_source_name,
+        'is_test_data': scraper.is_using_test_data,
+        'stale_seconds': scraper.stale_seconds,
+        'hot_list': pool,
+        'boards': boards,
+        'elapsed': round(time.perf_counter() - start, 3),
+    }
+
+
+def run_next(queue: JobQueue, config_loader: ConfigLoader, owner: str, limit: int) -> Optional[bool]:
+    """
+    领取并执行一个任务
+
+    Args:
+        queue: 任务队列
+        config_loader: 配置加载器
+        owner: worker 标识
+        limit: 每个板块的热榜数量
+
+    Returns:
+        没有可领取的任务时返回 None，否则返回结果是否已提交
+    """
+    job = queue.claim(owner, DEFAULT_LEASE_SECONDS)
+    if job is None:
+        return None
+
+    logger.info("🔧 [%s] 执行任务 %s（第 %s 次）", owner, job['job_key'], job['attempts'])
+    try:
+        payload = run_job(config_loader, job['source'], limit)
+    except Exception as e:
+        logger.error("❌ [%s] 任务 %s 失败: %s", owner, job['job_key'], e, exc_info=True)
+        queue.release(job, owner)
+        return False
+
+    status = 'ok' if payload['hot_list'] else 'error'
+    return queue.complete(job, owner, status, payload)
+
+
+def worker_loop(db_path: str, owner: str, exit_when_idle: bool = False,
+                idle_sleep: float = 5.0, config_file: str = 'config.yaml') -> int:
+    """
+    worker 主循环：领取任务 -> 执行 -> 提交结果
+
+    Args:
+        db_path: 队列数据库路径
+        owner: worker 标识
+        exit_when_idle: 没有可领取的任务时退出（本机进程池使用）
+        idle_sleep: 空闲时的等待间隔（秒）
+        config_file: 配置文件路径
+
+    Returns:
+        完成的任务数
+    """
+    queue = JobQueue(db_path)
+    config_loader = ConfigLoader(config_file)
+    # 常驻 worker 返回缓存数据后在后台继续重试；空闲即退出的本机 worker 不重试
+    LKG_CACHE.background_revalidate = not exit_when_idle
+    limit = config_loader.get_scraper_config().get('limit', 20)
+    done = 0
+
+    try:
+        while True:
+            completed = run_next(queue, config_loader, owner, limit)
+            if completed is None:
+                if exit_when_idle:
+                    break
+                time.sleep(idle_sleep)
+                # 常驻 worker 每轮检查一次配置变化（加载失败时 reload 已记录错误并保留当前配置）
+                try:
+                    config_loader.reload()
+                except Exception:
+                    pass
+                continue
+            if completed:
+                done += 1
+    finally:
+        queue.close()
+        # 进程池子进程退出时不执行 atexit，在这里关闭历史数据库连接
+        close_default_store()
+
+    return done
+
+
+def _pool_worker(db_path: str, owner: str, config_file: str) -> int:
+    """进程池入口（子进程中重新配置日志）"""
+    setup_logging(stream=sys.stdout)
+    return worker_loop(db_path, owner, exit_when_idle=True, config_file=config_file)
+
+
+def send_results(results: List[Dict], webhook_url: str, max_bytes: int = DEFAULT_CARD_MAX_BYTES) -> int:
+    """
+    将本轮结果推送到飞书（所有榜单打包为尽量少的汇总卡片）
+
+    Args:
+        results: JobQueue.results 返回的结果
+        webhook_url: 飞书 Webhook URL
+        max_bytes: 每张汇总卡片的字节预算
+
+    Returns:
+        发送成功的消息数
+    """
+    notifier = FeishuNotifier(webhook_url)
+    sent = 0
+    boards = []
+    for result in results:
+        payload = result['payload']
+        if result['status'] != 'ok':
+            logger.warning("⚠️  任务 %s 无数据，跳过推送", result['job_key'])
+            continue
+
+        if payload['is_test_data']:
+            sent += int(bool(notifier.send_text_message(
+                f"⚠️ {payload['source_name']}: 所有 API 都无法访问，当前为测试数据")))
+            continue
+        for board in payload['boards']:
+            if not board['hot_list']:
+                continue
+            boards.append({
+                'key': job_key(payload['source'], board['category']),
+                'heading': f"{payload['source_name']} · {board['category_name']}",
+                'hot_list': board['hot_list'],
+            })
+
+    if boards:
+        sent += notifier.send_digest(boards, f"📊 热榜汇总 · {len(boards)} 个榜单", max_bytes)
+    return sent
+
+
+def run_round(config_loader: ConfigLoader, queue: JobQueue, processes: int,
+              webhook_url: Optional[str], timeout: float) -> List[Dict]:
+    """
+    执行一轮：调度任务、等待所有任务完成、推送结果
+
+    Args:
+        config_loader: 配置加载器
+        queue: 任务队列
+        processes: 本机 worker 进程数（0 表示只依赖外部 worker）
+        webhook_url: 飞书 Webhook URL，为空时不推送
+        timeout: 等待本轮完成的最长时间（秒）
+
+    Returns:
+        本轮结果
+    """
+    start = time.perf_counter()
+    round_id = queue.schedule(build_jobs(config_loader))
+
+    if processes > 0:
+        host = socket.gethostname()
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [
+                executor.submit(_pool_worker, queue.db_path, f"{host}-{os.getpid()}-{index}",
+                                config_loader.config_file)
+                for index in range(processes)
+            ]
+            done = sum(future.result() for future in futures)
+        logger.info("🏁 本机 worker 完成 %s 个任务", done)
+
+    # 等待外部 worker 完成剩余任务（租约过期的任务会被重新领取）；使用本机 worker 时协调器自己继续领取，
+    # 外部 worker 崩溃时不必等到超时，租约一过期就接手
+    deadline = time.monotonic() + timeout
+    owner = f"{socket.gethostname()}-{os.getpid()}-coordinator"
+    limit = config_loader.get_scraper_config().get('limit', 20)
+    while queue.pending(round_id) and time.monotonic() < deadline:
+        if processes > 0 and run_next(queue, config_loader, owner, limit) is not None:
+            continue
+        time.sleep(1)
+
+    results = queue.results(round_id)
+    remaining = queue.pending(round_id)
+    logger.info(
+        "📦 本轮完成 %s 个任务，未完成 %s 个，耗时 %.2fs",
+        len(results), remaining, time.perf_counter() - start
+    )
+
+    for result in results:
+        payload = result['payload']
+        run_alerts(config_loader, payload['hot_list'], payload['source_name'], webhook_url,
+                   payload['is_test_data'] or payload.get('stale_seconds') is not None)
+
+    if webhook_url and results:
+        max_bytes = config_loader.get_display_config().get('card_max_bytes', DEFAULT_CARD_MAX_BYTES)
+        sent = send_results(results, webhook_url, max_bytes)
+        logger.info("📤 推送完成: %s 个榜单，发送 %s 条消息", len(results), sent)
+    return results
+
+
+def main():
+    """主函数"""
+    load_dotenv()
+    setup_logging(stream=sys.stdout)
+
+    parser = argparse.ArgumentParser(description='多进程分片抓取')
+    parser.add_argument('role', choices=['coordinator', 'worker'], help='运行角色')
+    parser.add_argument('--db', default=DEFAULT_QUEUE_DB, help='任务队列数据库路径')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='本机 worker 进程数（协调器）')
+    parser.add_argument('--once', action='store_true', help='只执行一轮（协调器）')
+    parser.add_argument('--timeout', type=float, default=600, help='等待一轮完成的最长时间（秒）')
+    parser.add_argument('--no-send', action='store_true', help='不推送到飞书')
+    args = parser.parse_args()
+
+    if args.role == 'worker':
+        owner = f"{socket.gethostname()}-{os.getpid()}"
+        logger.info("🔧 worker 启动: %s", owner)
+        try:
+            worker_loop(args.db, owner)
+        except KeyboardInterrupt:
+            logger.info("👋 worker 已停止")
+        return 0
+
+    webhook_url = None if args.no_send else os.getenv('FEISHU_WEBHOOK_URL')
+    config_loader = ConfigLoader()
+    queue = JobQueue(args.db)
+    interval = int(os.getenv('SCRAPE_INTERVAL_HOURS', '1')) * 3600
+
+    try:
+        while True:
+            round_start = time.monotonic()
+            run_round(config_loader, queue, args.processes, webhook_url, args.timeout)
+            if args.once:
+                break
+            time.sleep(max(0.0, interval - (time.monotonic() - round_start)))
+            try:
+                config_loader.reload()
+            except Exception:
+                # reload 已记录错误并保留当前配置
+                pass
+    except KeyboardInterrupt:
+        logger.info("👋 协调器已停止")
+    finally:
+        queue.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())